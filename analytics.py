@@ -0,0 +1,211 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # El análisis es opcional, solo se necesita para GET /api/admin/analitica
+    np = None
+
+# Columnas de las filas que carga el motor (ver AnaliticaDAO.open_votes)
+_ID, _CIRCUITO, _CANDIDATO, _ANULADO, _OBSERVADO, _ESTADO = range(6)
+APROBADO, PENDIENTE, RECHAZADO = 0, 1, 2
+
+# Agrupaciones disponibles: atributo del circuito por el que se agrupa
+AGRUPACIONES = ('departamento', 'ciudad', 'tipo_establecimiento', 'accesible', 'circuito')
+
+class VoteStore:
+    """Votos en arrays de NumPy, uno por columna, cargados en orden de id
+
+    La primera carga lee toda la tabla; las siguientes solo los votos con id mayor
+    a la marca (watermark) y el estado de los observados, que son los únicos que
+    cambian después de escritos. Los arrays se reemplazan enteros en cada refresco:
+    quien tomó un snapshot lo sigue leyendo sin locks.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._columnas = self._vacias()
+        self.watermark = 0
+        self.version = None
+        self.actualizado: Optional[float] = None
+        self.cargas_completas = 0
+        self.refrescos = 0
+        self.votos_leidos = 0
+        self.ultimo_refresco_ms = 0.0
+
+    @staticmethod
+    def _vacias() -> Dict[str, "np.ndarray"]:
+        return {
+            'id': np.empty(0, np.int64), 'circuito': np.empty(0, np.int64), 'candidato': np.empty(0, np.int64),
+            'anulado': np.empty(0, bool), 'observado': np.empty(0, bool), 'estado': np.empty(0, np.int8),
+        }
+
+    def __len__(self) -> int:
+        return len(self._columnas['id'])
+
+    def reset(self):
+        """Descartar todo (la próxima carga vuelve a leer la tabla completa)"""
+        self._columnas = self._vacias()
+        self.watermark = 0
+        self.cargas_completas += 1
+
+    def append(self, lotes: Iterable[Sequence[tuple]]):
+        """Agregar lotes de filas nuevas (en orden de id) y mover la marca
+
+        Cada lote se convierte a un array apenas llega, así las tuplas de un lote se
+        liberan antes de leer el siguiente.
+        """
+        lotes = [np.asarray(filas, dtype=np.int64).reshape(-1, 6) for filas in lotes if filas]
+        if not lotes:
+            return
+        nuevas = np.concatenate(lotes)
+        agregadas = {
+            'id': nuevas[:, _ID], 'circuito': nuevas[:, _CIRCUITO], 'candidato': nuevas[:, _CANDIDATO],
+            'anulado': nuevas[:, _ANULADO].astype(bool), 'observado': nuevas[:, _OBSERVADO].astype(bool),
+            'estado': nuevas[:, _ESTADO].astype(np.int8),
+        }
+        self._columnas = {nombre: np.concatenate((self._columnas[nombre], agregadas[nombre])) for nombre in agregadas}
+        self.watermark = int(nuevas[-1, _ID])
+        self.votos_leidos += len(nuevas)
+
+    def update_states(self, filas: Sequence[tuple]):
+        """Aplicar (id, estado) de votos ya cargados (validación de observados)"""
+        if not filas:
+            return
+        cambios = np.asarray(filas, dtype=np.int64).reshape(-1, 2)
+        ids = self._columnas['id']
+        posiciones = np.searchsorted(ids, cambios[:, 0])
+        encontrados = (posiciones < len(ids)) & (ids[np.minimum(posiciones, len(ids) - 1)] == cambios[:, 0])
+        estado = self._columnas['estado'].copy()
+        estado[posiciones[encontrados]] = cambios[encontrados, 1]
+        self._columnas = dict(self._columnas, estado=estado)
+
+    def snapshot(self) -> Dict[str, "np.ndarray"]:
+        return self._columnas
+
+    def stats(self) -> Dict:
+        """Contadores del motor"""
+        return {
+            "votos": len(self),
+            "watermark": self.watermark,
+            "memoria_mb": round(sum(a.nbytes for a in self._columnas.values()) / 1e6, 2),
+            "cargas_completas": self.cargas_completas,
+            "refrescos": self.refrescos,
+            "votos_leidos": self.votos_leidos,
+            "ultimo_refresco_ms": self.ultimo_refresco_ms,
+            "edad_s": round(time.monotonic() - self.actualizado, 1) if self.actualizado else None,
+        }
+
+def _indices(ordenados: "np.ndarray", valores: "np.ndarray"):
+    """Posición de cada valor en un array ordenado de ids y máscara de los que están"""
+    if len(ordenados) == 0:
+        return np.zeros(len(valores), np.int64), np.zeros(len(valores), bool)
+    posiciones = np.searchsorted(ordenados, valores)
+    posiciones = np.minimum(posiciones, len(ordenados) - 1)
+    return posiciones, ordenados[posiciones] == valores
+
+def cross_tab(votos: Dict[str, "np.ndarray"], circuito_ids: "np.ndarray", candidato_ids: "np.ndarray"):
+    """Matriz circuito × (candidatos, blanco, anulado) de votos aprobados y observados por circuito
+
+    circuito_ids y candidato_ids son los ids ordenados de cada dimensión; los votos a
+    candidatos de otra elección o de circuitos desconocidos no cuentan.
+    """
+    circuitos, candidatos = len(circuito_ids), len(candidato_ids)
+    columnas = candidatos + 2
+    fila, en_circuito = _indices(circuito_ids, votos['circuito'])
+    columna, es_candidato = _indices(candidato_ids, votos['candidato'])
+    blanco = (votos['candidato'] == 0) & ~votos['anulado']
+    columna = np.where(votos['anulado'], candidatos + 1, np.where(blanco, candidatos, columna))
+    cuenta = en_circuito & (votos['estado'] == APROBADO) & (votos['anulado'] | blanco | es_candidato)
+    matriz = np.bincount(fila[cuenta] * columnas + columna[cuenta], minlength=circuitos * columnas)
+    observados = np.bincount(fila[en_circuito & votos['observado']], minlength=circuitos)
+    return matriz.reshape(circuitos, columnas), observados
+
+def _redondear(valores, decimales: int = 2) -> list:
+    return [round(float(v), decimales) for v in valores]
+
+def group_stats(matriz: "np.ndarray", observados: "np.ndarray", grupos: "np.ndarray", cantidad_grupos: int) -> List[Dict]:
+    """Estadísticas por grupo de circuitos a partir de la matriz de cross_tab
+
+    Suma los votos del grupo y, sobre los circuitos con votos válidos, la media, el
+    desvío, el mínimo y el máximo del porcentaje de cada candidato, los circuitos
+    ganados por cada uno y el margen medio entre el primero y el segundo.
+    """
+    candidatos = matriz.shape[1] - 2
+    totales = np.zeros((cantidad_grupos, matriz.shape[1]), np.int64)
+    np.add.at(totales, grupos, matriz)
+    por_grupo_observados = np.bincount(grupos, weights=observados, minlength=cantidad_grupos)
+    circuitos_grupo = np.bincount(grupos, minlength=cantidad_grupos)
+
+    validos = matriz[:, :candidatos].sum(axis=1)
+    con_votos = validos > 0
+    g = grupos[con_votos]
+    porcentaje = matriz[con_votos, :candidatos] / validos[con_votos, None] * 100
+    n = np.bincount(g, minlength=cantidad_grupos)
+    suma = np.zeros((cantidad_grupos, candidatos))
+    cuadrados = np.zeros((cantidad_grupos, candidatos))
+    minimo = np.full((cantidad_grupos, candidatos), np.inf)
+    maximo = np.full((cantidad_grupos, candidatos), -np.inf)
+    np.add.at(suma, g, porcentaje)
+    np.add.at(cuadrados, g, porcentaje ** 2)
+    np.minimum.at(minimo, g, porcentaje)
+    np.maximum.at(maximo, g, porcentaje)
+    divisor = np.maximum(n, 1)[:, None]
+    media = suma / divisor
+    desvio = np.sqrt(np.maximum(cuadrados / divisor - media ** 2, 0))
+
+    if candidatos:
+        orden = np.sort(porcentaje, axis=1)
+        margen = orden[:, -1] - (orden[:, -2] if candidatos > 1 else 0)
+        ganador = np.argmax(porcentaje, axis=1)
+        ganados = np.bincount(g * candidatos + ganador, minlength=cantidad_grupos * candidatos).reshape(cantidad_grupos, candidatos)
+        margen_medio = np.bincount(g, weights=margen, minlength=cantidad_grupos) / np.maximum(n, 1)
+    else:
+        ganados = np.zeros((cantidad_grupos, 0), np.int64)
+        margen_medio = np.zeros(cantidad_grupos)
+
+    resultado = []
+    for i in range(cantidad_grupos):
+        total = int(totales[i].sum())
+        validos_grupo = int(totales[i, :candidatos].sum())
+        hay = n[i] > 0
+        resultado.append({
+            "circuitos": int(circuitos_grupo[i]),
+            "circuitos_con_votos": int(n[i]),
+            "votos": totales[i, :candidatos].tolist(),
+            "blanco": int(totales[i, candidatos]),
+            "anulado": int(totales[i, candidatos + 1]),
+            "observados": int(por_grupo_observados[i]),
+            "total_votos": total,
+            "porcentaje": _redondear(totales[i, :candidatos] / validos_grupo * 100 if validos_grupo else np.zeros(candidatos)),
+            "porcentaje_blanco": round(totales[i, candidatos] / total * 100, 2) if total else 0,
+            "porcentaje_anulado": round(totales[i, candidatos + 1] / total * 100, 2) if total else 0,
+            "porcentaje_por_circuito": {
+                "media": _redondear(media[i]),
+                "desvio": _redondear(desvio[i]),
+                "min": _redondear(minimo[i]) if hay else [],
+                "max": _redondear(maximo[i]) if hay else [],
+            },
+            "circuitos_ganados": ganados[i].tolist(),
+            "margen_medio": round(float(margen_medio[i]), 2),
+        })
+    return resultado
+
+def _clave(circuito: Dict, por: str) -> str:
+    if por == 'circuito':
+        return str(circuito['numero_circuito'])
+    if por == 'accesible':
+        # BOOLEAN llega como 0/1 en MySQL y como bool en SQLite
+        return 'true' if circuito['accesible'] else 'false'
+    return str(circuito[por] or '')
+
+def analyze(votos: Dict[str, "np.ndarray"], circuitos: List[Dict], candidatos: List[Dict], por: str) -> List[Dict]:
+    """Estadísticas agrupadas por un atributo del circuito (circuitos y candidatos ordenados por id)"""
+    circuito_ids = np.array([c['id'] for c in circuitos], dtype=np.int64)
+    candidato_ids = np.array([c['id'] for c in candidatos], dtype=np.int64)
+    matriz, observados = cross_tab(votos, circuito_ids, candidato_ids)
+    claves = [_clave(c, por) for c in circuitos]
+    unicas, grupos = np.unique(np.array(claves, dtype=object), return_inverse=True) if claves else (np.array([]), np.array([], np.int64))
+    estadisticas = group_stats(matriz, observados, grupos.astype(np.int64), len(unicas))
+    return [dict(clave=str(clave), **fila) for clave, fila in zip(unicas, estadisticas)]
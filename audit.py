@@ -0,0 +1,227 @@
+import multiprocessing
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from database import open_connection
+from dao.auditoria_dao import AuditoriaDAO
+from dao.conteo_dao import clave_conteo
+from dao.serie_dao import minuto
+
+# Auditoría de integridad por circuito (python run_audit.py, GET /api/admin/auditoria):
+# - AUDIT_WORKERS:          procesos del pool; cada uno abre su propia conexión al primario
+# - AUDIT_SHARD_CIRCUITS:   circuitos consecutivos (por id) que audita cada tarea
+# - AUDIT_MAX_COMPROBANTES: comprobantes faltantes o ajenos que se listan por circuito
+AUDIT_WORKERS = int(os.getenv('AUDIT_WORKERS', str(min(4, os.cpu_count() or 1))))
+AUDIT_SHARD_CIRCUITS = int(os.getenv('AUDIT_SHARD_CIRCUITS', '200'))
+AUDIT_MAX_COMPROBANTES = int(os.getenv('AUDIT_MAX_COMPROBANTES', '100'))
+# Votos leídos por vez del cursor sin buffer
+AUDIT_FETCH_ROWS = 5000
+
+# Tipos de discrepancia del reporte
+VOTOS_AUTORIZACIONES = 'votos_autorizaciones'      # votos != autorizaciones en estado VOTÓ
+COMPROBANTES_FALTANTES = 'comprobantes_faltantes'  # huecos en la secuencia C<circuito>-<n>
+COMPROBANTES_AJENOS = 'comprobantes_ajenos'        # comprobantes con el prefijo de otro circuito
+SECUENCIA = 'secuencia'                            # secuencias_comprobante != último comprobante emitido, o sin fila
+CONTEO = 'conteo'                                  # conteos != recuento de votos y autorizaciones
+SERIE = 'serie'                                    # series_minuto != recuento por minuto
+
+# Conexión propia de cada proceso del pool (la abre _iniciar_proceso)
+_conexion = None
+
+def _iniciar_proceso():
+    global _conexion
+    _conexion = open_connection()
+
+def _conectar():
+    """Conexión del proceso; se vuelve a abrir si se perdió en una tarea anterior"""
+    global _conexion
+    if _conexion is None or not _conexion.is_connected():
+        _conexion = open_connection()
+    return _conexion
+
+def _numero_comprobante(comprobante: str) -> Tuple[Optional[int], Optional[int]]:
+    """(circuito_id, número) de un comprobante C<circuito>-<n>; (None, None) si no es de la secuencia"""
+    prefijo, _, numero = comprobante.partition('-')
+    if not prefijo.startswith('C') or not prefijo[1:].isdigit() or not numero.isdigit():
+        return None, None
+    return int(prefijo[1:]), int(numero)
+
+def _discrepancia(circuitos: Dict[int, str], circuito_id: int, tipo: str, esperado, encontrado, **detalle) -> Dict:
+    return dict(circuito_id=circuito_id, numero_circuito=circuitos.get(circuito_id), tipo=tipo,
+                esperado=esperado, encontrado=encontrado, **detalle)
+
+def _comparar(circuitos: Dict[int, str], tipo: str, esperados: Counter, encontrados: Counter, detalle) -> List[Dict]:
+    """Discrepancias entre dos recuentos con claves (circuito_id, ...); detalle arma los campos del resto de la clave"""
+    distintas = [clave for clave in set(esperados) | set(encontrados) if esperados[clave] != encontrados[clave]]
+    return [
+        _discrepancia(circuitos, clave[0], tipo, esperados[clave], encontrados[clave], **detalle(clave))
+        for clave in sorted(distintas)
+    ]
+
+def audit_shard(circuitos: List[Tuple[int, str]]) -> Dict:
+    """Auditar un grupo de circuitos (corre en un proceso del pool)
+
+    Las lecturas van en una transacción de solo lectura con snapshot consistente:
+    no toman locks, la votación sigue mientras tanto y autorizaciones, votos y
+    contadores se ven en el mismo instante, así un voto que se confirma a mitad de
+    la auditoría no aparece como discrepancia.
+    """
+    inicio = time.perf_counter()
+    ids = [circuito_id for circuito_id, _ in circuitos]
+    numeros = dict(circuitos)
+    por_numero = {numero: circuito_id for circuito_id, numero in circuitos}
+    votaron, cantidad_votos = Counter(), Counter()
+    conteos_crudos, series_crudas = Counter(), Counter()
+    comprobantes, ajenos = defaultdict(list), defaultdict(list)
+    filas = 0
+
+    connection = _conectar()
+    connection.start_transaction(consistent_snapshot=True, readonly=True)
+    try:
+        autorizaciones = AuditoriaDAO.get_authorizations(connection, ids)
+        for circuito_id, estado, fecha_autorizacion in autorizaciones:
+            conteos_crudos[(circuito_id, 'votantes', 0)] += 1
+            if estado == 'VOTÓ':
+                votaron[(circuito_id,)] += 1
+            if fecha_autorizacion is not None:
+                series_crudas[(circuito_id, minuto(fecha_autorizacion), 'autorizaciones')] += 1
+
+        cursor = AuditoriaDAO.open_votes(connection, ids)
+        try:
+            for lote in iter(lambda: cursor.fetchmany(AUDIT_FETCH_ROWS), []):
+                for voto in lote:
+                    circuito_id = voto['circuito_id']
+                    cantidad_votos[(circuito_id,)] += 1
+                    clave = clave_conteo(voto)
+                    if clave is not None:
+                        conteos_crudos[clave] += 1
+                    momento = minuto(voto['timestamp'])
+                    series_crudas[(circuito_id, momento, 'votos')] += 1
+                    if voto['es_observado']:
+                        series_crudas[(circuito_id, momento, 'observados')] += 1
+                    # Los comprobantes J (journal) no usan la secuencia
+                    prefijo, numero = _numero_comprobante(voto['numero_comprobante'])
+                    if prefijo == circuito_id:
+                        comprobantes[circuito_id].append(numero)
+                    elif prefijo is not None:
+                        ajenos[circuito_id].append(voto['numero_comprobante'])
+        finally:
+            cursor.close()
+
+        secuencias = AuditoriaDAO.get_sequences(connection, ids)
+        conteos = Counter({(circuito_id, tipo, candidato_id): int(cantidad)
+                           for circuito_id, tipo, candidato_id, cantidad in AuditoriaDAO.get_tallies(connection, ids)})
+        series = Counter()
+        for numero, momento, tipo, cantidad in AuditoriaDAO.get_series(connection, list(por_numero)):
+            series[(por_numero[numero], momento, tipo)] += int(cantidad)
+        filas = len(autorizaciones) + sum(cantidad_votos.values()) + len(secuencias) + len(conteos) + len(series)
+    finally:
+        connection.rollback()
+
+    discrepancias = _comparar(numeros, VOTOS_AUTORIZACIONES, votaron, cantidad_votos, lambda clave: {})
+    for circuito_id in ids:
+        emitidos = comprobantes.get(circuito_id, [])
+        ultimo = max(emitidos, default=0)
+        if len(set(emitidos)) != ultimo:
+            presentes = set(emitidos)
+            faltantes = [n for n in range(1, ultimo + 1) if n not in presentes]
+            discrepancias.append(_discrepancia(
+                numeros, circuito_id, COMPROBANTES_FALTANTES, ultimo, len(presentes),
+                faltantes=faltantes[:AUDIT_MAX_COMPROBANTES], cantidad_faltantes=len(faltantes),
+            ))
+        if ajenos.get(circuito_id):
+            discrepancias.append(_discrepancia(
+                numeros, circuito_id, COMPROBANTES_AJENOS, 0, len(ajenos[circuito_id]),
+                comprobantes=sorted(ajenos[circuito_id])[:AUDIT_MAX_COMPROBANTES],
+            ))
+        # La secuencia se crea con el circuito: sin fila, sus votos fallan (encontrado = None)
+        if secuencias.get(circuito_id) != ultimo:
+            discrepancias.append(_discrepancia(numeros, circuito_id, SECUENCIA, ultimo, secuencias.get(circuito_id)))
+    discrepancias += _comparar(numeros, CONTEO, conteos_crudos, conteos,
+                               lambda clave: {"conteo": clave[1], "candidato_id": clave[2]})
+    discrepancias += _comparar(numeros, SERIE, series_crudas, series,
+                               lambda clave: {"serie": clave[2], "minuto": clave[1].isoformat()})
+    return {
+        "desde_id": ids[0],
+        "hasta_id": ids[-1],
+        "circuitos": len(ids),
+        "votos": sum(cantidad_votos.values()),
+        "autorizaciones": len(autorizaciones),
+        "filas": filas,
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "pid": os.getpid(),
+        "discrepancias": discrepancias,
+    }
+
+def _shards(circuitos: List[Tuple[int, str]], tamaño: int) -> List[List[Tuple[int, str]]]:
+    tamaño = max(1, tamaño)
+    return [circuitos[i:i + tamaño] for i in range(0, len(circuitos), tamaño)]
+
+def run_audit(numeros: Optional[List[str]] = None, workers: int = AUDIT_WORKERS,
+              shard_circuitos: int = AUDIT_SHARD_CIRCUITS) -> Dict:
+    """Auditar todos los circuitos (o los números indicados) repartidos en un pool de procesos
+
+    Devuelve el reporte: discrepancias por circuito, shards que fallaron, circuitos
+    pedidos que no existen y el rendimiento de la corrida. Los procesos se crean con
+    'spawn' para no heredar los pools ni los threads de quien llama.
+    """
+    inicio = datetime.now()
+    t0 = time.perf_counter()
+    connection = open_connection()
+    try:
+        circuitos = AuditoriaDAO.get_circuits(connection, numeros)
+    finally:
+        connection.close()
+    desconocidos = sorted(set(numeros) - {numero for _, numero in circuitos}) if numeros else []
+    shards = _shards(circuitos, shard_circuitos)
+    procesos = max(1, min(workers, len(shards)))
+
+    resultados, errores = [], []
+    if shards:
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto, initializer=_iniciar_proceso) as pool:
+            futuros = {pool.submit(audit_shard, shard): shard for shard in shards}
+            for futuro in as_completed(futuros):
+                shard = futuros[futuro]
+                try:
+                    resultados.append(futuro.result())
+                except Exception as e:
+                    errores.append({"desde_id": shard[0][0], "hasta_id": shard[-1][0], "circuitos": len(shard),
+                                    "error": f"{type(e).__name__}: {e}"})
+    segundos = time.perf_counter() - t0
+
+    resultados.sort(key=lambda r: r["desde_id"])
+    errores.sort(key=lambda e: e["desde_id"])
+    discrepancias = sorted((d for r in resultados for d in r.pop("discrepancias")), key=lambda d: d["circuito_id"])
+    votos = sum(r["votos"] for r in resultados)
+    filas = sum(r["filas"] for r in resultados)
+    auditados = sum(r["circuitos"] for r in resultados)
+    tiempos = [r["segundos"] for r in resultados]
+    return {
+        "inicio": inicio.isoformat(timespec='seconds'),
+        "ok": not discrepancias and not errores and not desconocidos,
+        "circuitos": len(circuitos),
+        "circuitos_auditados": auditados,
+        "circuitos_con_discrepancias": len({d["circuito_id"] for d in discrepancias}),
+        "circuitos_desconocidos": desconocidos,
+        "discrepancias_por_tipo": dict(Counter(d["tipo"] for d in discrepancias)),
+        "discrepancias": discrepancias,
+        "errores": errores,
+        "rendimiento": {
+            "procesos": procesos,
+            "shards": len(shards),
+            "segundos": round(segundos, 3),
+            "votos": votos,
+            "autorizaciones": sum(r["autorizaciones"] for r in resultados),
+            "filas_leidas": filas,
+            "circuitos_por_s": round(auditados / segundos, 1) if segundos else 0,
+            "votos_por_s": round(votos / segundos, 1) if segundos else 0,
+            "filas_por_s": round(filas / segundos, 1) if segundos else 0,
+            "shard_segundos_max": max(tiempos, default=0),
+            "shard_segundos_medio": round(sum(tiempos) / len(tiempos), 3) if tiempos else 0,
+        },
+        "shards": resultados,
+    }
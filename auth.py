@@ -3,6 +3,9 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from schemas import CurrentUser
 import os
 load_dotenv()
 
@@ -12,6 +15,7 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verificar contraseña"""
@@ -32,13 +36,48 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> str:
-    """Verificar y decodificar token JWT"""
+def create_user_token(user: dict) -> str:
+    """Crear token JWT con los datos de sesión que necesitan las rutas (rol y circuito)"""
+    return create_access_token(data={
+        "sub": user['username'],
+        "role": user.get('role') or 'mesa',
+        "circuito_id": user.get('circuito_id'),
+        "circuito": user.get('numero_circuito'),
+        "mesa_cerrada": bool(user.get('mesa_cerrada')),
+    })
+
+def decode_user_token(token: str) -> CurrentUser:
+    """Verificar el token y armar el usuario a partir de sus claims"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise JWTError("Token inválido")
-        return username
     except JWTError:
-        raise JWTError("Token inválido")
\ No newline at end of file
+        raise JWTError("Token inválido")
+    if payload.get("sub") is None or "role" not in payload:
+        # Tokens emitidos antes de incluir los claims de sesión
+        raise JWTError("Token inválido")
+    return CurrentUser(
+        username=payload["sub"],
+        role=payload["role"],
+        circuito_id=payload.get("circuito_id"),
+        numero_circuito=payload.get("circuito"),
+        mesa_cerrada=payload.get("mesa_cerrada", False),
+    )
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> CurrentUser:
+    """Dependencia compartida por los routers: usuario autenticado del token"""
+    try:
+        return decode_user_token(credentials.credentials)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido o expirado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+def require_role(*roles: str):
+    """Dependencia que exige uno de los roles indicados (leído del token)"""
+    def dependency(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+        if current_user.role not in roles:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permisos insuficientes")
+        return current_user
+    return dependency
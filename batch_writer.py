@@ -0,0 +1,200 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List
+from database import PoolTimeoutError, workload_limits
+
+# Ingesta de votos por lotes (write-behind con group commit). Con VOTE_BATCH_MODE=true
+# /api/votar valida la autorización, encola el voto y responde cuando su lote hace commit.
+VOTE_BATCH_ENABLED = os.getenv('VOTE_BATCH_MODE', 'false').lower() == 'true'
+
+# Tamaño máximo de lote, cuánto espera el primer elemento a que se sumen otros y
+# cuánto espera quien encoló: por defecto dos checkouts del pool de votación (el
+# lote en curso y el propio), así un escritor trabado responde 503 como el pool
+BATCH_CONFIG = {
+    'votos': {
+        'batch_size': int(os.getenv('VOTE_BATCH_SIZE', '100')),
+        'linger_ms': float(os.getenv('VOTE_BATCH_LINGER_MS', '5')),
+        'timeout_s': float(os.getenv('VOTE_BATCH_TIMEOUT_S', str(2 * workload_limits('votacion')['checkout_timeout']))),
+    },
+}
+
+# Marca de cierre para el thread escritor
+_STOP = object()
+
+class BatchWriter:
+    """Escritor en segundo plano que agrupa elementos y los escribe en un solo flush
+
+    flush recibe la lista de elementos del lote y devuelve una lista del mismo largo
+    con el resultado de cada uno (o la excepción a propagar a ese elemento). Cada
+    submit devuelve un Future que se resuelve cuando su lote terminó; wait y
+    wait_async lo esperan a lo sumo timeout_s.
+    """
+
+    def __init__(self, nombre: str, flush: Callable[[List[Any]], List[Any]], batch_size: int, linger_ms: float,
+                 timeout_s: float):
+        self.nombre = nombre
+        self.batch_size = max(1, batch_size)
+        self.linger_s = linger_ms / 1000
+        self.timeout_s = timeout_s
+        self._flush = flush
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._cerrado = False
+        self._thread = self._start()
+        self.lotes = 0
+        self.elementos = 0
+        self.lote_max = 0
+        self.errores = 0
+        self.timeouts = 0
+        self.reinicios = 0
+        self.flush_total = 0.0
+
+    def _start(self) -> threading.Thread:
+        thread = threading.Thread(target=self._run, name=f"batch-{self.nombre}", daemon=True)
+        thread.start()
+        return thread
+
+    def submit(self, item: Any) -> Future:
+        """Encolar un elemento; el Future se resuelve con su resultado tras el flush
+
+        Si el thread escritor murió se inicia otro, que sigue con lo que quedó en la cola.
+        """
+        with self._lock:
+            if self._cerrado:
+                raise RuntimeError(f"Escritor '{self.nombre}' cerrado")
+            if not self._thread.is_alive():
+                print(f"Escritor '{self.nombre}' detenido inesperadamente, reiniciando")
+                self._thread = self._start()
+                self.reinicios += 1
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _timeout(self) -> PoolTimeoutError:
+        with self._lock:
+            self.timeouts += 1
+        return PoolTimeoutError(f"Escritor '{self.nombre}': el lote no terminó tras {self.timeout_s:.1f}s")
+
+    def wait(self, future: Future) -> Any:
+        """Resultado del elemento; PoolTimeoutError (503) si no entró en un lote en timeout_s
+
+        Un elemento que todavía no entró en un lote se cancela y no se escribe. Uno
+        cuyo lote ya está en curso no se puede cancelar: se espera el resultado de
+        ese lote, acotado por su transacción, en vez de responder 503 por un voto
+        que puede quedar escrito.
+        """
+        try:
+            return future.result(timeout=self.timeout_s)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise self._timeout() from None
+        return future.result()
+
+    async def wait_async(self, future: Future) -> Any:
+        """Como wait, sin ocupar un thread"""
+        espera = asyncio.wrap_future(future)
+        # asyncio.wait no cancela al vencer: se decide abajo si se puede cancelar
+        terminados, _ = await asyncio.wait({espera}, timeout=self.timeout_s)
+        if not terminados and future.cancel():
+            raise self._timeout()
+        return await espera
+
+    def _run(self):
+        while True:
+            primero = self._queue.get()
+            if primero is _STOP:
+                return
+            lote = [primero]
+            detener = False
+            limite = time.monotonic() + self.linger_s
+            while len(lote) < self.batch_size:
+                restante = limite - time.monotonic()
+                try:
+                    siguiente = self._queue.get(timeout=restante) if restante > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if siguiente is _STOP:
+                    detener = True
+                    break
+                lote.append(siguiente)
+            self._escribir(lote)
+            if detener:
+                return
+
+    def _escribir(self, lote: list):
+        """Ejecutar el flush del lote y resolver los Futures"""
+        # Los que vencieron esperando en la cola ya respondieron 503: no se escriben
+        lote = [(item, future) for item, future in lote if future.set_running_or_notify_cancel()]
+        if not lote:
+            return
+        inicio = time.perf_counter()
+        try:
+            resultados = self._flush([item for item, _ in lote])
+        except Exception as e:
+            resultados = [e] * len(lote)
+        duracion = time.perf_counter() - inicio
+        errores = 0
+        for (_, future), resultado in zip(lote, resultados):
+            if isinstance(resultado, Exception):
+                errores += 1
+                future.set_exception(resultado)
+            else:
+                future.set_result(resultado)
+        with self._lock:
+            self.lotes += 1
+            self.elementos += len(lote)
+            self.lote_max = max(self.lote_max, len(lote))
+            self.errores += errores
+            self.flush_total += duracion
+
+    def stats(self) -> Dict:
+        """Contadores del escritor"""
+        with self._lock:
+            return {
+                "batch_size": self.batch_size,
+                "linger_ms": round(self.linger_s * 1000, 2),
+                "en_cola": self._queue.qsize(),
+                "lotes": self.lotes,
+                "elementos": self.elementos,
+                "lote_promedio": round(self.elementos / self.lotes, 1) if self.lotes else 0,
+                "lote_max": self.lote_max,
+                "errores": self.errores,
+                "timeouts": self.timeouts,
+                "reinicios": self.reinicios,
+                "flush_promedio_ms": round(self.flush_total / self.lotes * 1000, 2) if self.lotes else 0,
+            }
+
+    def close(self):
+        """Escribir lo pendiente y detener el thread"""
+        with self._lock:
+            self._cerrado = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+_writers: Dict[str, BatchWriter] = {}
+_writers_lock = threading.Lock()
+
+def get_batch_writer(nombre: str, flush: Callable[[List[Any]], List[Any]]) -> BatchWriter:
+    """Obtener (o crear) el escritor por lotes con la configuración de BATCH_CONFIG"""
+    writer = _writers.get(nombre)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(nombre)
+            if writer is None:
+                writer = BatchWriter(nombre, flush, **BATCH_CONFIG[nombre])
+                _writers[nombre] = writer
+    return writer
+
+def get_stats() -> Dict:
+    """Contadores de todos los escritores creados"""
+    return {nombre: writer.stats() for nombre, writer in _writers.items()}
+
+def shutdown_writers():
+    """Escribir los lotes pendientes y detener los escritores"""
+    for writer in list(_writers.values()):
+        writer.close()
+    _writers.clear()
@@ -0,0 +1 @@
+# Benchmarks de carga (se ejecutan con python -m benchmarks.<nombre>)
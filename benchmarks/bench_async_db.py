@@ -0,0 +1,84 @@
+"""
+Benchmark de throughput concurrente: rutas con servicios síncronos vs DB_MODE=async
+
+Simula N peticiones concurrentes a /api/resultados dentro de un único event loop,
+igual que un worker de uvicorn:
+
+- sync:  la corrutina llama al servicio síncrono (bloquea el loop en cada consulta)
+- async: la corrutina espera al servicio aiomysql
+
+También mide el retraso máximo del event loop (lo que sufre /api/votar mientras
+se calculan resultados).
+
+Uso:
+    python -m benchmarks.bench_async_db --concurrencia 50 --peticiones 500
+"""
+import argparse
+import asyncio
+import time
+from database import init_connection_pool, init_async_connection_pool, close_async_connection_pool
+from services.resultado_service import compute_results, compute_results_async
+
+async def _medir_lag(stop: asyncio.Event, muestras: list):
+    """Registrar cuánto se atrasa el event loop respecto a un tick de 10 ms"""
+    while not stop.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(0.01)
+        muestras.append(time.perf_counter() - inicio - 0.01)
+
+async def _ejecutar(modo: str, concurrencia: int, peticiones: int, departamento) -> dict:
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias = []
+
+    async def peticion_sync():
+        async with semaforo:
+            inicio = time.perf_counter()
+            compute_results(departamento)
+            latencias.append(time.perf_counter() - inicio)
+
+    async def peticion_async():
+        async with semaforo:
+            inicio = time.perf_counter()
+            await compute_results_async(departamento)
+            latencias.append(time.perf_counter() - inicio)
+
+    peticion = peticion_async if modo == 'async' else peticion_sync
+    stop = asyncio.Event()
+    lag = []
+    monitor = asyncio.create_task(_medir_lag(stop, lag))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(peticion() for _ in range(peticiones)))
+    duracion = time.perf_counter() - inicio
+
+    stop.set()
+    await monitor
+    latencias.sort()
+    return {
+        "modo": modo,
+        "peticiones": peticiones,
+        "duracion_s": round(duracion, 3),
+        "req_por_s": round(peticiones / duracion, 1),
+        "p50_ms": round(latencias[len(latencias) // 2] * 1000, 2),
+        "p99_ms": round(latencias[int(len(latencias) * 0.99) - 1] * 1000, 2),
+        "lag_loop_max_ms": round(max(lag, default=0) * 1000, 2),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrencia", type=int, default=50)
+    parser.add_argument("--peticiones", type=int, default=500)
+    parser.add_argument("--departamento", default=None)
+    args = parser.parse_args()
+
+    init_connection_pool()
+    await init_async_connection_pool()
+    try:
+        for modo in ("sync", "async"):
+            resultado = await _ejecutar(modo, args.concurrencia, args.peticiones, args.departamento)
+            print(resultado)
+    finally:
+        await close_async_connection_pool()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Benchmark de sentencias del camino de votación: texto vs sentencias preparadas
+
+Ejecuta las consultas calientes (usuario de mesa, circuito, autorización y
+actualización de estado) sobre una misma conexión del pool:
+
+- texto:      cursor normal, el servidor parsea cada sentencia
+- preparadas: execute_prepared, la sentencia se prepara una vez por conexión
+
+Reporta el tiempo promedio por sentencia y los contadores Com_stmt_* de la sesión.
+Las escrituras se hacen dentro de una transacción que se deshace al final.
+
+Uso:
+    python -m benchmarks.bench_prepared --usuario mesa1 --circuito 1 --credencial ABC123 --iteraciones 2000
+"""
+import argparse
+import time
+from datetime import datetime
+from database import init_connection_pool, get_pool, execute_prepared
+
+def _sentencias(args) -> list:
+    return [
+        ("usuario", "SELECT u.id, u.circuito_id, u.role FROM usuarios u WHERE u.username = %s", (args.usuario,), 'one'),
+        ("circuito", "SELECT id FROM circuitos WHERE numero_circuito = %s", (args.circuito,), 'one'),
+        ("autorizacion", "SELECT * FROM autorizaciones WHERE credencial = %s", (args.credencial,), 'one'),
+        ("update", "UPDATE autorizaciones SET estado = %s, fecha_voto = %s WHERE credencial = %s",
+         ('VOTO', datetime.now(), args.credencial), None),
+    ]
+
+def _texto(connection, query, params, fetch):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params)
+        if fetch:
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+def _preparada(connection, query, params, fetch):
+    execute_prepared(connection, query, params, fetch=fetch)
+
+def _contadores(connection) -> dict:
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SHOW SESSION STATUS LIKE 'Com_stmt%'")
+        return {nombre: int(valor) for nombre, valor in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+def _medir(connection, modo: str, sentencias: list, iteraciones: int) -> dict:
+    ejecutar = _preparada if modo == 'preparadas' else _texto
+    antes = _contadores(connection)
+    resultado = {"modo": modo}
+    connection.start_transaction()
+    try:
+        for nombre, query, params, fetch in sentencias:
+            inicio = time.perf_counter()
+            for _ in range(iteraciones):
+                ejecutar(connection, query, params, fetch)
+            resultado[f"{nombre}_us"] = round((time.perf_counter() - inicio) / iteraciones * 1e6, 1)
+    finally:
+        connection.rollback()
+    despues = _contadores(connection)
+    resultado["com_stmt"] = {k: despues[k] - antes.get(k, 0) for k in despues if despues[k] != antes.get(k, 0)}
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuario", required=True)
+    parser.add_argument("--circuito", required=True)
+    parser.add_argument("--credencial", required=True)
+    parser.add_argument("--iteraciones", type=int, default=2000)
+    args = parser.parse_args()
+
+    init_connection_pool()
+    pool = get_pool('votacion')
+    connection = pool.get_connection()
+    try:
+        sentencias = _sentencias(args)
+        for modo in ("texto", "preparadas"):
+            print(_medir(connection, modo, sentencias, args.iteraciones))
+    finally:
+        connection.close()
+    print(pool.stats()["sentencias_preparadas"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark de /api/resultados: sentencias y latencia por consulta de resultados
+
+Mide resultado_service.compute_results (total y por departamento) y
+compute_circuit_results con cada fuente de RESULTS_SOURCE:
+
+- votos:   agregación sobre las tablas crudas (una pasada con sumas condicionales)
+- conteos: contadores mantenidos en cada voto
+
+Después mide el caché de get_results: ráfagas de --concurrencia pedidos
+simultáneos con el caché vacío deben costar un solo cálculo.
+
+Las sentencias se cuentan con 'Questions' de MySQL (usar un servidor sin otro
+tráfico) o con el contador del backend SQLite.
+
+Uso:
+    python -m benchmarks.bench_resultados --departamento Montevideo --circuito 1 --iteraciones 200
+    DB_BACKEND=sqlite DB_SQLITE_PATH=/tmp/voting_db.sqlite3 python -m benchmarks.bench_resultados
+"""
+import argparse
+import threading
+import time
+import sqlite_backend
+import services.resultado_service as resultado_service
+from database import DB_BACKEND, init_connection_pool, get_db_connection
+
+def _sentencias() -> int:
+    if DB_BACKEND == 'sqlite':
+        return sqlite_backend.statement_count()
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        valor = int(cursor.fetchone()[1])
+        cursor.close()
+    return valor
+
+def _medir(fuente: str, nombre: str, consulta, iteraciones: int) -> dict:
+    resultado_service.RESULTS_SOURCE = fuente
+    consulta()
+    latencias = []
+    antes = _sentencias()
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        consulta()
+        latencias.append(time.perf_counter() - inicio)
+    # La lectura de 'Questions' también se cuenta a sí misma
+    sentencias = _sentencias() - antes - (0 if DB_BACKEND == 'sqlite' else 1)
+    latencias.sort()
+    return {
+        "fuente": fuente,
+        "consulta": nombre,
+        "sentencias_por_consulta": round(sentencias / iteraciones, 2),
+        "p50_ms": round(latencias[len(latencias) // 2] * 1000, 3),
+        "p99_ms": round(latencias[int(len(latencias) * 0.99) - 1] * 1000, 3),
+    }
+
+def _medir_cache(concurrencia: int, rafagas: int) -> dict:
+    """Ráfagas de pedidos simultáneos a get_results con el caché vacío"""
+    resultado_service.RESULTS_SOURCE = 'conteos'
+    cache = resultado_service._cache
+    antes, misses, coalesced = _sentencias(), cache.misses, cache.coalesced
+    latencias = []
+    for _ in range(rafagas):
+        cache.clear()
+        barrera = threading.Barrier(concurrencia)
+        def pedido():
+            barrera.wait()
+            inicio = time.perf_counter()
+            resultado_service.get_results()
+            latencias.append(time.perf_counter() - inicio)
+        hilos = [threading.Thread(target=pedido) for _ in range(concurrencia)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    sentencias = _sentencias() - antes - (0 if DB_BACKEND == 'sqlite' else 1)
+    latencias.sort()
+    return {
+        "fuente": "cache",
+        "consulta": f"total x{concurrencia}",
+        "calculos_por_rafaga": round((cache.misses - misses) / rafagas, 2),
+        "coalesced": cache.coalesced - coalesced,
+        "sentencias_por_rafaga": round(sentencias / rafagas, 2),
+        "p50_ms": round(latencias[len(latencias) // 2] * 1000, 3),
+        "p99_ms": round(latencias[int(len(latencias) * 0.99) - 1] * 1000, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--departamento", default="Montevideo")
+    parser.add_argument("--circuito", default="1")
+    parser.add_argument("--iteraciones", type=int, default=200)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    args = parser.parse_args()
+
+    init_connection_pool()
+    consultas = {
+        "total": lambda: resultado_service.compute_results(),
+        "departamento": lambda: resultado_service.compute_results(args.departamento),
+        "circuito": lambda: resultado_service.compute_circuit_results(args.circuito),
+    }
+    for fuente in ("votos", "conteos"):
+        for nombre, consulta in consultas.items():
+            print(_medir(fuente, nombre, consulta, args.iteraciones))
+    print(_medir_cache(args.concurrencia, max(1, args.iteraciones // 10)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark del camino de votación: votos/s y sentencias por voto bajo concurrencia
+
+Habilita N credenciales en el circuito de la mesa y las vota desde T threads
+con voto_service.cast_vote (un commit por voto, sin VOTE_BATCH_MODE) y con
+enqueue_vote (lotes con group commit, VOTE_BATCH_SIZE / VOTE_BATCH_LINGER_MS).
+En modo lote cada thread espera el commit de su voto: usar muchos threads.
+Las sentencias se cuentan con 'Questions' de MySQL (usar un servidor sin otro
+tráfico) o con el contador del backend SQLite. Escribe votos reales: correr
+contra una base de prueba.
+
+Uso:
+    python -m benchmarks.bench_votacion --usuario mesa1 --votos 2000 --threads 64 --modo ambos
+    DB_BACKEND=sqlite DB_SQLITE_PATH=/tmp/voting_db.sqlite3 python -m benchmarks.bench_votacion
+"""
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import sqlite_backend
+from database import DB_BACKEND, init_connection_pool, get_db_transaction
+from dao.conteo_dao import ConteoDAO
+from schemas import VotoRequest, CurrentUser
+from batch_writer import get_stats as get_batch_stats, shutdown_writers
+from services.voto_service import cast_vote, enqueue_vote, get_vote_writer
+
+def _habilitar(usuario: str, cantidad: int) -> tuple:
+    """Crear autorizaciones HABILITADA para el circuito de la mesa"""
+    prefijo = uuid.uuid4().hex[:8]
+    credenciales = [f"B{prefijo}{i:06d}" for i in range(cantidad)]
+    with get_db_transaction() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT circuito_id FROM usuarios WHERE username = %s", (usuario,))
+        circuito_id = cursor.fetchone()[0]
+        cursor.executemany(
+            """
+            INSERT INTO autorizaciones (credencial, circuito_id, estado, autorizado_por, fecha_autorizacion, es_autorizacion_especial)
+            VALUES (%s, %s, 'HABILITADA', %s, %s, FALSE)
+            """,
+            [(credencial, circuito_id, usuario, datetime.now()) for credencial in credenciales]
+        )
+        cursor.close()
+        ConteoDAO.add(connection, circuito_id, 'votantes', delta=cantidad)
+    return CurrentUser(username=usuario, role='mesa', circuito_id=circuito_id), credenciales
+
+def _sentencias() -> int:
+    if DB_BACKEND == 'sqlite':
+        return sqlite_backend.statement_count()
+    with get_db_transaction() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        valor = int(cursor.fetchone()[1])
+        cursor.close()
+    return valor
+
+def _ejecutar(modo: str, usuario: str, votos: int, threads: int) -> dict:
+    """Votar N credenciales nuevas con un commit por voto (directo) o por lotes"""
+    mesa, credenciales = _habilitar(usuario, votos)
+    latencias = []
+
+    def votar(i: int):
+        voto = VotoRequest(credencial=credenciales[i], candidato_id=i % 4)
+        inicio = time.perf_counter()
+        if modo == 'lote':
+            get_vote_writer().wait(enqueue_vote(voto, mesa))
+        else:
+            cast_vote(voto, mesa)
+        latencias.append(time.perf_counter() - inicio)
+
+    antes = _sentencias()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(votar, range(votos)))
+    duracion = time.perf_counter() - inicio
+    # La lectura de 'Questions' también se cuenta a sí misma
+    sentencias = _sentencias() - antes - (0 if DB_BACKEND == 'sqlite' else 1)
+
+    latencias.sort()
+    return {
+        "modo": modo,
+        "backend": DB_BACKEND,
+        "votos": votos,
+        "threads": threads,
+        "votos_por_s": round(votos / duracion, 1),
+        "sentencias_por_voto": round(sentencias / votos, 2),
+        "p50_ms": round(latencias[len(latencias) // 2] * 1000, 2),
+        "p99_ms": round(latencias[int(len(latencias) * 0.99) - 1] * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuario", default="mesa1")
+    parser.add_argument("--votos", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--modo", choices=("directo", "lote", "ambos"), default="ambos")
+    args = parser.parse_args()
+
+    init_connection_pool()
+    modos = ("directo", "lote") if args.modo == "ambos" else (args.modo,)
+    for modo in modos:
+        print(_ejecutar(modo, args.usuario, args.votos, args.threads))
+    if "lote" in modos:
+        print(get_batch_stats())
+        shutdown_writers()
+
+if __name__ == "__main__":
+    main()
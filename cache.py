@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class VersionedCache:
+    """LRU acotado con invalidación por versión y un solo cálculo por clave a la vez
+
+    Una entrada sirve mientras su versión sea la actual y no supere ttl_s; si la
+    versión cambió, sigue sirviendo hasta stale_s (presupuesto de atraso), así en
+    plena votación cada clave se recalcula como mucho una vez por stale_s. Los
+    pedidos simultáneos de una clave vencida esperan el cálculo del primero.
+    """
+
+    def __init__(self, nombre: str, max_entries: int, stale_s: float, ttl_s: float):
+        self.nombre = nombre
+        self.max_entries = max(1, max_entries)
+        self.stale_s = stale_s
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._inflight_async: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _lookup(self, key: Hashable, version: Hashable):
+        """Valor vigente de la clave o None; se llama con el lock tomado"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        valor, entry_version, creado = entry
+        edad = time.monotonic() - creado
+        if entry_version == version and edad <= self.ttl_s:
+            self.hits += 1
+        elif edad <= self.stale_s:
+            self.stale_hits += 1
+        else:
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: Hashable, version: Hashable, valor: Any):
+        with self._lock:
+            self._entries[key] = (valor, version, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, version: Hashable, compute: Callable[[], Any]) -> Any:
+        """Devolver el valor cacheado o calcularlo (un solo cálculo por clave entre threads)"""
+        return self.get_or_compute_versioned(key, version, compute)[0]
+
+    def get_or_compute_versioned(self, key: Hashable, version: Hashable, compute: Callable[[], Any]) -> Tuple[Any, Hashable]:
+        """Como get_or_compute, pero devuelve también la versión del valor (anterior a la pedida si es stale)"""
+        with self._lock:
+            entry = self._lookup(key, version)
+            if entry is not None:
+                return entry[0], entry[1]
+            future = self._inflight.get(key)
+            lider = future is None
+            if lider:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not lider:
+            return future.result()
+        try:
+            valor = compute()
+            self._store(key, version, valor)
+            future.set_result((valor, version))
+            return valor, version
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    async def get_or_compute_async(self, key: Hashable, version: Hashable, compute: Callable[[], Awaitable]) -> Any:
+        """Variante para corrutinas (DB_MODE=async): un solo cálculo por clave en el event loop"""
+        return (await self.get_or_compute_versioned_async(key, version, compute))[0]
+
+    async def get_or_compute_versioned_async(self, key: Hashable, version: Hashable,
+                                             compute: Callable[[], Awaitable]) -> Tuple[Any, Hashable]:
+        """Variante para corrutinas de get_or_compute_versioned"""
+        with self._lock:
+            entry = self._lookup(key, version)
+            if entry is not None:
+                return entry[0], entry[1]
+            future = self._inflight_async.get(key)
+            lider = future is None
+            if lider:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight_async[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not lider:
+            return await asyncio.shield(future)
+        try:
+            valor = await compute()
+            self._store(key, version, valor)
+            future.set_result((valor, version))
+            return valor, version
+        except BaseException as e:
+            future.set_exception(e)
+            # Que nadie esperando deje la excepción sin recuperar
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._inflight_async[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Contadores del caché"""
+        with self._lock:
+            consultas = self.hits + self.stale_hits + self.misses + self.coalesced
+            return {
+                "entradas": len(self._entries),
+                "max_entradas": self.max_entries,
+                "stale_s": self.stale_s,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.stale_hits + self.coalesced) / consultas, 3) if consultas else 0,
+            }
+
+_caches: Dict[str, VersionedCache] = {}
+_caches_lock = threading.Lock()
+
+def get_cache(nombre: str, max_entries: int, stale_s: float, ttl_s: float) -> VersionedCache:
+    """Obtener (o crear) un caché por nombre"""
+    cache = _caches.get(nombre)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(nombre)
+            if cache is None:
+                cache = VersionedCache(nombre, max_entries, stale_s, ttl_s)
+                _caches[nombre] = cache
+    return cache
+
+def get_stats() -> Dict:
+    """Contadores de todos los cachés creados"""
+    return {nombre: cache.stats() for nombre, cache in _caches.items()}
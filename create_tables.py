@@ -4,6 +4,7 @@ Script para crear las tablas de la base de datos usando SQL directo
 """
 
 from database import get_db_connection
+from dao.voto_dao import VotoDAO
 
 def create_tables():
     """Crear todas las tablas necesarias"""
@@ -81,6 +82,7 @@ def create_tables():
             fecha_autorizacion DATETIME,
             fecha_voto DATETIME,
             es_autorizacion_especial BOOLEAN DEFAULT FALSE,
+            KEY idx_autorizaciones_circuito (circuito_id),
             FOREIGN KEY (circuito_id) REFERENCES circuitos(id),
             UNIQUE KEY unique_credencial_auth (credencial)
         )
@@ -95,6 +97,7 @@ def create_tables():
             estado_validacion ENUM('pendiente', 'aprobado', 'rechazado') DEFAULT 'aprobado',
             circuito_id INT NOT NULL,
             es_anulado BOOLEAN DEFAULT FALSE,
+            KEY idx_votos_circuito (circuito_id),
             FOREIGN KEY (candidato_id) REFERENCES candidatos(id) ON DELETE SET NULL,
             FOREIGN KEY (circuito_id) REFERENCES circuitos(id)
         )
@@ -108,6 +111,57 @@ def create_tables():
             UNIQUE KEY unique_credencial_circuito (credencial, circuito_id),
             FOREIGN KEY (circuito_id) REFERENCES circuitos(id) ON DELETE CASCADE
         )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS secuencias_comprobante (
+            circuito_id INT PRIMARY KEY,
+            ultimo_numero INT NOT NULL DEFAULT 0,
+            FOREIGN KEY (circuito_id) REFERENCES circuitos(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS claves_idempotencia (
+            clave CHAR(64) PRIMARY KEY,
+            huella CHAR(64) NOT NULL,
+            status_code INT NULL,
+            respuesta TEXT NULL,
+            expira DATETIME NOT NULL,
+            KEY idx_expira (expira)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS conteos (
+            circuito_id INT NOT NULL,
+            tipo ENUM('candidato', 'blanco', 'anulado', 'observado', 'votantes') NOT NULL,
+            candidato_id INT NOT NULL DEFAULT 0,
+            shard TINYINT UNSIGNED NOT NULL,
+            cantidad INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (circuito_id, tipo, candidato_id, shard),
+            FOREIGN KEY (circuito_id) REFERENCES circuitos(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS conteos_geo (
+            clave VARCHAR(255) NOT NULL,
+            tipo ENUM('candidato', 'blanco', 'anulado', 'observado', 'votantes') NOT NULL,
+            candidato_id INT NOT NULL DEFAULT 0,
+            shard TINYINT UNSIGNED NOT NULL,
+            nivel ENUM('departamento', 'ciudad', 'zona', 'barrio', 'establecimiento') NOT NULL,
+            cantidad INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (clave, tipo, candidato_id, shard),
+            KEY idx_nivel (nivel, clave)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS series_minuto (
+            nivel ENUM('circuito', 'departamento') NOT NULL,
+            clave VARCHAR(100) NOT NULL,
+            minuto DATETIME NOT NULL,
+            tipo ENUM('votos', 'autorizaciones', 'observados') NOT NULL,
+            shard TINYINT UNSIGNED NOT NULL,
+            cantidad INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (nivel, clave, minuto, tipo, shard)
+        )
         """
     ]
     
@@ -119,6 +173,11 @@ def create_tables():
                 print(f"Ejecutando: {sql[:50]}...")
                 cursor.execute(sql)
             
+            # Bases creadas antes de las secuencias: los votos ya no las crean
+            creadas = VotoDAO.seed_missing_sequences(connection)
+            if creadas:
+                print(f"Secuencias de comprobantes creadas para {creadas} circuitos")
+            
             connection.commit()
             print("Todas las tablas creadas exitosamente")
             
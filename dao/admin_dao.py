@@ -69,7 +69,12 @@ class AdminDAO:
             cursor.execute("DELETE FROM votos")
             cursor.execute("DELETE FROM autorizaciones") 
             cursor.execute("DELETE FROM credenciales_autorizadas")
-            print("✓ Votos, autorizaciones y credenciales limpiadas")
+            cursor.execute("DELETE FROM secuencias_comprobante")
+            cursor.execute("DELETE FROM claves_idempotencia")
+            cursor.execute("DELETE FROM conteos")
+            cursor.execute("DELETE FROM conteos_geo")
+            cursor.execute("DELETE FROM series_minuto")
+            print("✓ Votos, autorizaciones, credenciales, secuencias de comprobantes y conteos limpiados")
             
             # 2. Limpiar usuarios (excepto admin) - preservar admin por username y role
             cursor.execute("DELETE FROM usuarios WHERE role != 'superadmin' AND username != 'admin'")
@@ -0,0 +1,87 @@
+import mysql.connector
+from typing import List, Dict
+
+# Columnas de cada voto para el motor de análisis, todas enteras: candidato NULL es 0
+# y el estado va codificado (0 aprobado, 1 pendiente, 2 rechazado)
+_VOTOS_QUERY = """
+SELECT id, circuito_id, COALESCE(candidato_id, 0),
+       CASE WHEN es_anulado THEN 1 ELSE 0 END,
+       CASE WHEN es_observado THEN 1 ELSE 0 END,
+       CASE estado_validacion WHEN 'aprobado' THEN 0 WHEN 'pendiente' THEN 1 ELSE 2 END
+FROM votos
+WHERE id > %s
+ORDER BY id
+"""
+
+class AnaliticaDAO:
+    """Data Access Object para las lecturas del motor de análisis"""
+
+    @staticmethod
+    def open_votes(connection: mysql.connector.MySQLConnection, desde_id: int):
+        """Lanzar la lectura de los votos con id mayor a desde_id con un cursor sin buffer
+
+        Las filas llegan por lotes con fetchmany; quien llama cierra el cursor.
+        """
+        cursor = connection.cursor(buffered=False)
+        try:
+            cursor.execute(_VOTOS_QUERY, (desde_id,))
+        except Exception:
+            cursor.close()
+            raise
+        return cursor
+
+    @staticmethod
+    def count_votes_up_to(connection: mysql.connector.MySQLConnection, hasta_id: int) -> int:
+        """Votos con id hasta hasta_id (para detectar votos borrados desde la última carga)"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM votos WHERE id <= %s", (hasta_id,))
+            return int(cursor.fetchone()[0])
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def get_observed_states(connection: mysql.connector.MySQLConnection, hasta_id: int) -> List[tuple]:
+        """(id, estado codificado) de los votos observados ya cargados: son los únicos que cambian de estado"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT id, CASE estado_validacion WHEN 'aprobado' THEN 0 WHEN 'pendiente' THEN 1 ELSE 2 END
+                FROM votos
+                WHERE es_observado = TRUE AND id <= %s
+            """, (hasta_id,))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def get_circuits(connection: mysql.connector.MySQLConnection) -> List[Dict]:
+        """Circuitos con los atributos de su establecimiento, ordenados por id"""
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT ci.id, ci.numero_circuito, e.departamento, e.ciudad,
+                       e.tipo_establecimiento, e.accesible
+                FROM circuitos ci
+                JOIN establecimientos e ON ci.establecimiento_id = e.id
+                ORDER BY ci.id
+            """)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def get_candidates(connection: mysql.connector.MySQLConnection, eleccion_id: int) -> List[Dict]:
+        """Candidatos presidenciales de la elección, ordenados por id"""
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT c.id, c.nombre as candidato, p.nombre as partido
+                FROM candidatos c
+                JOIN partidos p ON c.partido_id = p.id
+                WHERE c.es_presidente = TRUE AND c.eleccion_id = %s
+                ORDER BY c.id
+            """, (eleccion_id,))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
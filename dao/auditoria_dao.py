@@ -0,0 +1,107 @@
+import mysql.connector
+from typing import List, Dict, Optional, Tuple
+
+def _en(valores: List) -> str:
+    return ", ".join(["%s"] * len(valores))
+
+class AuditoriaDAO:
+    """Data Access Object para las lecturas de la auditoría de circuitos
+
+    Todas las consultas son lecturas por circuito_id (o número de circuito en las
+    series) de un grupo de circuitos; se ejecutan dentro del snapshot de solo
+    lectura que abre la auditoría, sin locks sobre las tablas de la votación.
+    """
+
+    @staticmethod
+    def get_circuits(connection: mysql.connector.MySQLConnection, numeros: Optional[List[str]] = None) -> List[Tuple[int, str]]:
+        """(id, numero_circuito) de todos los circuitos o de los indicados, ordenados por id"""
+        cursor = connection.cursor()
+        try:
+            if numeros:
+                cursor.execute(f"""
+                    SELECT id, numero_circuito FROM circuitos
+                    WHERE numero_circuito IN ({_en(numeros)})
+                    ORDER BY id
+                """, tuple(numeros))
+            else:
+                cursor.execute("SELECT id, numero_circuito FROM circuitos ORDER BY id")
+            return [(int(circuito_id), str(numero)) for circuito_id, numero in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def get_authorizations(connection: mysql.connector.MySQLConnection, circuito_ids: List[int]) -> List[tuple]:
+        """(circuito_id, estado, fecha_autorizacion) de las autorizaciones de los circuitos"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT circuito_id, estado, fecha_autorizacion
+                FROM autorizaciones
+                WHERE circuito_id IN ({_en(circuito_ids)})
+            """, tuple(circuito_ids))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def open_votes(connection: mysql.connector.MySQLConnection, circuito_ids: List[int]):
+        """Lanzar la lectura de los votos de los circuitos con un cursor sin buffer
+
+        Las filas son diccionarios con las columnas que usan clave_conteo y las
+        series; quien llama recorre el cursor y lo cierra.
+        """
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute(f"""
+                SELECT circuito_id, numero_comprobante, candidato_id, timestamp,
+                       es_observado, estado_validacion, es_anulado
+                FROM votos
+                WHERE circuito_id IN ({_en(circuito_ids)})
+            """, tuple(circuito_ids))
+        except Exception:
+            cursor.close()
+            raise
+        return cursor
+
+    @staticmethod
+    def get_sequences(connection: mysql.connector.MySQLConnection, circuito_ids: List[int]) -> Dict[int, int]:
+        """circuito_id -> ultimo_numero de secuencias_comprobante (los circuitos sin secuencia no aparecen)"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT circuito_id, ultimo_numero FROM secuencias_comprobante
+                WHERE circuito_id IN ({_en(circuito_ids)})
+            """, tuple(circuito_ids))
+            return {int(circuito_id): int(ultimo) for circuito_id, ultimo in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def get_tallies(connection: mysql.connector.MySQLConnection, circuito_ids: List[int]) -> List[tuple]:
+        """(circuito_id, tipo, candidato_id, cantidad) de conteos, sumando los shards"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT circuito_id, tipo, candidato_id, SUM(cantidad)
+                FROM conteos
+                WHERE circuito_id IN ({_en(circuito_ids)})
+                GROUP BY circuito_id, tipo, candidato_id
+            """, tuple(circuito_ids))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def get_series(connection: mysql.connector.MySQLConnection, numeros: List[str]) -> List[tuple]:
+        """(numero_circuito, minuto, tipo, cantidad) de series_minuto a nivel circuito, sumando los shards"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT clave, minuto, tipo, SUM(cantidad)
+                FROM series_minuto
+                WHERE nivel = 'circuito' AND clave IN ({_en(numeros)})
+                GROUP BY clave, minuto, tipo
+            """, tuple(numeros))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
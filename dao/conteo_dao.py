@@ -0,0 +1,513 @@
+import os
+import random
+import mysql.connector
+from typing import List, Dict, Optional, Tuple
+from collections import Counter
+from database import AsyncDictCursor, AsyncStreamCursor, execute_prepared
+from versions import ESTRUCTURA, get_version
+
+# Filas por contador: cada incremento cae en una al azar para que los votos
+# simultáneos del mismo circuito y candidato no esperen el lock de una sola fila
+CONTEO_SHARDS = int(os.getenv('CONTEO_SHARDS', '8'))
+
+# Clave de un contador: (circuito_id, tipo, candidato_id); candidato_id es 0 salvo en 'candidato'
+TIPOS = ('candidato', 'blanco', 'anulado', 'observado', 'votantes')
+
+# Niveles de conteos_geo, de mayor a menor. La clave de cada nivel es la ruta desde el
+# departamento ('Montevideo/Montevideo/Centro/Cordón/12'; zona y barrio vacíos si
+# faltan), así un nombre repetido en otro departamento o ciudad no se mezcla y todas
+# las unidades dentro de otra comparten su prefijo
+NIVELES_GEO = ('departamento', 'ciudad', 'zona', 'barrio', 'establecimiento')
+SEPARADOR_GEO = '/'
+
+def claves_geo(establecimiento: Dict) -> List[Tuple[str, str]]:
+    """(nivel, clave) de cada nivel al que pertenece un establecimiento"""
+    partes = [establecimiento['departamento'], establecimiento['ciudad'], establecimiento['zona'] or '',
+              establecimiento['barrio'] or '', str(establecimiento['id'])]
+    return [(nivel, SEPARADOR_GEO.join(partes[:i + 1])) for i, nivel in enumerate(NIVELES_GEO)]
+
+def clave_conteo(voto: Dict) -> Optional[Tuple[int, str, int]]:
+    """Contador al que suma un voto según su estado (None si no cuenta, p. ej. rechazado)"""
+    if voto['estado_validacion'] == 'pendiente':
+        return (voto['circuito_id'], 'observado', 0) if voto['es_observado'] else None
+    if voto['estado_validacion'] != 'aprobado':
+        return None
+    if voto['es_anulado']:
+        return (voto['circuito_id'], 'anulado', 0)
+    if voto['candidato_id'] is None:
+        return (voto['circuito_id'], 'blanco', 0)
+    return (voto['circuito_id'], 'candidato', voto['candidato_id'])
+
+def deltas_votos(votos: List[Dict]) -> Counter:
+    """Incrementos de contadores para una lista de votos nuevos"""
+    deltas = Counter()
+    for voto in votos:
+        clave = clave_conteo(voto)
+        if clave is not None:
+            deltas[clave] += 1
+    return deltas
+
+_UPDATE = """
+UPDATE conteos SET cantidad = cantidad + %s
+WHERE circuito_id = %s AND tipo = %s AND candidato_id = %s AND shard = %s
+"""
+
+_INSERT = """
+INSERT INTO conteos (circuito_id, tipo, candidato_id, shard, cantidad)
+VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE cantidad = cantidad + VALUES(cantidad)
+"""
+
+# conteos_geo suma en todos los niveles a la vez: una sola sentencia con una fila por
+# nivel (el upsert crea la fila del shard la primera vez)
+def _insert_geo(filas: int) -> str:
+    return f"""
+    INSERT INTO conteos_geo (clave, tipo, candidato_id, shard, nivel, cantidad)
+    VALUES {", ".join(["(%s, %s, %s, %s, %s, %s)"] * filas)}
+    ON DUPLICATE KEY UPDATE cantidad = cantidad + VALUES(cantidad)
+    """
+
+_GEO_QUERY = """
+SELECT e.id, e.departamento, e.ciudad, e.zona, e.barrio
+FROM circuitos ci
+JOIN establecimientos e ON ci.establecimiento_id = e.id
+WHERE ci.id = %s
+"""
+
+# circuito_id -> [(nivel, clave)]; los establecimientos no cambian de lugar, así que
+# solo se descarta cuando cambia la estructura (elección nueva)
+_geo_circuitos: Dict[int, List[Tuple[str, str]]] = {}
+_geo_version = None
+
+def _geo_cacheada(circuito_id: int) -> Optional[List[Tuple[str, str]]]:
+    global _geo_version
+    version = get_version(ESTRUCTURA)
+    if _geo_version != version:
+        _geo_circuitos.clear()
+        _geo_version = version
+    return _geo_circuitos.get(circuito_id)
+
+def _filas_geo(deltas: Dict[Tuple[int, str, int], int], geo: Dict[int, List[Tuple[str, str]]]) -> List[tuple]:
+    """Filas (clave, tipo, candidato_id, nivel, delta) de conteos_geo, ordenadas para tomar los locks en orden"""
+    acumulado = Counter()
+    for (circuito_id, tipo, candidato_id), delta in deltas.items():
+        for nivel, clave in geo[circuito_id]:
+            acumulado[(clave, tipo, candidato_id, nivel)] += delta
+    return [clave + (delta,) for clave, delta in sorted(acumulado.items()) if delta != 0]
+
+def _params_geo(filas: List[tuple]) -> tuple:
+    params = []
+    for clave, tipo, candidato_id, nivel, delta in filas:
+        params.extend((clave, tipo, candidato_id, random.randrange(CONTEO_SHARDS), nivel, delta))
+    return tuple(params)
+
+def _filtro(departamento: Optional[str], numero_circuito: Optional[str],
+            nivel: Optional[str] = None, clave: Optional[str] = None) -> Tuple[str, str, tuple]:
+    """Tabla, condición y parámetros de los contadores de un alcance
+
+    Un circuito se lee de conteos; cualquier nivel geográfico (y el total nacional,
+    como suma de los departamentos) se lee de conteos_geo por su clave.
+    """
+    if numero_circuito is not None:
+        return "conteos k JOIN circuitos ci ON k.circuito_id = ci.id", "AND ci.numero_circuito = %s", (numero_circuito,)
+    if departamento:
+        nivel, clave = 'departamento', departamento
+    if nivel:
+        return "conteos_geo k", "AND k.clave = %s", (clave,)
+    return "conteos_geo k", "AND k.nivel = 'departamento'", ()
+
+def _votes_by_candidate_query(departamento: Optional[str], numero_circuito: Optional[str],
+                              nivel: Optional[str] = None, clave: Optional[str] = None) -> Tuple[str, tuple]:
+    tabla, where, params = _filtro(departamento, numero_circuito, nivel, clave)
+    query = f"""
+    SELECT c.nombre as candidato, p.nombre as partido, COALESCE(k.votos, 0) as votos
+    FROM candidatos c
+    JOIN partidos p ON c.partido_id = p.id
+    LEFT JOIN (
+        SELECT k.candidato_id, SUM(k.cantidad) as votos
+        FROM {tabla}
+        WHERE k.tipo = 'candidato' {where}
+        GROUP BY k.candidato_id
+    ) k ON k.candidato_id = c.id
+    WHERE c.es_presidente = TRUE AND c.eleccion_id = %s
+    ORDER BY votos DESC
+    """
+    return query, params
+
+def _totals_query(departamento: Optional[str], numero_circuito: Optional[str],
+                  nivel: Optional[str] = None, clave: Optional[str] = None) -> Tuple[str, tuple]:
+    tabla, where, params = _filtro(departamento, numero_circuito, nivel, clave)
+    query = f"""
+    SELECT k.tipo, SUM(k.cantidad) as cantidad
+    FROM {tabla}
+    LEFT JOIN candidatos ca ON k.tipo = 'candidato' AND ca.id = k.candidato_id
+    WHERE (k.tipo != 'candidato' OR ca.eleccion_id = %s) {where}
+    GROUP BY k.tipo
+    """
+    return query, params
+
+def _escape_like(valor: str) -> str:
+    return valor.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+def _level_query(dentro: Optional[str]) -> Tuple[str, tuple]:
+    """Contadores de todas las unidades de un nivel (opcionalmente dentro de otra) en una lectura"""
+    where, params = "", ()
+    if dentro:
+        where, params = "AND k.clave LIKE %s ESCAPE '!'", (_escape_like(dentro) + SEPARADOR_GEO + '%',)
+    query = f"""
+    SELECT k.clave, k.tipo, k.candidato_id, SUM(k.cantidad) as cantidad
+    FROM conteos_geo k
+    LEFT JOIN candidatos ca ON k.tipo = 'candidato' AND ca.id = k.candidato_id
+    WHERE k.nivel = %s AND (k.tipo != 'candidato' OR ca.eleccion_id = %s) {where}
+    GROUP BY k.clave, k.tipo, k.candidato_id
+    """
+    return query, params
+
+_CANDIDATOS_QUERY = """
+SELECT c.id, c.nombre as candidato, p.nombre as partido
+FROM candidatos c
+JOIN partidos p ON c.partido_id = p.id
+WHERE c.es_presidente = TRUE AND c.eleccion_id = %s
+"""
+
+def _circuits_query(circuitos: Optional[List[str]], departamento: Optional[str]) -> Tuple[str, tuple]:
+    """Contadores de varios circuitos (lista o departamento) con su información, en una consulta agrupada
+
+    Los circuitos sin contadores salen igual (LEFT JOIN) con tipo NULL; el filtro por
+    elección de los votos a candidatos se aplica al agrupar las filas.
+    """
+    if circuitos is not None:
+        where, params = f"ci.numero_circuito IN ({', '.join(['%s'] * len(circuitos))})", tuple(circuitos)
+    elif departamento:
+        where, params = "e.departamento = %s", (departamento,)
+    else:
+        where, params = "TRUE", ()
+    query = f"""
+    SELECT ci.numero_circuito, e.nombre as establecimiento, e.departamento, e.direccion,
+           k.tipo, k.candidato_id, ca.eleccion_id, SUM(k.cantidad) as cantidad
+    FROM circuitos ci
+    JOIN establecimientos e ON ci.establecimiento_id = e.id
+    LEFT JOIN conteos k ON k.circuito_id = ci.id
+    LEFT JOIN candidatos ca ON k.tipo = 'candidato' AND ca.id = k.candidato_id
+    WHERE {where}
+    GROUP BY ci.numero_circuito, e.nombre, e.departamento, e.direccion, k.tipo, k.candidato_id, ca.eleccion_id
+    """
+    return query, params
+
+def _circuitos(filas, eleccion_id: Optional[int]) -> Dict[str, Dict]:
+    """Agrupar las filas de _circuits_query: {numero: {"circuito": info, "totales": ..., "candidatos": {id: votos}}}"""
+    circuitos = {}
+    for numero, establecimiento, departamento, direccion, tipo, candidato_id, eleccion_candidato, cantidad in filas:
+        circuito = circuitos.get(numero)
+        if circuito is None:
+            info = {"numero_circuito": numero, "establecimiento": establecimiento,
+                    "departamento": departamento, "direccion": direccion}
+            circuito = circuitos[numero] = {"circuito": info, "totales": {t: 0 for t in TIPOS}, "candidatos": {}}
+        if tipo is None or (tipo == 'candidato' and eleccion_candidato != eleccion_id):
+            continue
+        circuito["totales"][tipo] += int(cantidad or 0)
+        if tipo == 'candidato':
+            circuito["candidatos"][candidato_id] = int(cantidad or 0)
+    return circuitos
+
+# Exportación completa: una fila por circuito y contador (cada candidato, blanco,
+# anulado, observado, votantes). Los shards se suman antes de los joins, en el
+# orden de la clave primaria, así los joins ven una fila por contador
+EXPORT_COLUMNAS = ('departamento', 'numero_circuito', 'establecimiento', 'tipo',
+                   'candidato_id', 'candidato', 'partido', 'cantidad')
+
+_EXPORT_QUERY = """
+SELECT e.departamento, ci.numero_circuito, e.nombre as establecimiento, k.tipo,
+       CASE WHEN k.tipo = 'candidato' THEN k.candidato_id END as candidato_id,
+       ca.nombre as candidato, p.nombre as partido, k.cantidad
+FROM (
+    SELECT circuito_id, tipo, candidato_id, SUM(cantidad) as cantidad
+    FROM conteos
+    GROUP BY circuito_id, tipo, candidato_id
+) k
+JOIN circuitos ci ON k.circuito_id = ci.id
+JOIN establecimientos e ON ci.establecimiento_id = e.id
+LEFT JOIN candidatos ca ON k.tipo = 'candidato' AND ca.id = k.candidato_id
+LEFT JOIN partidos p ON ca.partido_id = p.id
+WHERE k.tipo != 'candidato' OR ca.eleccion_id = %s
+ORDER BY e.departamento, ci.numero_circuito, k.tipo, k.candidato_id
+"""
+
+def _unidades(filas) -> Dict[str, Dict]:
+    """Agrupar las filas de _level_query por clave: {clave: {"totales": ..., "candidatos": {id: votos}}}"""
+    unidades = {}
+    for clave, tipo, candidato_id, cantidad in filas:
+        unidad = unidades.setdefault(clave, {"totales": {t: 0 for t in TIPOS}, "candidatos": {}})
+        unidad["totales"][tipo] += int(cantidad or 0)
+        if tipo == 'candidato':
+            unidad["candidatos"][candidato_id] = int(cantidad or 0)
+    return unidades
+
+def _totales(filas) -> Dict[str, int]:
+    totales = {tipo: 0 for tipo in TIPOS}
+    for tipo, cantidad in filas:
+        totales[tipo] = int(cantidad or 0)
+    return totales
+
+class ConteoDAO:
+    """Data Access Object para los contadores de resultados (tabla conteos)"""
+
+    @staticmethod
+    def increment(connection: mysql.connector.MySQLConnection, deltas: Dict[Tuple[int, str, int], int]) -> None:
+        """Sumar los deltas dentro de la transacción abierta
+
+        Las claves se recorren ordenadas para que dos transacciones tomen los locks
+        en el mismo orden. El UPDATE cubre el caso común; la fila del shard se crea
+        la primera vez.
+        """
+        for (circuito_id, tipo, candidato_id), delta in sorted(deltas.items()):
+            if delta == 0:
+                continue
+            shard = random.randrange(CONTEO_SHARDS)
+            rowcount, _ = execute_prepared(connection, _UPDATE, (delta, circuito_id, tipo, candidato_id, shard))
+            if rowcount == 0:
+                execute_prepared(connection, _INSERT, (circuito_id, tipo, candidato_id, shard, delta))
+        geo = {circuito_id: ConteoDAO._geo(connection, circuito_id) for circuito_id, _, _ in deltas}
+        filas = _filas_geo(deltas, geo)
+        if filas:
+            execute_prepared(connection, _insert_geo(len(filas)), _params_geo(filas))
+
+    @staticmethod
+    def _geo(connection: mysql.connector.MySQLConnection, circuito_id: int) -> List[Tuple[str, str]]:
+        """Niveles geográficos del circuito (cacheados por proceso)"""
+        claves = _geo_cacheada(circuito_id)
+        if claves is None:
+            establecimiento = execute_prepared(connection, _GEO_QUERY, (circuito_id,), fetch='one', dictionary=True)
+            claves = claves_geo(establecimiento) if establecimiento else []
+            _geo_circuitos[circuito_id] = claves
+        return claves
+
+    @staticmethod
+    def add(connection: mysql.connector.MySQLConnection, circuito_id: int, tipo: str, candidato_id: int = 0, delta: int = 1) -> None:
+        """Sumar delta a un solo contador"""
+        ConteoDAO.increment(connection, {(circuito_id, tipo, candidato_id): delta})
+
+    @staticmethod
+    def get_votes_by_candidate(connection: mysql.connector.MySQLConnection, eleccion_id: int,
+                               departamento: Optional[str] = None, numero_circuito: Optional[str] = None,
+                               nivel: Optional[str] = None, clave: Optional[str] = None) -> List[Dict]:
+        """Votos aprobados por candidato presidencial de la elección"""
+        query, params = _votes_by_candidate_query(departamento, numero_circuito, nivel, clave)
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params + (eleccion_id,))
+            return [dict(fila, votos=int(fila['votos'])) for fila in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def get_totals(connection: mysql.connector.MySQLConnection, eleccion_id: Optional[int],
+                   departamento: Optional[str] = None, numero_circuito: Optional[str] = None,
+                   nivel: Optional[str] = None, clave: Optional[str] = None) -> Dict[str, int]:
+        """Totales por tipo de contador (candidato solo cuenta la elección indicada)"""
+        query, params = _totals_query(departamento, numero_circuito, nivel, clave)
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, (eleccion_id,) + params)
+            return _totales(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def get_level(connection: mysql.connector.MySQLConnection, eleccion_id: Optional[int], nivel: str,
+                  dentro: Optional[str] = None) -> Dict[str, Dict]:
+        """Contadores de cada unidad de un nivel, opcionalmente dentro de la unidad 'dentro'
+
+        Devuelve {"candidatos": [candidatos presidenciales], "unidades": {clave: contadores}}.
+        """
+        query, params = _level_query(dentro)
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, (nivel, eleccion_id) + params)
+            unidades = _unidades(cursor.fetchall())
+        finally:
+            cursor.close()
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(_CANDIDATOS_QUERY, (eleccion_id,))
+            return {"candidatos": cursor.fetchall(), "unidades": unidades}
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def get_circuits(connection: mysql.connector.MySQLConnection, eleccion_id: int,
+                     circuitos: Optional[List[str]] = None, departamento: Optional[str] = None) -> Dict:
+        """Contadores de varios circuitos: {"candidatos": [...], "circuitos": {numero: contadores}}"""
+        query, params = _circuits_query(circuitos, departamento)
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            por_circuito = _circuitos(cursor.fetchall(), eleccion_id)
+        finally:
+            cursor.close()
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(_CANDIDATOS_QUERY, (eleccion_id,))
+            return {"candidatos": cursor.fetchall(), "circuitos": por_circuito}
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def open_export(connection: mysql.connector.MySQLConnection, eleccion_id: int):
+        """Lanzar la consulta de exportación (columnas EXPORT_COLUMNAS) con un cursor sin buffer
+
+        Las filas llegan del servidor a medida que se piden con fetchmany, así la
+        memoria no crece con el tamaño del padrón. Quien llama cierra el cursor.
+        """
+        cursor = connection.cursor(buffered=False)
+        try:
+            cursor.execute(_EXPORT_QUERY, (eleccion_id,))
+        except Exception:
+            cursor.close()
+            raise
+        return cursor
+
+    @staticmethod
+    def rebuild(connection: mysql.connector.MySQLConnection) -> int:
+        """Recalcular todos los contadores desde votos y autorizaciones; devuelve filas creadas"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("DELETE FROM conteos")
+            cursor.execute("""
+                INSERT INTO conteos (circuito_id, tipo, candidato_id, shard, cantidad)
+                SELECT circuito_id,
+                       CASE WHEN estado_validacion = 'pendiente' THEN 'observado'
+                            WHEN es_anulado = TRUE THEN 'anulado'
+                            WHEN candidato_id IS NULL THEN 'blanco'
+                            ELSE 'candidato' END as tipo,
+                       CASE WHEN estado_validacion = 'aprobado' AND es_anulado = FALSE AND candidato_id IS NOT NULL
+                            THEN candidato_id ELSE 0 END as candidato_id,
+                       0, COUNT(*)
+                FROM votos
+                WHERE estado_validacion = 'aprobado' OR (estado_validacion = 'pendiente' AND es_observado = TRUE)
+                GROUP BY 1, 2, 3
+            """)
+            filas = cursor.rowcount
+            cursor.execute("""
+                INSERT INTO conteos (circuito_id, tipo, candidato_id, shard, cantidad)
+                SELECT circuito_id, 'votantes', 0, 0, COUNT(*)
+                FROM autorizaciones
+                GROUP BY circuito_id
+            """)
+            filas += cursor.rowcount
+        finally:
+            cursor.close()
+        return filas + ConteoDAO.rebuild_geo(connection)
+
+    @staticmethod
+    def rebuild_geo(connection: mysql.connector.MySQLConnection) -> int:
+        """Recalcular conteos_geo desde conteos; devuelve filas creadas"""
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute("DELETE FROM conteos_geo")
+            cursor.execute("""
+                SELECT k.circuito_id, k.tipo, k.candidato_id, SUM(k.cantidad) as cantidad,
+                       e.id, e.departamento, e.ciudad, e.zona, e.barrio
+                FROM conteos k
+                JOIN circuitos ci ON k.circuito_id = ci.id
+                JOIN establecimientos e ON ci.establecimiento_id = e.id
+                GROUP BY k.circuito_id, k.tipo, k.candidato_id, e.id, e.departamento, e.ciudad, e.zona, e.barrio
+            """)
+            deltas, geo = {}, {}
+            for fila in cursor.fetchall():
+                deltas[(fila['circuito_id'], fila['tipo'], fila['candidato_id'])] = int(fila['cantidad'])
+                geo[fila['circuito_id']] = claves_geo(fila)
+            filas = _filas_geo(deltas, geo)
+            cursor.executemany("""
+                INSERT INTO conteos_geo (clave, tipo, candidato_id, shard, nivel, cantidad)
+                VALUES (%s, %s, %s, 0, %s, %s)
+            """, filas)
+            return len(filas)
+        finally:
+            cursor.close()
+
+class AsyncConteoDAO:
+    """Variante asíncrona de ConteoDAO para conexiones aiomysql"""
+
+    @staticmethod
+    async def increment(connection, deltas: Dict[Tuple[int, str, int], int]) -> None:
+        """Sumar los deltas dentro de la transacción abierta"""
+        async with connection.cursor() as cursor:
+            for (circuito_id, tipo, candidato_id), delta in sorted(deltas.items()):
+                if delta == 0:
+                    continue
+                shard = random.randrange(CONTEO_SHARDS)
+                await cursor.execute(_UPDATE, (delta, circuito_id, tipo, candidato_id, shard))
+                if cursor.rowcount == 0:
+                    await cursor.execute(_INSERT, (circuito_id, tipo, candidato_id, shard, delta))
+            geo = {}
+            for circuito_id, _, _ in deltas:
+                claves = _geo_cacheada(circuito_id)
+                if claves is None:
+                    await cursor.execute(_GEO_QUERY, (circuito_id,))
+                    fila = await cursor.fetchone()
+                    claves = claves_geo(dict(zip(('id', 'departamento', 'ciudad', 'zona', 'barrio'), fila))) if fila else []
+                    _geo_circuitos[circuito_id] = claves
+                geo[circuito_id] = claves
+            filas = _filas_geo(deltas, geo)
+            if filas:
+                await cursor.execute(_insert_geo(len(filas)), _params_geo(filas))
+
+    @staticmethod
+    async def add(connection, circuito_id: int, tipo: str, candidato_id: int = 0, delta: int = 1) -> None:
+        """Sumar delta a un solo contador"""
+        await AsyncConteoDAO.increment(connection, {(circuito_id, tipo, candidato_id): delta})
+
+    @staticmethod
+    async def get_votes_by_candidate(connection, eleccion_id: int,
+                                     departamento: Optional[str] = None, numero_circuito: Optional[str] = None,
+                                     nivel: Optional[str] = None, clave: Optional[str] = None) -> List[Dict]:
+        """Votos aprobados por candidato presidencial de la elección"""
+        query, params = _votes_by_candidate_query(departamento, numero_circuito, nivel, clave)
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            await cursor.execute(query, params + (eleccion_id,))
+            return [dict(fila, votos=int(fila['votos'])) for fila in await cursor.fetchall()]
+
+    @staticmethod
+    async def get_totals(connection, eleccion_id: Optional[int],
+                         departamento: Optional[str] = None, numero_circuito: Optional[str] = None,
+                         nivel: Optional[str] = None, clave: Optional[str] = None) -> Dict[str, int]:
+        """Totales por tipo de contador (candidato solo cuenta la elección indicada)"""
+        query, params = _totals_query(departamento, numero_circuito, nivel, clave)
+        async with connection.cursor() as cursor:
+            await cursor.execute(query, (eleccion_id,) + params)
+            return _totales(await cursor.fetchall())
+
+    @staticmethod
+    async def get_circuits(connection, eleccion_id: int,
+                           circuitos: Optional[List[str]] = None, departamento: Optional[str] = None) -> Dict:
+        """Contadores de varios circuitos: {"candidatos": [...], "circuitos": {numero: contadores}}"""
+        query, params = _circuits_query(circuitos, departamento)
+        async with connection.cursor() as cursor:
+            await cursor.execute(query, params)
+            por_circuito = _circuitos(await cursor.fetchall(), eleccion_id)
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            await cursor.execute(_CANDIDATOS_QUERY, (eleccion_id,))
+            return {"candidatos": await cursor.fetchall(), "circuitos": por_circuito}
+
+    @staticmethod
+    async def open_export(connection, eleccion_id: int):
+        """Variante asíncrona de open_export con un cursor del lado del servidor (SSCursor)"""
+        cursor = await connection.cursor(AsyncStreamCursor)
+        try:
+            await cursor.execute(_EXPORT_QUERY, (eleccion_id,))
+        except Exception:
+            await cursor.close()
+            raise
+        return cursor
+
+    @staticmethod
+    async def get_level(connection, eleccion_id: Optional[int], nivel: str, dentro: Optional[str] = None) -> Dict[str, Dict]:
+        """Contadores de cada unidad de un nivel, opcionalmente dentro de la unidad 'dentro'"""
+        query, params = _level_query(dentro)
+        async with connection.cursor() as cursor:
+            await cursor.execute(query, (nivel, eleccion_id) + params)
+            unidades = _unidades(await cursor.fetchall())
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            await cursor.execute(_CANDIDATOS_QUERY, (eleccion_id,))
+            return {"candidatos": await cursor.fetchall(), "unidades": unidades}
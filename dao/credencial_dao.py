@@ -1,5 +1,7 @@
 import mysql.connector
 from typing import Optional, Dict, List
+from database import AsyncDictCursor
+from dao.voto_dao import VotoDAO
 
 class CredencialDAO:
     """Data Access Object para operaciones relacionadas con credenciales autorizadas por circuito"""
@@ -39,8 +41,13 @@ class CredencialDAO:
             cursor.close()
     
     @staticmethod
-    def bulk_insert_credenciales(connection: mysql.connector.MySQLConnection, credenciales_data: List[Dict]) -> int:
-        """Insertar múltiples credenciales desde CSV"""
+    def bulk_insert_credenciales(connection: mysql.connector.MySQLConnection, credenciales_data: List[Dict],
+                                 circuitos_creados: Optional[List[Dict]] = None) -> int:
+        """Insertar múltiples credenciales desde CSV
+
+        Los circuitos que no existían se crean con su establecimiento y, si se pasa
+        circuitos_creados, se agregan ahí (numero_circuito, establecimiento, departamento).
+        """
         cursor = connection.cursor()
         inserted_count = 0
         try:
@@ -79,7 +86,14 @@ class CredencialDAO:
                     """
                     cursor.execute(circuito_query, (circuito_numero, establecimiento_id))
                     circuito_id = cursor.lastrowid
+                    VotoDAO.seed_comprobante_sequence(connection, circuito_id)
                     print(f"Circuito {circuito_numero} creado con ID {circuito_id}")
+                    if circuitos_creados is not None:
+                        circuitos_creados.append({
+                            "numero_circuito": circuito_numero,
+                            "establecimiento": establecimiento_data[0],
+                            "departamento": establecimiento_data[1],
+                        })
                 else:
                     circuito_id = circuito_result[0]
                 
@@ -114,4 +128,35 @@ class CredencialDAO:
             cursor.execute(query, (circuito_numero,))
             return cursor.fetchall()
         finally:
-            cursor.close()
\ No newline at end of file
+            cursor.close()
+
+class AsyncCredencialDAO:
+    """Variante asíncrona de CredencialDAO para conexiones aiomysql"""
+    
+    @staticmethod
+    async def get_circuito_by_credencial(connection, credencial: str) -> Optional[Dict]:
+        """Obtener el circuito asignado a una credencial"""
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            query = """
+            SELECT c.numero_circuito, c.id as circuito_id, e.nombre as establecimiento_nombre
+            FROM credenciales_autorizadas ca
+            JOIN circuitos c ON ca.circuito_id = c.id
+            JOIN establecimientos e ON c.establecimiento_id = e.id
+            WHERE ca.credencial = %s
+            """
+            await cursor.execute(query, (credencial,))
+            return await cursor.fetchone()
+    
+    @staticmethod
+    async def is_credencial_authorized_for_circuit(connection, credencial: str, circuito_numero: str) -> bool:
+        """Verificar si una credencial está autorizada para votar en un circuito específico"""
+        async with connection.cursor() as cursor:
+            query = """
+            SELECT COUNT(*) as count
+            FROM credenciales_autorizadas ca
+            JOIN circuitos c ON ca.circuito_id = c.id
+            WHERE ca.credencial = %s AND c.numero_circuito = %s
+            """
+            await cursor.execute(query, (credencial, circuito_numero))
+            result = await cursor.fetchone()
+            return result[0] > 0
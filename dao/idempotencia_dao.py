@@ -0,0 +1,47 @@
+import mysql.connector
+from typing import Optional, Dict
+from datetime import datetime
+from database import execute_prepared
+
+class IdempotenciaDAO:
+    """Data Access Object para las respuestas guardadas por Idempotency-Key"""
+    
+    @staticmethod
+    def reserve(connection: mysql.connector.MySQLConnection, clave: str, huella: str, expira: datetime) -> bool:
+        """Reservar la clave para una petición en curso; False si ya existe y no expiró"""
+        execute_prepared(
+            connection, "DELETE FROM claves_idempotencia WHERE clave = %s AND expira < %s", (clave, datetime.now())
+        )
+        query = """
+        INSERT IGNORE INTO claves_idempotencia (clave, huella, status_code, respuesta, expira)
+        VALUES (%s, %s, NULL, NULL, %s)
+        """
+        rowcount, _ = execute_prepared(connection, query, (clave, huella, expira))
+        return rowcount == 1
+    
+    @staticmethod
+    def get(connection: mysql.connector.MySQLConnection, clave: str) -> Optional[Dict]:
+        """Obtener la respuesta guardada (status_code NULL = petición en curso)"""
+        query = "SELECT huella, status_code, respuesta, expira FROM claves_idempotencia WHERE clave = %s"
+        return execute_prepared(connection, query, (clave,), fetch='one', dictionary=True)
+    
+    @staticmethod
+    def save(connection: mysql.connector.MySQLConnection, clave: str, status_code: int, respuesta: str) -> None:
+        """Guardar la respuesta de la petición"""
+        query = "UPDATE claves_idempotencia SET status_code = %s, respuesta = %s WHERE clave = %s"
+        execute_prepared(connection, query, (status_code, respuesta, clave))
+    
+    @staticmethod
+    def release(connection: mysql.connector.MySQLConnection, clave: str) -> None:
+        """Liberar una clave cuya petición falló sin respuesta que repetir"""
+        execute_prepared(
+            connection, "DELETE FROM claves_idempotencia WHERE clave = %s AND status_code IS NULL", (clave,)
+        )
+    
+    @staticmethod
+    def purge_expired(connection: mysql.connector.MySQLConnection) -> int:
+        """Borrar las claves vencidas"""
+        rowcount, _ = execute_prepared(
+            connection, "DELETE FROM claves_idempotencia WHERE expira < %s", (datetime.now(),)
+        )
+        return rowcount
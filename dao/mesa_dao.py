@@ -1,6 +1,7 @@
 import mysql.connector
 from typing import Optional, Dict, List
 from datetime import datetime
+from database import AsyncDictCursor, execute_prepared
 
 class MesaDAO:
     """Data Access Object para operaciones relacionadas con mesas"""
@@ -8,24 +9,26 @@ class MesaDAO:
     @staticmethod
     def get_by_username(connection: mysql.connector.MySQLConnection, username: str) -> Optional[Dict]:
         """Obtener usuario por username (funciona para admin y usuarios de mesa)"""
-        cursor = connection.cursor(dictionary=True)
-        try:
-            query = """
-            SELECT u.id, u.username, u.password_hash, u.circuito_id, u.role,
-                   u.mesa_cerrada, u.fecha_cierre,
-                   c.numero_circuito, 
-                   e.id as establecimiento_id, e.nombre as establecimiento_nombre,
-                   e.departamento, e.ciudad, e.zona, e.barrio, e.direccion,
-                   e.tipo_establecimiento, e.accesible
-            FROM usuarios u
-            LEFT JOIN circuitos c ON u.circuito_id = c.id
-            LEFT JOIN establecimientos e ON c.establecimiento_id = e.id
-            WHERE u.username = %s
-            """
-            cursor.execute(query, (username,))
-            return cursor.fetchone()
-        finally:
-            cursor.close()
+        query = """
+        SELECT u.id, u.username, u.password_hash, u.circuito_id, u.role,
+               u.mesa_cerrada, u.fecha_cierre,
+               c.numero_circuito, 
+               e.id as establecimiento_id, e.nombre as establecimiento_nombre,
+               e.departamento, e.ciudad, e.zona, e.barrio, e.direccion,
+               e.tipo_establecimiento, e.accesible
+        FROM usuarios u
+        LEFT JOIN circuitos c ON u.circuito_id = c.id
+        LEFT JOIN establecimientos e ON c.establecimiento_id = e.id
+        WHERE u.username = %s
+        """
+        return execute_prepared(connection, query, (username,), fetch='one', dictionary=True)
+    
+    @staticmethod
+    def get_circuito_id_by_numero(connection: mysql.connector.MySQLConnection, numero_circuito: str) -> Optional[int]:
+        """Obtener el id de un circuito a partir de su número"""
+        query = "SELECT id FROM circuitos WHERE numero_circuito = %s"
+        result = execute_prepared(connection, query, (numero_circuito,), fetch='one')
+        return result[0] if result else None
     
     @staticmethod
     def create_user(connection: mysql.connector.MySQLConnection, user_data: Dict) -> int:
@@ -84,4 +87,26 @@ class MesaDAO:
             cursor.execute(query)
             return cursor.fetchall()
         finally:
-            cursor.close()
\ No newline at end of file
+            cursor.close()
+
+class AsyncMesaDAO:
+    """Variante asíncrona de MesaDAO para conexiones aiomysql"""
+    
+    @staticmethod
+    async def get_by_username(connection, username: str) -> Optional[Dict]:
+        """Obtener usuario por username (funciona para admin y usuarios de mesa)"""
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            query = """
+            SELECT u.id, u.username, u.password_hash, u.circuito_id, u.role,
+                   u.mesa_cerrada, u.fecha_cierre,
+                   c.numero_circuito, 
+                   e.id as establecimiento_id, e.nombre as establecimiento_nombre,
+                   e.departamento, e.ciudad, e.zona, e.barrio, e.direccion,
+                   e.tipo_establecimiento, e.accesible
+            FROM usuarios u
+            LEFT JOIN circuitos c ON u.circuito_id = c.id
+            LEFT JOIN establecimientos e ON c.establecimiento_id = e.id
+            WHERE u.username = %s
+            """
+            await cursor.execute(query, (username,))
+            return await cursor.fetchone()
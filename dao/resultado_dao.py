@@ -1,243 +1,162 @@
 import mysql.connector
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from database import AsyncDictCursor, execute_prepared
+
+def _votos_filter(departamento: Optional[str] = None, circuito: Optional[str] = None) -> Tuple[str, str]:
+    """JOINs y condición para filtrar votos por departamento o número de circuito"""
+    if circuito is not None:
+        return "JOIN circuitos ci ON v.circuito_id = ci.id", "AND ci.numero_circuito = %(circuito)s"
+    if departamento:
+        joins = """
+            JOIN circuitos ci ON v.circuito_id = ci.id
+            JOIN establecimientos e ON ci.establecimiento_id = e.id"""
+        return joins, "AND e.departamento = %(departamento)s"
+    return "", ""
+
+def _votes_by_candidate_query(departamento: Optional[str] = None, circuito: Optional[str] = None) -> str:
+    """Votos aprobados por candidato presidencial; el filtro se aplica antes del LEFT JOIN"""
+    joins, where = _votos_filter(departamento, circuito)
+    return f"""
+    SELECT c.nombre as candidato, p.nombre as partido, COALESCE(v.votos, 0) as votos
+    FROM candidatos c
+    JOIN partidos p ON c.partido_id = p.id
+    LEFT JOIN (
+        SELECT v.candidato_id, COUNT(*) as votos
+        FROM votos v
+        {joins}
+        WHERE v.estado_validacion = 'aprobado' {where}
+        GROUP BY v.candidato_id
+    ) v ON v.candidato_id = c.id
+    WHERE c.es_presidente = TRUE AND c.eleccion_id = %(eleccion_id)s
+    ORDER BY votos DESC
+    """
+
+def _summary_query(departamento: Optional[str]) -> str:
+    """Blancos, anulados, total, observados y votantes en una sola pasada sobre votos
+
+    votos_eleccion_activa no se filtra por departamento: sin votos a candidatos de
+    la elección activa, blancos, anulados y total se informan en 0.
+    """
+    if departamento:
+        joins = """
+        LEFT JOIN circuitos ci ON v.circuito_id = ci.id
+        LEFT JOIN establecimientos e ON ci.establecimiento_id = e.id"""
+        en_departamento = "e.departamento = %(departamento)s"
+        votantes = """(
+            SELECT COUNT(a.id)
+            FROM autorizaciones a
+            JOIN circuitos ac ON a.circuito_id = ac.id
+            JOIN establecimientos ae ON ac.establecimiento_id = ae.id
+            WHERE ae.departamento = %(departamento)s
+        )"""
+    else:
+        joins, en_departamento, votantes = "", "TRUE", "(SELECT COUNT(id) FROM autorizaciones)"
+    return f"""
+    SELECT
+        COUNT(CASE WHEN v.estado_validacion = 'aprobado' AND ca.eleccion_id = %(eleccion_id)s THEN 1 END) as votos_eleccion_activa,
+        COUNT(CASE WHEN {en_departamento} AND v.estado_validacion = 'aprobado'
+                   AND v.candidato_id IS NULL AND v.es_anulado = FALSE THEN 1 END) as votos_blanco,
+        COUNT(CASE WHEN {en_departamento} AND v.estado_validacion = 'aprobado' AND v.es_anulado = TRUE
+                   AND (v.candidato_id IS NULL OR ca.eleccion_id = %(eleccion_id)s) THEN 1 END) as votos_anulados,
+        COUNT(CASE WHEN {en_departamento} AND v.estado_validacion = 'aprobado'
+                   AND (v.candidato_id IS NULL OR ca.eleccion_id = %(eleccion_id)s) THEN 1 END) as total_votos,
+        COUNT(CASE WHEN {en_departamento} AND v.es_observado = TRUE AND v.estado_validacion = 'pendiente' THEN 1 END) as votos_observados,
+        {votantes} as total_votantes
+    FROM votos v
+    LEFT JOIN candidatos ca ON v.candidato_id = ca.id
+    {joins}
+    """
+
+_CIRCUIT_INFO_QUERY = """
+SELECT c.numero_circuito, e.nombre as establecimiento, e.departamento, e.direccion,
+       el.id as eleccion_id, el.fecha_creacion
+FROM circuitos c
+JOIN establecimientos e ON c.establecimiento_id = e.id
+LEFT JOIN elecciones el ON el.activa = TRUE
+WHERE c.numero_circuito = %(circuito)s
+LIMIT 1
+"""
+
+_CIRCUIT_TOTALS_QUERY = """
+SELECT
+    COUNT(CASE WHEN v.candidato_id IS NULL AND v.es_anulado = FALSE THEN 1 END) as votos_blanco,
+    COUNT(CASE WHEN v.es_anulado = TRUE THEN 1 END) as votos_anulados,
+    COUNT(v.id) as total_votos
+FROM votos v
+JOIN circuitos ci ON v.circuito_id = ci.id
+WHERE ci.numero_circuito = %(circuito)s
+    AND v.estado_validacion = 'aprobado'
+    AND v.timestamp >= %(desde)s
+"""
+
+def _results_summary(eleccion: Optional[Dict], resultados: List[Dict], resumen: Dict) -> Dict:
+    """Armar el resumen de resultados a partir de la pasada de agregación"""
+    hay_votos = bool(eleccion) and resumen['votos_eleccion_activa'] > 0
+    return {
+        "año_eleccion": eleccion['año'] if eleccion else 2024,
+        "resultados": [dict(r, votos=int(r['votos'])) for r in resultados],
+        "votos_blanco": int(resumen['votos_blanco']) if hay_votos else 0,
+        "votos_anulados": int(resumen['votos_anulados']) if hay_votos else 0,
+        "total_votos": int(resumen['total_votos']) if hay_votos else 0,
+        "total_votantes": int(resumen['total_votantes'] or 0),
+        "votos_observados": int(resumen['votos_observados']),
+    }
+
+def _circuit_params(circuit_info: Dict, circuito: str) -> Dict:
+    """Separar la elección activa de la información del circuito"""
+    eleccion_id = circuit_info.pop('eleccion_id')
+    desde = circuit_info.pop('fecha_creacion')
+    return {'circuito': circuito, 'eleccion_id': eleccion_id, 'desde': desde}
+
+def _circuit_results(circuit_info: Dict, resultados: List[Dict], totals: Dict) -> Dict:
+    """Armar los resultados del circuito"""
+    return {
+        "circuito": circuit_info,
+        "resultados": [dict(r, votos=int(r['votos'])) for r in resultados],
+        "votos_blanco": int(totals['votos_blanco']),
+        "votos_anulados": int(totals['votos_anulados']),
+        "total_votos": int(totals['total_votos'])
+    }
 
 class ResultadoDAO:
     """Data Access Object para operaciones relacionadas con resultados"""
     
     @staticmethod
-    def get_votes_by_candidate(connection: mysql.connector.MySQLConnection, departamento: Optional[str] = None) -> List[Dict]:
-        """Obtener votos por candidato"""
-        cursor = connection.cursor(dictionary=True)
-        try:
-            # Obtener la elección activa
-            cursor.execute("SELECT id FROM elecciones WHERE activa = TRUE LIMIT 1")
-            eleccion_activa = cursor.fetchone()
-            
-            if not eleccion_activa:
-                return []
-            
-            if departamento:
-                query = """
-                SELECT c.nombre as candidato, p.nombre as partido, COUNT(v.id) as votos
-                FROM candidatos c
-                JOIN partidos p ON c.partido_id = p.id
-                LEFT JOIN votos v ON c.id = v.candidato_id AND v.estado_validacion = 'aprobado'
-                LEFT JOIN circuitos ci ON v.circuito_id = ci.id
-                LEFT JOIN establecimientos e ON ci.establecimiento_id = e.id
-                WHERE (e.departamento = %s OR v.id IS NULL) AND c.es_presidente = TRUE AND c.eleccion_id = %s
-                GROUP BY c.id, c.nombre, p.nombre
-                ORDER BY votos DESC
-                """
-                cursor.execute(query, (departamento, eleccion_activa['id']))
-            else:
-                query = """
-                SELECT c.nombre as candidato, p.nombre as partido, COUNT(v.id) as votos
-                FROM candidatos c
-                JOIN partidos p ON c.partido_id = p.id
-                LEFT JOIN votos v ON c.id = v.candidato_id AND v.estado_validacion = 'aprobado'
-                WHERE c.es_presidente = TRUE AND c.eleccion_id = %s
-                GROUP BY c.id, c.nombre, p.nombre
-                ORDER BY votos DESC
-                """
-                cursor.execute(query, (eleccion_activa['id'],))
-            
-            resultados = cursor.fetchall()
-            return resultados
-        finally:
-            cursor.close()
-    
-    @staticmethod
-    def get_blank_votes(connection: mysql.connector.MySQLConnection, departamento: Optional[str] = None) -> int:
-        """Obtener votos en blanco"""
-        cursor = connection.cursor()
-        try:
-            # Obtener la elección activa
-            cursor.execute("SELECT id FROM elecciones WHERE activa = TRUE LIMIT 1")
-            eleccion_activa = cursor.fetchone()
-            
-            if not eleccion_activa:
-                return 0
-            
-            # Verificar si hay algún voto para candidatos de la elección activa
-            cursor.execute("""
-                SELECT COUNT(*) FROM votos v 
-                JOIN candidatos c ON v.candidato_id = c.id 
-                WHERE c.eleccion_id = %s AND v.estado_validacion = 'aprobado'
-            """, (eleccion_activa[0],))
-            
-            votos_eleccion_activa = cursor.fetchone()[0]
-            
-            # Si no hay votos de la elección activa, devolver 0
-            if votos_eleccion_activa == 0:
-                return 0
-            
-            if departamento:
-                query = """
-                SELECT COUNT(v.id)
-                FROM votos v
-                JOIN circuitos c ON v.circuito_id = c.id
-                JOIN establecimientos e ON c.establecimiento_id = e.id
-                WHERE v.candidato_id IS NULL AND v.es_anulado = FALSE 
-                AND v.estado_validacion = 'aprobado' AND e.departamento = %s
-                """
-                cursor.execute(query, (departamento,))
-            else:
-                query = """
-                SELECT COUNT(v.id)
-                FROM votos v
-                WHERE v.candidato_id IS NULL AND v.es_anulado = FALSE AND v.estado_validacion = 'aprobado'
-                """
-                cursor.execute(query)
-            result = cursor.fetchone()
-            return result[0] if result else 0
-        finally:
-            cursor.close()
-    
-    @staticmethod
-    def get_nullified_votes(connection: mysql.connector.MySQLConnection, departamento: Optional[str] = None) -> int:
-        """Obtener votos anulados"""
-        cursor = connection.cursor()
-        try:
-            # Obtener la elección activa
-            cursor.execute("SELECT id FROM elecciones WHERE activa = TRUE LIMIT 1")
-            eleccion_activa = cursor.fetchone()
-            
-            if not eleccion_activa:
-                return 0
-            
-            # Verificar si hay algún voto para candidatos de la elección activa
-            cursor.execute("""
-                SELECT COUNT(*) FROM votos v 
-                JOIN candidatos c ON v.candidato_id = c.id 
-                WHERE c.eleccion_id = %s AND v.estado_validacion = 'aprobado'
-            """, (eleccion_activa[0],))
-            
-            votos_eleccion_activa = cursor.fetchone()[0]
-            
-            # Si no hay votos de la elección activa, devolver 0
-            if votos_eleccion_activa == 0:
-                return 0
-            
-            if departamento:
-                query = """
-                SELECT COUNT(v.id)
-                FROM votos v
-                JOIN circuitos c ON v.circuito_id = c.id
-                JOIN establecimientos e ON c.establecimiento_id = e.id
-                LEFT JOIN candidatos ca ON v.candidato_id = ca.id
-                WHERE v.es_anulado = TRUE AND v.estado_validacion = 'aprobado' AND e.departamento = %s
-                AND (v.candidato_id IS NULL OR ca.eleccion_id = %s)
-                """
-                cursor.execute(query, (departamento, eleccion_activa[0]))
-            else:
-                query = """
-                SELECT COUNT(v.id)
-                FROM votos v
-                LEFT JOIN candidatos ca ON v.candidato_id = ca.id
-                WHERE v.es_anulado = TRUE AND v.estado_validacion = 'aprobado'
-                AND (v.candidato_id IS NULL OR ca.eleccion_id = %s)
-                """
-                cursor.execute(query, (eleccion_activa[0],))
-            result = cursor.fetchone()
-            return result[0] if result else 0
-        finally:
-            cursor.close()
-    
-    @staticmethod
-    def get_total_votes(connection: mysql.connector.MySQLConnection, departamento: Optional[str] = None) -> int:
-        """Obtener total de votos"""
-        cursor = connection.cursor()
-        try:
-            # Obtener la elección activa
-            cursor.execute("SELECT id FROM elecciones WHERE activa = TRUE LIMIT 1")
-            eleccion_activa = cursor.fetchone()
-            
-            if not eleccion_activa:
-                return 0
-            
-            # Verificar si hay algún voto para candidatos de la elección activa
-            cursor.execute("""
-                SELECT COUNT(*) FROM votos v 
-                JOIN candidatos c ON v.candidato_id = c.id 
-                WHERE c.eleccion_id = %s AND v.estado_validacion = 'aprobado'
-            """, (eleccion_activa[0],))
-            
-            votos_eleccion_activa = cursor.fetchone()[0]
-            
-            # Si no hay votos de la elección activa, devolver 0
-            if votos_eleccion_activa == 0:
-                return 0
-            
-            if departamento:
-                query = """
-                SELECT COUNT(v.id)
-                FROM votos v
-                JOIN circuitos c ON v.circuito_id = c.id
-                JOIN establecimientos e ON c.establecimiento_id = e.id
-                LEFT JOIN candidatos ca ON v.candidato_id = ca.id
-                WHERE v.estado_validacion = 'aprobado' AND e.departamento = %s
-                AND (v.candidato_id IS NULL OR ca.eleccion_id = %s)
-                """
-                cursor.execute(query, (departamento, eleccion_activa[0]))
-            else:
-                query = """
-                SELECT COUNT(v.id)
-                FROM votos v
-                LEFT JOIN candidatos ca ON v.candidato_id = ca.id
-                WHERE v.estado_validacion = 'aprobado'
-                AND (v.candidato_id IS NULL OR ca.eleccion_id = %s)
-                """
-                cursor.execute(query, (eleccion_activa[0],))
-            result = cursor.fetchone()
-            return result[0] if result else 0
-        finally:
-            cursor.close()
+    def get_active_election(connection: mysql.connector.MySQLConnection) -> Optional[Dict]:
+        """Obtener id y año de la elección activa"""
+        return execute_prepared(
+            connection, "SELECT id, año FROM elecciones WHERE activa = TRUE LIMIT 1", fetch='one', dictionary=True
+        )
     
     @staticmethod
-    def get_total_voters(connection: mysql.connector.MySQLConnection, departamento: Optional[str] = None) -> int:
-        """Obtener total de votantes autorizados"""
-        cursor = connection.cursor()
-        try:
-            if departamento:
-                query = """
-                SELECT COUNT(a.id)
-                FROM autorizaciones a
-                JOIN circuitos c ON a.circuito_id = c.id
-                JOIN establecimientos e ON c.establecimiento_id = e.id
-                WHERE e.departamento = %s
-                """
-                cursor.execute(query, (departamento,))
-            else:
-                query = "SELECT COUNT(id) FROM autorizaciones"
-                cursor.execute(query)
-            result = cursor.fetchone()
-            return result[0] if result else 0
-        finally:
-            cursor.close()
+    def get_circuit_info(connection: mysql.connector.MySQLConnection, circuito: str) -> Optional[Dict]:
+        """Obtener número, establecimiento y ubicación de un circuito"""
+        query = """
+        SELECT c.numero_circuito, e.nombre as establecimiento, e.departamento, e.direccion
+        FROM circuitos c
+        JOIN establecimientos e ON c.establecimiento_id = e.id
+        WHERE c.numero_circuito = %s
+        """
+        return execute_prepared(connection, query, (circuito,), fetch='one', dictionary=True)
     
     @staticmethod
-    def get_observed_votes(connection: mysql.connector.MySQLConnection, departamento: Optional[str] = None) -> int:
-        """Obtener votos observados pendientes"""
-        cursor = connection.cursor()
+    def get_results_summary(connection: mysql.connector.MySQLConnection, departamento: Optional[str] = None) -> Dict:
+        """Votos por candidato y estadísticas de la elección activa en tres consultas
+        
+        Elección activa, votos por candidato y una pasada de agregación sobre votos
+        (blancos, anulados, total, observados y votantes).
+        """
+        eleccion = ResultadoDAO.get_active_election(connection)
+        params = {'eleccion_id': eleccion['id'] if eleccion else None, 'departamento': departamento}
+        cursor = connection.cursor(dictionary=True)
         try:
-            if departamento:
-                query = """
-                SELECT COUNT(v.id)
-                FROM votos v
-                JOIN circuitos c ON v.circuito_id = c.id
-                JOIN establecimientos e ON c.establecimiento_id = e.id
-                WHERE v.es_observado = TRUE AND v.estado_validacion = 'pendiente' AND e.departamento = %s
-                """
-                cursor.execute(query, (departamento,))
-            else:
-                query = """
-                SELECT COUNT(id)
-                FROM votos 
-                WHERE es_observado = TRUE AND estado_validacion = 'pendiente'
-                """
-                cursor.execute(query)
-            result = cursor.fetchone()
-            return result[0] if result else 0
+            resultados = []
+            if eleccion:
+                cursor.execute(_votes_by_candidate_query(departamento), params)
+                resultados = cursor.fetchall()
+            cursor.execute(_summary_query(departamento), params)
+            resumen = cursor.fetchone()
+            return _results_summary(eleccion, resultados, resumen)
         finally:
             cursor.close()
     
@@ -253,134 +172,93 @@ class ResultadoDAO:
             cursor.close()
     
     @staticmethod
-    def get_circuit_results(connection: mysql.connector.MySQLConnection, circuito: str) -> Dict:
-        """Obtener resultados por circuito específico"""
+    def get_circuit_results(connection: mysql.connector.MySQLConnection, circuito: str) -> Optional[Dict]:
+        """Obtener resultados por circuito específico (circuito y elección, candidatos y totales)"""
         cursor = connection.cursor(dictionary=True)
         try:
-            # Información del circuito
-            circuit_info_query = """
-            SELECT c.numero_circuito, e.nombre as establecimiento, e.departamento, e.direccion
-            FROM circuitos c
-            JOIN establecimientos e ON c.establecimiento_id = e.id
-            WHERE c.numero_circuito = %s
-            """
-            cursor.execute(circuit_info_query, (circuito,))
+            cursor.execute(_CIRCUIT_INFO_QUERY, {'circuito': circuito})
             circuit_info = cursor.fetchone()
-            
-            if not circuit_info:
+            if not circuit_info or circuit_info['eleccion_id'] is None:
                 return None
+            params = _circuit_params(circuit_info, circuito)
             
-            # Obtener la elección activa
-            cursor.execute("SELECT id FROM elecciones WHERE activa = TRUE LIMIT 1")
-            eleccion_activa = cursor.fetchone()
-            
-            if not eleccion_activa:
-                return None
-            
-            # Votos por candidato en el circuito (solo presidenciales)
-            votes_query = """
-            SELECT ca.nombre as candidato, p.nombre as partido, COUNT(v.id) as votos
-            FROM candidatos ca
-            JOIN partidos p ON ca.partido_id = p.id
-            LEFT JOIN votos v ON ca.id = v.candidato_id 
-                AND v.estado_validacion = 'aprobado'
-                AND v.circuito_id = (SELECT id FROM circuitos WHERE numero_circuito = %s)
-            WHERE ca.es_presidente = TRUE AND ca.eleccion_id = %s
-            GROUP BY ca.id, ca.nombre, p.nombre
-            ORDER BY votos DESC
-            """
-            cursor.execute(votes_query, (circuito, eleccion_activa['id']))
+            cursor.execute(_votes_by_candidate_query(circuito=circuito), params)
             votos_candidatos = cursor.fetchall()
-            
-            # Votos en blanco (solo de la elección activa)
-            blank_query = """
-            SELECT COUNT(v.id) as votos_blanco
-            FROM votos v
-            JOIN circuitos c ON v.circuito_id = c.id
-            WHERE c.numero_circuito = %s 
-                AND v.candidato_id IS NULL 
-                AND v.es_anulado = FALSE 
-                AND v.estado_validacion = 'aprobado'
-                AND v.timestamp >= (SELECT fecha_creacion FROM elecciones WHERE id = %s)
-            """
-            cursor.execute(blank_query, (circuito, eleccion_activa['id']))
-            votos_blanco = cursor.fetchone()['votos_blanco'] or 0
-            
-            # Votos anulados (solo de la elección activa)
-            nullified_query = """
-            SELECT COUNT(v.id) as votos_anulados
-            FROM votos v
-            JOIN circuitos c ON v.circuito_id = c.id
-            WHERE c.numero_circuito = %s 
-                AND v.es_anulado = TRUE 
-                AND v.estado_validacion = 'aprobado'
-                AND v.timestamp >= (SELECT fecha_creacion FROM elecciones WHERE id = %s)
-            """
-            cursor.execute(nullified_query, (circuito, eleccion_activa['id']))
-            votos_anulados = cursor.fetchone()['votos_anulados'] or 0
-            
-            # Total de votos (solo de la elección activa)
-            total_query = """
-            SELECT COUNT(v.id) as total_votos
-            FROM votos v
-            JOIN circuitos c ON v.circuito_id = c.id
-            WHERE c.numero_circuito = %s 
-                AND v.estado_validacion = 'aprobado'
-                AND v.timestamp >= (SELECT fecha_creacion FROM elecciones WHERE id = %s)
-            """
-            cursor.execute(total_query, (circuito, eleccion_activa['id']))
-            total_votos = cursor.fetchone()['total_votos'] or 0
-            
-            return {
-                "circuito": circuit_info,
-                "resultados": votos_candidatos,
-                "votos_blanco": votos_blanco,
-                "votos_anulados": votos_anulados,
-                "total_votos": total_votos
-            }
+            cursor.execute(_CIRCUIT_TOTALS_QUERY, params)
+            return _circuit_results(circuit_info, votos_candidatos, cursor.fetchone())
         finally:
             cursor.close()
-            
+    
     @staticmethod
-    def search_circuits(connection: mysql.connector.MySQLConnection, search_term: str) -> List[Dict]:
-        """Buscar circuitos por número"""
+    def get_circuit_directory(connection: mysql.connector.MySQLConnection) -> List[Dict]:
+        """Número, establecimiento y departamento de todos los circuitos (para el índice de búsqueda)"""
         cursor = connection.cursor(dictionary=True)
         try:
-            # Si el término es "ALL", mostrar todos los circuitos disponibles
-            if search_term.upper() == "ALL":
-                query = """
+            cursor.execute("""
                 SELECT c.numero_circuito, e.nombre as establecimiento, e.departamento
                 FROM circuitos c
                 JOIN establecimientos e ON c.establecimiento_id = e.id
-                ORDER BY CAST(c.numero_circuito AS UNSIGNED)
-                """
-                cursor.execute(query)
-                resultados = cursor.fetchall()
-                return resultados
-            
-            test_query = "SELECT COUNT(*) as total FROM circuitos"
-            cursor.execute(test_query)
-            total_circuits = cursor.fetchone()
-            
-            all_query = "SELECT numero_circuito FROM circuitos ORDER BY CAST(numero_circuito AS UNSIGNED)"
-            cursor.execute(all_query)
-            all_numbers = cursor.fetchall()
-            números_disponibles = [item['numero_circuito'] for item in all_numbers]
-            
+            """)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+class AsyncResultadoDAO:
+    """Variante asíncrona de ResultadoDAO para conexiones aiomysql"""
+    
+    @staticmethod
+    async def get_active_election(connection) -> Optional[Dict]:
+        """Obtener id y año de la elección activa"""
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            await cursor.execute("SELECT id, año FROM elecciones WHERE activa = TRUE LIMIT 1")
+            return await cursor.fetchone()
+    
+    @staticmethod
+    async def get_circuit_info(connection, circuito: str) -> Optional[Dict]:
+        """Obtener número, establecimiento y ubicación de un circuito"""
+        async with connection.cursor(AsyncDictCursor) as cursor:
             query = """
-            SELECT c.numero_circuito, e.nombre as establecimiento, e.departamento
+            SELECT c.numero_circuito, e.nombre as establecimiento, e.departamento, e.direccion
             FROM circuitos c
             JOIN establecimientos e ON c.establecimiento_id = e.id
-            WHERE c.numero_circuito LIKE %s
-            ORDER BY CAST(c.numero_circuito AS UNSIGNED)
-            LIMIT 10
+            WHERE c.numero_circuito = %s
             """
-            search_pattern = f"%{search_term}%"
-            cursor.execute(query, (search_pattern,))
-            resultados = cursor.fetchall()
-            return resultados
-        except Exception as e:
-            print(f"ERROR en búsqueda de circuitos: {e}")
-            return []
-        finally:
-            cursor.close()
\ No newline at end of file
+            await cursor.execute(query, (circuito,))
+            return await cursor.fetchone()
+    
+    @staticmethod
+    async def get_results_summary(connection, departamento: Optional[str] = None) -> Dict:
+        """Votos por candidato y estadísticas de la elección activa en tres consultas"""
+        eleccion = await AsyncResultadoDAO.get_active_election(connection)
+        params = {'eleccion_id': eleccion['id'] if eleccion else None, 'departamento': departamento}
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            resultados = []
+            if eleccion:
+                await cursor.execute(_votes_by_candidate_query(departamento), params)
+                resultados = await cursor.fetchall()
+            await cursor.execute(_summary_query(departamento), params)
+            resumen = await cursor.fetchone()
+        return _results_summary(eleccion, resultados, resumen)
+    
+    @staticmethod
+    async def get_departments(connection) -> List[Dict]:
+        """Obtener lista de departamentos"""
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            await cursor.execute("SELECT DISTINCT departamento as nombre FROM establecimientos")
+            return await cursor.fetchall()
+    
+    @staticmethod
+    async def get_circuit_results(connection, circuito: str) -> Optional[Dict]:
+        """Obtener resultados por circuito específico (circuito y elección, candidatos y totales)"""
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            await cursor.execute(_CIRCUIT_INFO_QUERY, {'circuito': circuito})
+            circuit_info = await cursor.fetchone()
+            if not circuit_info or circuit_info['eleccion_id'] is None:
+                return None
+            params = _circuit_params(circuit_info, circuito)
+            
+            await cursor.execute(_votes_by_candidate_query(circuito=circuito), params)
+            votos_candidatos = await cursor.fetchall()
+            await cursor.execute(_CIRCUIT_TOTALS_QUERY, params)
+            return _circuit_results(circuit_info, votos_candidatos, await cursor.fetchone())
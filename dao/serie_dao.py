@@ -0,0 +1,215 @@
+import random
+import mysql.connector
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from database import execute_prepared
+from dao.conteo_dao import CONTEO_SHARDS
+from versions import ESTRUCTURA, get_version
+
+# Series por minuto (tabla series_minuto): cada voto, voto observado y autorización
+# suma 1 en el minuto en que ocurrió, por circuito y por departamento. El total
+# nacional es la suma de los departamentos.
+TIPOS_SERIE = ('votos', 'autorizaciones', 'observados')
+NIVELES_SERIE = ('nacional', 'departamento', 'circuito')
+
+def momento_actual() -> datetime:
+    """Ahora sin microsegundos, para las fechas que también suman en la serie
+
+    Una columna DATETIME sin fracción redondea: las 10:59:59.7 quedan guardadas como
+    11:00:00 y rebuild y la auditoría las contarían en otro minuto que el incremento.
+    """
+    return datetime.now().replace(microsecond=0)
+
+def minuto(momento: datetime) -> datetime:
+    """Inicio del minuto de un momento"""
+    return momento.replace(second=0, microsecond=0)
+
+def deltas_serie_votos(votos: List[Dict]) -> Counter:
+    """Incrementos (circuito_id, minuto, tipo) para una lista de votos nuevos"""
+    deltas = Counter()
+    for voto in votos:
+        momento = minuto(voto['timestamp'])
+        deltas[(voto['circuito_id'], momento, 'votos')] += 1
+        if voto['es_observado']:
+            deltas[(voto['circuito_id'], momento, 'observados')] += 1
+    return deltas
+
+# Una sola sentencia con las filas de circuito y departamento; la fila del
+# departamento la comparten todos sus circuitos, por eso también va en shards
+def _insert(filas: int) -> str:
+    return f"""
+    INSERT INTO series_minuto (nivel, clave, minuto, tipo, shard, cantidad)
+    VALUES {", ".join(["(%s, %s, %s, %s, %s, %s)"] * filas)}
+    ON DUPLICATE KEY UPDATE cantidad = cantidad + VALUES(cantidad)
+    """
+
+_CIRCUITO_QUERY = """
+SELECT ci.numero_circuito, e.departamento
+FROM circuitos ci
+JOIN establecimientos e ON ci.establecimiento_id = e.id
+WHERE ci.id = %s
+"""
+
+# circuito_id -> (numero_circuito, departamento); se descarta cuando cambia la estructura
+_circuitos: Dict[int, Tuple[str, str]] = {}
+_circuitos_version = None
+
+def _circuito_cacheado(circuito_id: int) -> Optional[Tuple[str, str]]:
+    global _circuitos_version
+    version = get_version(ESTRUCTURA)
+    if _circuitos_version != version:
+        _circuitos.clear()
+        _circuitos_version = version
+    return _circuitos.get(circuito_id)
+
+def _filas(deltas: Dict[Tuple[int, datetime, str], int], circuitos: Dict[int, Tuple[str, str]]) -> List[tuple]:
+    """Filas (nivel, clave, minuto, tipo, delta), ordenadas para tomar los locks en orden"""
+    acumulado = Counter()
+    for (circuito_id, momento, tipo), delta in deltas.items():
+        circuito = circuitos.get(circuito_id)
+        if circuito is None:
+            continue
+        numero, departamento = circuito
+        acumulado[('circuito', numero, momento, tipo)] += delta
+        acumulado[('departamento', departamento, momento, tipo)] += delta
+    return [clave + (delta,) for clave, delta in sorted(acumulado.items()) if delta != 0]
+
+def _params(filas: List[tuple]) -> tuple:
+    params = []
+    for nivel, clave, momento, tipo, delta in filas:
+        params.extend((nivel, clave, momento, tipo, random.randrange(CONTEO_SHARDS), delta))
+    return tuple(params)
+
+def _serie_query(nivel: str, clave: Optional[str], desde: Optional[datetime], hasta: Optional[datetime]) -> Tuple[str, tuple]:
+    """Cantidades por minuto y tipo de un alcance (nacional suma los departamentos)"""
+    if nivel == 'nacional':
+        where, params = "nivel = 'departamento'", ()
+    else:
+        where, params = "nivel = %s AND clave = %s", (nivel, clave)
+    if desde is not None:
+        where, params = where + " AND minuto >= %s", params + (desde,)
+    if hasta is not None:
+        where, params = where + " AND minuto <= %s", params + (hasta,)
+    query = f"""
+    SELECT minuto, tipo, SUM(cantidad) as cantidad
+    FROM series_minuto
+    WHERE {where}
+    GROUP BY minuto, tipo
+    ORDER BY minuto
+    """
+    return query, params
+
+class SerieDAO:
+    """Data Access Object para las series por minuto (tabla series_minuto)"""
+
+    @staticmethod
+    def increment(connection: mysql.connector.MySQLConnection, deltas: Dict[Tuple[int, datetime, str], int]) -> None:
+        """Sumar los deltas (circuito_id, minuto, tipo) dentro de la transacción abierta"""
+        circuitos = {circuito_id: SerieDAO._circuito(connection, circuito_id) for circuito_id, _, _ in deltas}
+        filas = _filas(deltas, circuitos)
+        if filas:
+            execute_prepared(connection, _insert(len(filas)), _params(filas))
+
+    @staticmethod
+    def _circuito(connection: mysql.connector.MySQLConnection, circuito_id: int) -> Optional[Tuple[str, str]]:
+        """Número y departamento del circuito (cacheados por proceso)"""
+        circuito = _circuito_cacheado(circuito_id)
+        if circuito is None:
+            fila = execute_prepared(connection, _CIRCUITO_QUERY, (circuito_id,), fetch='one')
+            if fila is None:
+                return None
+            circuito = _circuitos[circuito_id] = (fila[0], fila[1])
+        return circuito
+
+    @staticmethod
+    def add_votes(connection: mysql.connector.MySQLConnection, votos: List[Dict]) -> None:
+        """Sumar votos nuevos (y los observados entre ellos) en el minuto de cada uno"""
+        SerieDAO.increment(connection, deltas_serie_votos(votos))
+
+    @staticmethod
+    def add(connection: mysql.connector.MySQLConnection, circuito_id: int, tipo: str, momento: datetime, delta: int = 1) -> None:
+        """Sumar delta a un tipo en el minuto de 'momento'"""
+        SerieDAO.increment(connection, {(circuito_id, minuto(momento), tipo): delta})
+
+    @staticmethod
+    def get_series(connection: mysql.connector.MySQLConnection, nivel: str, clave: Optional[str] = None,
+                   desde: Optional[datetime] = None, hasta: Optional[datetime] = None) -> List[tuple]:
+        """Filas (minuto, tipo, cantidad) del alcance entre desde y hasta, ordenadas por minuto"""
+        query, params = _serie_query(nivel, clave, desde, hasta)
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def rebuild(connection: mysql.connector.MySQLConnection) -> int:
+        """Recalcular series_minuto desde votos y autorizaciones; devuelve filas creadas"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("DELETE FROM series_minuto")
+            deltas = Counter()
+            cursor.execute("SELECT circuito_id, timestamp, es_observado FROM votos")
+            for circuito_id, momento, es_observado in cursor.fetchall():
+                deltas[(circuito_id, minuto(momento), 'votos')] += 1
+                if es_observado:
+                    deltas[(circuito_id, minuto(momento), 'observados')] += 1
+            cursor.execute("SELECT circuito_id, fecha_autorizacion FROM autorizaciones WHERE fecha_autorizacion IS NOT NULL")
+            for circuito_id, momento in cursor.fetchall():
+                deltas[(circuito_id, minuto(momento), 'autorizaciones')] += 1
+            cursor.execute("""
+                SELECT ci.id, ci.numero_circuito, e.departamento
+                FROM circuitos ci
+                JOIN establecimientos e ON ci.establecimiento_id = e.id
+            """)
+            circuitos = {circuito_id: (numero, departamento) for circuito_id, numero, departamento in cursor.fetchall()}
+            filas = _filas(deltas, circuitos)
+            cursor.executemany("""
+                INSERT INTO series_minuto (nivel, clave, minuto, tipo, shard, cantidad)
+                VALUES (%s, %s, %s, %s, 0, %s)
+            """, filas)
+            return len(filas)
+        finally:
+            cursor.close()
+
+class AsyncSerieDAO:
+    """Variante asíncrona de SerieDAO para conexiones aiomysql"""
+
+    @staticmethod
+    async def increment(connection, deltas: Dict[Tuple[int, datetime, str], int]) -> None:
+        """Sumar los deltas (circuito_id, minuto, tipo) dentro de la transacción abierta"""
+        async with connection.cursor() as cursor:
+            circuitos = {}
+            for circuito_id, _, _ in deltas:
+                circuito = _circuito_cacheado(circuito_id)
+                if circuito is None:
+                    await cursor.execute(_CIRCUITO_QUERY, (circuito_id,))
+                    fila = await cursor.fetchone()
+                    if fila is None:
+                        continue
+                    circuito = _circuitos[circuito_id] = (fila[0], fila[1])
+                circuitos[circuito_id] = circuito
+            filas = _filas(deltas, circuitos)
+            if filas:
+                await cursor.execute(_insert(len(filas)), _params(filas))
+
+    @staticmethod
+    async def add_votes(connection, votos: List[Dict]) -> None:
+        """Sumar votos nuevos (y los observados entre ellos) en el minuto de cada uno"""
+        await AsyncSerieDAO.increment(connection, deltas_serie_votos(votos))
+
+    @staticmethod
+    async def add(connection, circuito_id: int, tipo: str, momento: datetime, delta: int = 1) -> None:
+        """Sumar delta a un tipo en el minuto de 'momento'"""
+        await AsyncSerieDAO.increment(connection, {(circuito_id, minuto(momento), tipo): delta})
+
+    @staticmethod
+    async def get_series(connection, nivel: str, clave: Optional[str] = None,
+                         desde: Optional[datetime] = None, hasta: Optional[datetime] = None) -> List[tuple]:
+        """Filas (minuto, tipo, cantidad) del alcance entre desde y hasta, ordenadas por minuto"""
+        query, params = _serie_query(nivel, clave, desde, hasta)
+        async with connection.cursor() as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
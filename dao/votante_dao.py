@@ -1,6 +1,7 @@
 import mysql.connector
 from typing import Optional, Dict, List
 from datetime import datetime
+from database import AsyncDictCursor, execute_prepared
 
 class VotanteDAO:
     """Data Access Object para operaciones relacionadas con votantes"""
@@ -8,72 +9,156 @@ class VotanteDAO:
     @staticmethod
     def get_authorization(connection: mysql.connector.MySQLConnection, credencial: str, circuito_id: int = None) -> Optional[Dict]:
         """Obtener autorización de votante"""
+        if circuito_id:
+            query = """
+            SELECT * FROM autorizaciones 
+            WHERE credencial = %s AND circuito_id = %s
+            """
+            return execute_prepared(connection, query, (credencial, circuito_id), fetch='one', dictionary=True)
+        query = """
+        SELECT * FROM autorizaciones 
+        WHERE credencial = %s
+        """
+        return execute_prepared(connection, query, (credencial,), fetch='one', dictionary=True)
+    
+    @staticmethod
+    def create_authorization(connection: mysql.connector.MySQLConnection, auth_data: Dict) -> int:
+        """Crear nueva autorización"""
+        cursor = connection.cursor()
+        try:
+            query = """
+            INSERT INTO autorizaciones (credencial, circuito_id, estado, autorizado_por, fecha_autorizacion, es_autorizacion_especial)
+            VALUES (%(credencial)s, %(circuito_id)s, %(estado)s, %(autorizado_por)s, %(fecha_autorizacion)s, %(es_autorizacion_especial)s)
+            """
+            cursor.execute(query, auth_data)
+            return cursor.lastrowid
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def update_authorization_status(connection: mysql.connector.MySQLConnection, credencial: str, estado: str, fecha_voto: datetime = None) -> bool:
+        """Actualizar estado de autorización"""
+        if fecha_voto:
+            query = """
+            UPDATE autorizaciones 
+            SET estado = %s, fecha_voto = %s 
+            WHERE credencial = %s
+            """
+            rowcount, _ = execute_prepared(connection, query, (estado, fecha_voto, credencial))
+        else:
+            query = """
+            UPDATE autorizaciones 
+            SET estado = %s 
+            WHERE credencial = %s
+            """
+            rowcount, _ = execute_prepared(connection, query, (estado, credencial))
+        return rowcount > 0
+    
+    @staticmethod
+    def mark_as_voted(connection: mysql.connector.MySQLConnection, credencial: str, fecha_voto: datetime) -> bool:
+        """Pasar la autorización de HABILITADA a VOTÓ; False si no estaba habilitada
+        
+        El UPDATE condicional es a la vez la verificación y la transición, así dos
+        votos simultáneos con la misma credencial no pueden pasar ambos.
+        """
+        query = """
+        UPDATE autorizaciones 
+        SET estado = 'VOTÓ', fecha_voto = %s 
+        WHERE credencial = %s AND estado = 'HABILITADA'
+        """
+        rowcount, _ = execute_prepared(connection, query, (fecha_voto, credencial))
+        return rowcount > 0
+    
+    @staticmethod
+    def mark_many_as_voted(connection: mysql.connector.MySQLConnection, credenciales: List[str], fecha_voto: datetime) -> int:
+        """Pasar varias autorizaciones de HABILITADA a VOTÓ; devuelve cuántas cambiaron"""
+        cursor = connection.cursor()
+        try:
+            query = """
+            UPDATE autorizaciones 
+            SET estado = 'VOTÓ', fecha_voto = %s 
+            WHERE credencial = %s AND estado = 'HABILITADA'
+            """
+            cursor.executemany(query, [(fecha_voto, credencial) for credencial in credenciales])
+            return cursor.rowcount
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def get_voters_by_circuit(connection: mysql.connector.MySQLConnection, circuito_id: int) -> List[Dict]:
+        """Obtener votantes por circuito"""
         cursor = connection.cursor(dictionary=True)
         try:
+            query = """
+            SELECT credencial, estado, fecha_autorizacion 
+            FROM autorizaciones 
+            WHERE circuito_id = %s
+            """
+            cursor.execute(query, (circuito_id,))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+class AsyncVotanteDAO:
+    """Variante asíncrona de VotanteDAO para conexiones aiomysql"""
+    
+    @staticmethod
+    async def get_authorization(connection, credencial: str, circuito_id: int = None) -> Optional[Dict]:
+        """Obtener autorización de votante"""
+        async with connection.cursor(AsyncDictCursor) as cursor:
             if circuito_id:
                 query = """
                 SELECT * FROM autorizaciones 
                 WHERE credencial = %s AND circuito_id = %s
                 """
-                cursor.execute(query, (credencial, circuito_id))
+                await cursor.execute(query, (credencial, circuito_id))
             else:
                 query = """
                 SELECT * FROM autorizaciones 
                 WHERE credencial = %s
                 """
-                cursor.execute(query, (credencial,))
-            return cursor.fetchone()
-        finally:
-            cursor.close()
+                await cursor.execute(query, (credencial,))
+            return await cursor.fetchone()
     
     @staticmethod
-    def create_authorization(connection: mysql.connector.MySQLConnection, auth_data: Dict) -> int:
+    async def create_authorization(connection, auth_data: Dict) -> int:
         """Crear nueva autorización"""
-        cursor = connection.cursor()
-        try:
+        async with connection.cursor() as cursor:
             query = """
             INSERT INTO autorizaciones (credencial, circuito_id, estado, autorizado_por, fecha_autorizacion, es_autorizacion_especial)
             VALUES (%(credencial)s, %(circuito_id)s, %(estado)s, %(autorizado_por)s, %(fecha_autorizacion)s, %(es_autorizacion_especial)s)
             """
-            cursor.execute(query, auth_data)
+            await cursor.execute(query, auth_data)
             return cursor.lastrowid
-        finally:
-            cursor.close()
     
     @staticmethod
-    def update_authorization_status(connection: mysql.connector.MySQLConnection, credencial: str, estado: str, fecha_voto: datetime = None) -> bool:
+    async def update_authorization_status(connection, credencial: str, estado: str, fecha_voto: datetime = None) -> bool:
         """Actualizar estado de autorización"""
-        cursor = connection.cursor()
-        try:
+        async with connection.cursor() as cursor:
             if fecha_voto:
                 query = """
                 UPDATE autorizaciones 
                 SET estado = %s, fecha_voto = %s 
                 WHERE credencial = %s
                 """
-                cursor.execute(query, (estado, fecha_voto, credencial))
+                await cursor.execute(query, (estado, fecha_voto, credencial))
             else:
                 query = """
                 UPDATE autorizaciones 
                 SET estado = %s 
                 WHERE credencial = %s
                 """
-                cursor.execute(query, (estado, credencial))
+                await cursor.execute(query, (estado, credencial))
             return cursor.rowcount > 0
-        finally:
-            cursor.close()
     
     @staticmethod
-    def get_voters_by_circuit(connection: mysql.connector.MySQLConnection, circuito_id: int) -> List[Dict]:
-        """Obtener votantes por circuito"""
-        cursor = connection.cursor(dictionary=True)
-        try:
+    async def mark_as_voted(connection, credencial: str, fecha_voto: datetime) -> bool:
+        """Pasar la autorización de HABILITADA a VOTÓ; False si no estaba habilitada"""
+        async with connection.cursor() as cursor:
             query = """
-            SELECT credencial, estado, fecha_autorizacion 
-            FROM autorizaciones 
-            WHERE circuito_id = %s
+            UPDATE autorizaciones 
+            SET estado = 'VOTÓ', fecha_voto = %s 
+            WHERE credencial = %s AND estado = 'HABILITADA'
             """
-            cursor.execute(query, (circuito_id,))
-            return cursor.fetchall()
-        finally:
-            cursor.close()
\ No newline at end of file
+            await cursor.execute(query, (fecha_voto, credencial))
+            return cursor.rowcount > 0
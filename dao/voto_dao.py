@@ -1,6 +1,7 @@
 import mysql.connector
 from typing import Optional, Dict, List
 from datetime import datetime
+from database import AsyncDictCursor, execute_prepared
 
 class VotoDAO:
     """Data Access Object para operaciones relacionadas con votos"""
@@ -19,17 +20,103 @@ class VotoDAO:
     @staticmethod
     def create_vote(connection: mysql.connector.MySQLConnection, vote_data: Dict) -> int:
         """Crear nuevo voto"""
+        query = """
+        INSERT INTO votos (numero_comprobante, candidato_id, timestamp, es_observado, estado_validacion, circuito_id, es_anulado)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+        params = (
+            vote_data['numero_comprobante'], vote_data['candidato_id'], vote_data['timestamp'],
+            vote_data['es_observado'], vote_data['estado_validacion'], vote_data['circuito_id'],
+            vote_data['es_anulado'],
+        )
+        _, lastrowid = execute_prepared(connection, query, params)
+        return lastrowid
+    
+    @staticmethod
+    def reserve_comprobante(connection: mysql.connector.MySQLConnection, circuito_id: int, credencial: str) -> Optional[Dict]:
+        """Reservar el siguiente comprobante del circuito y leer la autorización del votante
+        
+        Devuelve ultimo_numero y de la autorización circuito_id y es_autorizacion_especial,
+        o None si el circuito no tiene secuencia (se crea con el circuito, ver
+        seed_comprobante_sequence). El UPDATE bloquea solo la fila de la secuencia
+        del circuito hasta el commit del voto.
+        """
+        update = "UPDATE secuencias_comprobante SET ultimo_numero = ultimo_numero + 1 WHERE circuito_id = %s"
+        execute_prepared(connection, update, (circuito_id,))
+        query = """
+        SELECT s.ultimo_numero, a.circuito_id, a.es_autorizacion_especial
+        FROM secuencias_comprobante s
+        JOIN autorizaciones a ON a.credencial = %s
+        WHERE s.circuito_id = %s
+        """
+        return execute_prepared(connection, query, (credencial, circuito_id), fetch='one', dictionary=True)
+    
+    @staticmethod
+    def reserve_comprobante_block(connection: mysql.connector.MySQLConnection, circuito_id: int, cantidad: int) -> Optional[int]:
+        """Reservar un bloque de comprobantes consecutivos del circuito; devuelve el primero (None sin secuencia)"""
+        update = "UPDATE secuencias_comprobante SET ultimo_numero = ultimo_numero + %s WHERE circuito_id = %s"
+        rowcount, _ = execute_prepared(connection, update, (cantidad, circuito_id))
+        if rowcount == 0:
+            return None
+        result = execute_prepared(
+            connection, "SELECT ultimo_numero FROM secuencias_comprobante WHERE circuito_id = %s", (circuito_id,), fetch='one'
+        )
+        return result[0] - cantidad + 1
+    
+    @staticmethod
+    def create_votes(connection: mysql.connector.MySQLConnection, votes: List[Dict]) -> None:
+        """Insertar varios votos en una sola sentencia (INSERT multi-fila de executemany)"""
         cursor = connection.cursor()
         try:
             query = """
             INSERT INTO votos (numero_comprobante, candidato_id, timestamp, es_observado, estado_validacion, circuito_id, es_anulado)
             VALUES (%(numero_comprobante)s, %(candidato_id)s, %(timestamp)s, %(es_observado)s, %(estado_validacion)s, %(circuito_id)s, %(es_anulado)s)
             """
-            cursor.execute(query, vote_data)
-            return cursor.lastrowid
+            cursor.executemany(query, votes)
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def seed_comprobante_sequence(connection: mysql.connector.MySQLConnection, circuito_id: int) -> None:
+        """Crear la secuencia del circuito a partir del último comprobante ya emitido
+        
+        Se llama al crear el circuito (o al preparar la base), nunca desde el voto.
+        El último se compara como número: C001-100000 va después de C001-99999.
+        """
+        cursor = connection.cursor()
+        try:
+            query = """
+            SELECT MAX(CAST(SUBSTRING_INDEX(numero_comprobante, '-', -1) AS UNSIGNED)) FROM votos 
+            WHERE circuito_id = %s AND numero_comprobante LIKE %s
+            """
+            cursor.execute(query, (circuito_id, f"C{circuito_id:03d}-%"))
+            result = cursor.fetchone()
+            ultimo_numero = int(result[0]) if result and result[0] else 0
+            # Si la secuencia ya existe se conserva
+            cursor.execute(
+                "INSERT IGNORE INTO secuencias_comprobante (circuito_id, ultimo_numero) VALUES (%s, %s)",
+                (circuito_id, ultimo_numero)
+            )
         finally:
             cursor.close()
     
+    @staticmethod
+    def seed_missing_sequences(connection: mysql.connector.MySQLConnection) -> int:
+        """Crear la secuencia de los circuitos que no la tienen; devuelve cuántos eran"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT c.id FROM circuitos c
+                LEFT JOIN secuencias_comprobante s ON s.circuito_id = c.id
+                WHERE s.circuito_id IS NULL
+            """)
+            circuito_ids = [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+        for circuito_id in circuito_ids:
+            VotoDAO.seed_comprobante_sequence(connection, circuito_id)
+        return len(circuito_ids)
+    
     @staticmethod
     def get_observed_votes(connection: mysql.connector.MySQLConnection, circuito_id: int) -> List[Dict]:
         """Obtener votos observados pendientes"""
@@ -46,12 +133,16 @@ class VotoDAO:
             cursor.close()
     
     @staticmethod
-    def update_vote_validation(connection: mysql.connector.MySQLConnection, voto_id: int, estado: str) -> bool:
-        """Actualizar estado de validación de voto observado"""
+    def update_vote_validation(connection: mysql.connector.MySQLConnection, voto_id: int, estado: str, estado_anterior: Optional[str] = None) -> bool:
+        """Actualizar estado de validación de voto observado (solo si sigue en estado_anterior, si se indica)"""
         cursor = connection.cursor()
         try:
-            query = "UPDATE votos SET estado_validacion = %s WHERE id = %s"
-            cursor.execute(query, (estado, voto_id))
+            if estado_anterior is not None:
+                query = "UPDATE votos SET estado_validacion = %s WHERE id = %s AND estado_validacion = %s"
+                cursor.execute(query, (estado, voto_id, estado_anterior))
+            else:
+                query = "UPDATE votos SET estado_validacion = %s WHERE id = %s"
+                cursor.execute(query, (estado, voto_id))
             return cursor.rowcount > 0
         finally:
             cursor.close()
@@ -65,4 +156,33 @@ class VotoDAO:
             cursor.execute(query, (voto_id,))
             return cursor.fetchone()
         finally:
-            cursor.close()
\ No newline at end of file
+            cursor.close()
+
+class AsyncVotoDAO:
+    """Variante asíncrona de VotoDAO para conexiones aiomysql"""
+    
+    @staticmethod
+    async def create_vote(connection, vote_data: Dict) -> int:
+        """Crear nuevo voto"""
+        async with connection.cursor() as cursor:
+            query = """
+            INSERT INTO votos (numero_comprobante, candidato_id, timestamp, es_observado, estado_validacion, circuito_id, es_anulado)
+            VALUES (%(numero_comprobante)s, %(candidato_id)s, %(timestamp)s, %(es_observado)s, %(estado_validacion)s, %(circuito_id)s, %(es_anulado)s)
+            """
+            await cursor.execute(query, vote_data)
+            return cursor.lastrowid
+    
+    @staticmethod
+    async def reserve_comprobante(connection, circuito_id: int, credencial: str) -> Optional[Dict]:
+        """Reservar el siguiente comprobante del circuito y leer la autorización del votante (None sin secuencia)"""
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            update = "UPDATE secuencias_comprobante SET ultimo_numero = ultimo_numero + 1 WHERE circuito_id = %s"
+            await cursor.execute(update, (circuito_id,))
+            query = """
+            SELECT s.ultimo_numero, a.circuito_id, a.es_autorizacion_especial
+            FROM secuencias_comprobante s
+            JOIN autorizaciones a ON a.credencial = %s
+            WHERE s.circuito_id = %s
+            """
+            await cursor.execute(query, (credencial, circuito_id))
+            return await cursor.fetchone()
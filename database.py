@@ -1,15 +1,43 @@
 from dotenv import load_dotenv
-import mysql.connector.pooling
+import mysql.connector
 import os
-from contextlib import contextmanager
-from typing import Generator
+import functools
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from contextlib import contextmanager, asynccontextmanager
+from typing import Generator, AsyncGenerator, Callable, Dict, List, Optional
+import sqlite_backend
 load_dotenv()
 
+try:
+    import aiomysql
+except ImportError:  # El modo async es opcional, solo se necesita con DB_MODE=async
+    aiomysql = None
+
+# Cursor de diccionario para los DAO asíncronos (equivalente a cursor(dictionary=True))
+AsyncDictCursor = aiomysql.DictCursor if aiomysql else None
+# Cursor sin buffer del lado del servidor para lecturas largas (exportaciones)
+AsyncStreamCursor = aiomysql.SSCursor if aiomysql else None
+
+# Modo de acceso a datos: 'sync' (mysql.connector) o 'async' (aiomysql)
+DB_MODE = os.getenv('DB_MODE', 'sync').lower()
+ASYNC_DB_ENABLED = DB_MODE == 'async'
+
+# Motor de base de datos: 'mysql' (producción) o 'sqlite' (embebido, para
+# benchmarks y pruebas de carga locales sin servidor MySQL)
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()
+SQLITE_PATH = os.getenv('DB_SQLITE_PATH', 'voting_db.sqlite3')
+
 # Configuración del pool de conexiones
 POOL_CONFIG = {
     'pool_name': 'voting_pool',
     'pool_size': 10,
-    'pool_reset_session': True,
+    # El pool propio solo hace rollback si quedó una transacción abierta,
+    # sin el COM_RESET_CONNECTION de cada devolución
+    'pool_reset_session': False,
     'host': os.getenv('DB_HOST', 'localhost'),
     'port': int(os.getenv('DB_PORT', '3306')),
     'user': os.getenv('DB_USER', 'user'),
@@ -19,34 +47,576 @@ POOL_CONFIG = {
     'autocommit': False
 }
 
-# Pool global de conexiones
+# Límites y comportamiento del pool (ver ConnectionPool)
+POOL_LIMITS = {
+    'min_size': int(os.getenv('DB_POOL_MIN', str(POOL_CONFIG['pool_size']))),
+    'max_size': int(os.getenv('DB_POOL_MAX', str(POOL_CONFIG['pool_size']))),
+    'checkout_timeout': float(os.getenv('DB_POOL_TIMEOUT', '5')),
+    'adaptive': os.getenv('DB_POOL_ADAPTIVE', 'false').lower() == 'true',
+    'grow_wait_ms': float(os.getenv('DB_POOL_GROW_WAIT_MS', '50')),
+    'shrink_idle_s': float(os.getenv('DB_POOL_SHRINK_IDLE_S', '60')),
+    'ping_idle_s': float(os.getenv('DB_POOL_PING_IDLE_S', '30')),
+    # Sentencias preparadas que se mantienen por conexión (0 = desactivado)
+    # (sqlite3 ya cachea sus sentencias, el caché propio es solo para MySQL)
+    'stmt_cache_size': int(os.getenv('DB_STMT_CACHE_SIZE', '32' if DB_BACKEND == 'mysql' else '0')),
+}
+
+# Bulkheads: cada clase de carga tiene su propio pool en el primario, así una
+# tormenta de consultas de resultados o una carga masiva no deja sin conexiones
+# a la votación. Los servicios declaran su clase con @workload(...).
+WORKLOADS = {
+    'votacion': {'pool_name': POOL_CONFIG['pool_name'], 'size': POOL_CONFIG['pool_size'], 'timeout': 5},
+    'lectura': {'pool_name': 'lectura_pool', 'size': 5, 'timeout': 2},
+    'admin': {'pool_name': 'admin_pool', 'size': 3, 'timeout': 30},
+}
+# Clase usada por los servicios que no declaran ninguna
+DEFAULT_WORKLOAD = 'admin'
+
+def workload_limits(workload: str) -> Dict:
+    """Límites del pool de una clase (DB_POOL_<CLASE>_SIZE / _MIN / _MAX / _TIMEOUT)"""
+    config = WORKLOADS[workload]
+    prefix = f"DB_POOL_{workload.upper()}"
+    if workload == 'votacion':
+        # Compatibilidad con DB_POOL_MIN / DB_POOL_MAX / DB_POOL_TIMEOUT
+        return dict(POOL_LIMITS)
+    size = int(os.getenv(f"{prefix}_SIZE", str(config['size'])))
+    return dict(
+        POOL_LIMITS,
+        min_size=int(os.getenv(f"{prefix}_MIN", str(size))),
+        max_size=int(os.getenv(f"{prefix}_MAX", str(size))),
+        checkout_timeout=float(os.getenv(f"{prefix}_TIMEOUT", str(config['timeout']))),
+    )
+
+# Réplicas de lectura: DB_REPLICA_HOSTS=host1:3306,host2:3306 (mismo usuario y base
+# salvo DB_REPLICA_USER / DB_REPLICA_PASSWORD)
+REPLICA_HOSTS = [h.strip() for h in os.getenv('DB_REPLICA_HOSTS', '').split(',') if h.strip()]
+REPLICA_POOL_SIZE = int(os.getenv('DB_REPLICA_POOL_SIZE', str(POOL_CONFIG['pool_size'])))
+# Segundos que una réplica que falló queda fuera de la rotación
+REPLICA_RETRY_S = float(os.getenv('DB_REPLICA_RETRY_S', '10'))
+
+# Configuración del pool asíncrono (aiomysql)
+ASYNC_POOL_CONFIG = {
+    'minsize': int(os.getenv('DB_ASYNC_POOL_MIN', '1')),
+    'maxsize': int(os.getenv('DB_ASYNC_POOL_SIZE', '20')),
+    'host': POOL_CONFIG['host'],
+    'port': POOL_CONFIG['port'],
+    'user': POOL_CONFIG['user'],
+    'password': POOL_CONFIG['password'],
+    'db': POOL_CONFIG['database'],
+    'charset': POOL_CONFIG['charset'],
+    # Las lecturas no abren transacción; get_async_db_transaction hace BEGIN explícito
+    'autocommit': True
+}
+
+# Pool global de conexiones (votación) y pools con nombre (clases de carga + réplicas)
 _connection_pool = None
+_async_pool = None
+_pools: Dict[str, "ConnectionPool"] = {}
+_workload_pools: Dict[str, "ConnectionPool"] = {}
+_current_workload: ContextVar[str] = ContextVar('db_workload', default=DEFAULT_WORKLOAD)
+_replica_pools: List["ConnectionPool"] = []
+_replica_down_until: Dict[str, float] = {}
+_replica_turn = itertools.count()
+
+class PoolTimeoutError(mysql.connector.errors.PoolError):
+    """No se obtuvo una conexión antes del deadline del checkout"""
+
+# Marca para un waiter que recibe un slot libre y debe abrir su propia conexión
+_NEW_SLOT = object()
+
+class _Waiter:
+    """Petición en la cola FIFO del pool"""
+    __slots__ = ('event', 'connection')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.connection = None
+
+class PreparedStatementCache:
+    """Caché LRU de sentencias preparadas (cursor(prepared=True)) de una conexión
+    
+    Cada sentencia conserva su cursor preparado, así MySQL la parsea una sola vez
+    por conexión. Si la conexión se reconecta (cambia connection_id) las sentencias
+    del servidor se pierden y el caché se vacía.
+    """
+
+    def __init__(self, connection, max_size: int):
+        self._connection = connection
+        self.max_size = max_size
+        self.connection_id = getattr(connection, 'connection_id', None)
+        self._cursors = OrderedDict()  # (sql, dictionary) -> (sql, cursor)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def execute(self, sql: str, params, dictionary: bool = False):
+        """Ejecutar la sentencia con su cursor preparado (lo crea si no está)"""
+        if self.connection_id != getattr(self._connection, 'connection_id', None):
+            self.clear()
+            self.invalidations += 1
+            self.connection_id = getattr(self._connection, 'connection_id', None)
+        key = (sql, dictionary)
+        entry = self._cursors.get(key)
+        if entry is not None:
+            self._cursors.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = (sql, self._connection.cursor(prepared=True, dictionary=dictionary))
+            self._cursors[key] = entry
+            if len(self._cursors) > self.max_size:
+                _, (_, oldest) = self._cursors.popitem(last=False)
+                self.evictions += 1
+                self._close_cursor(oldest)
+        # El cursor solo reutiliza la sentencia si recibe el mismo objeto str
+        cached_sql, cursor = entry
+        try:
+            cursor.execute(cached_sql, params)
+        except mysql.connector.Error:
+            self.discard(sql, dictionary)
+            raise
+        return cursor
+
+    def discard(self, sql: str, dictionary: bool = False):
+        """Descartar una sentencia (por ejemplo tras un error)"""
+        entry = self._cursors.pop((sql, dictionary), None)
+        if entry is not None:
+            self._close_cursor(entry[1])
+
+    def clear(self):
+        """Descartar todas las sentencias (reconexión o cierre)"""
+        cursors, self._cursors = list(self._cursors.values()), OrderedDict()
+        for _, cursor in cursors:
+            self._close_cursor(cursor)
+
+    @staticmethod
+    def _close_cursor(cursor):
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+class PooledConnection:
+    """Conexión prestada por ConnectionPool; close() la devuelve al pool"""
+
+    def __init__(self, pool: "ConnectionPool", connection):
+        self._pool = pool
+        self._cnx = connection
+
+    def prepared_cache(self) -> Optional[PreparedStatementCache]:
+        """Caché de sentencias preparadas de esta conexión (None si está desactivado)"""
+        if self._cnx is None:
+            raise mysql.connector.errors.OperationalError("La conexión ya fue devuelta al pool")
+        return self._pool._cache_for(self._cnx)
+
+    def close(self):
+        """Devolver la conexión al pool (no cierra la conexión con MySQL)"""
+        if self._cnx is not None:
+            cnx, self._cnx = self._cnx, None
+            self._pool._release(cnx)
+
+    def __getattr__(self, name):
+        if self._cnx is None:
+            raise mysql.connector.errors.OperationalError("La conexión ya fue devuelta al pool")
+        return getattr(self._cnx, name)
+
+class ConnectionPool:
+    """Pool de conexiones con cola FIFO, deadline por checkout, métricas y tamaño adaptativo
+    
+    A diferencia de MySQLConnectionPool, cuando todas las conexiones están ocupadas
+    el checkout espera (en orden de llegada) hasta checkout_timeout en vez de fallar.
+    Con adaptive=True el límite crece hasta max_size si la espera promedio supera
+    grow_wait_ms y vuelve a min_size cuando sobran conexiones ociosas.
+    """
+
+    def __init__(self, name: str, connection_factory: Callable, min_size: int, max_size: int,
+                 checkout_timeout: float = 5.0, adaptive: bool = False, grow_wait_ms: float = 50.0,
+                 shrink_idle_s: float = 60.0, ping_idle_s: float = 30.0, stmt_cache_size: int = 0):
+        self.name = name
+        self._factory = connection_factory
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size)
+        self.checkout_timeout = checkout_timeout
+        self.adaptive = adaptive
+        self.grow_wait_ms = grow_wait_ms
+        self.shrink_idle_s = shrink_idle_s
+        self.ping_idle_s = ping_idle_s
+        self.stmt_cache_size = stmt_cache_size
+        self._stmt_caches: Dict[int, PreparedStatementCache] = {}
+        self._lock = threading.Lock()
+        self._idle = deque()  # (conexion, ultimo_uso)
+        self._waiters = deque()
+        self._size = 0
+        self._limit = min_size
+        self._in_use = 0
+        # Métricas
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._wait_ewma_ms = 0.0
+        self._last_wait_at = 0.0
+
+    def warm_up(self, count: Optional[int] = None):
+        """Abrir conexiones por adelantado (por defecto min_size)"""
+        for _ in range(min(count or self.min_size, self._limit)):
+            with self._lock:
+                if self._size >= self._limit:
+                    return
+                self._size += 1
+                self._in_use += 1
+            try:
+                connection = self._factory()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                    self._in_use -= 1
+                raise
+            self._release(connection)
+
+    def get_connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Obtener una conexión, esperando en orden FIFO hasta el deadline"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        waiter = None
+        create = False
+        with self._lock:
+            if self._idle and not self._waiters:
+                connection, last_used = self._idle.pop()
+            elif self._size < self._limit and not self._waiters:
+                self._size += 1
+                create = True
+                connection, last_used = None, None
+            else:
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+                self._hand_off_slot()
+            if waiter is None:
+                self._in_use += 1
+                self.checkouts += 1
+
+        if create:
+            return PooledConnection(self, self._open())
+        if waiter is None:
+            return PooledConnection(self, self._check_alive(connection, last_used))
+
+        # Esperar a que otro hilo nos entregue una conexión
+        start = time.perf_counter()
+        waiter.event.wait(timeout)
+        waited = time.perf_counter() - start
+        with self._lock:
+            if waiter.connection is None:
+                self._waiters.remove(waiter)
+                self.timeouts += 1
+                self._record_wait(waited)
+                self._maybe_grow()
+                raise PoolTimeoutError(
+                    f"Pool '{self.name}': sin conexiones libres tras {timeout:.1f}s "
+                    f"({self._in_use} en uso, {len(self._waiters)} esperando)"
+                )
+            self.checkouts += 1
+            self._record_wait(waited)
+            self._maybe_grow()
+        if waiter.connection is _NEW_SLOT:
+            return PooledConnection(self, self._open())
+        connection, last_used = waiter.connection
+        return PooledConnection(self, self._check_alive(connection, last_used))
+
+    def _open(self):
+        """Abrir una conexión nueva en un slot ya reservado"""
+        try:
+            return self._factory()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._in_use -= 1
+                self._hand_off_slot()
+            raise
+
+    def _check_alive(self, connection, last_used: Optional[float]):
+        """Verificar con ping solo las conexiones que estuvieron ociosas mucho tiempo"""
+        if last_used is not None and time.monotonic() - last_used > self.ping_idle_s:
+            try:
+                connection.ping(reconnect=True, attempts=1)
+            except Exception:
+                self._discard(connection)
+                raise
+        return connection
+
+    def _release(self, connection):
+        """Recibir una conexión devuelta y entregarla al primero de la cola"""
+        if getattr(connection, 'unread_result', False):
+            # Resultado sin leer (cursor sin buffer cortado): rollback leería todas las
+            # filas restantes; se cierra el socket y se libera el slot
+            self._discard(connection)
+            return
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except Exception:
+            self._discard(connection)
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._in_use = max(0, self._in_use - 1)
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.connection = (connection, now)
+                self._in_use += 1
+                waiter.event.set()
+                return
+            if self._size > self._limit:
+                self._size -= 1
+                extra = connection
+            else:
+                self._idle.append((connection, now))
+                extra = self._maybe_shrink(now)
+        if extra is not None:
+            self._close_quietly(extra)
+
+    def _discard(self, connection):
+        """Descartar una conexión rota liberando su slot"""
+        with self._lock:
+            self._size -= 1
+            self._in_use = max(0, self._in_use - 1)
+            self._hand_off_slot()
+        self._close_quietly(connection)
+
+    def _hand_off_slot(self):
+        """Si hay espera y quedó lugar, despertar al primero para que abra una conexión (con lock)"""
+        while self._waiters and self._size < self._limit:
+            waiter = self._waiters.popleft()
+            self._size += 1
+            self._in_use += 1
+            waiter.connection = _NEW_SLOT
+            waiter.event.set()
+
+    def _record_wait(self, waited: float):
+        """Acumular métricas de espera (con lock)"""
+        self.waits += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self._wait_ewma_ms = 0.8 * self._wait_ewma_ms + 0.2 * waited * 1000
+        self._last_wait_at = time.monotonic()
+
+    def _maybe_grow(self):
+        """Subir el límite si la espera observada supera el umbral (con lock)"""
+        if self.adaptive and self._limit < self.max_size and self._wait_ewma_ms > self.grow_wait_ms:
+            self._limit += 1
+            self._wait_ewma_ms = 0.0
+            print(f"Pool '{self.name}': límite ampliado a {self._limit}")
+            self._hand_off_slot()
+
+    def _maybe_shrink(self, now: float):
+        """Bajar el límite cuando no hubo esperas recientes y sobran ociosas (con lock)"""
+        if (self.adaptive and self._limit > self.min_size and len(self._idle) > 1
+                and now - self._last_wait_at > self.shrink_idle_s):
+            oldest, _ = self._idle.popleft()
+            self._limit -= 1
+            self._size -= 1
+            self._last_wait_at = now
+            print(f"Pool '{self.name}': límite reducido a {self._limit}")
+            return oldest
+        return None
+
+    def _cache_for(self, connection) -> Optional[PreparedStatementCache]:
+        """Caché de sentencias preparadas asociado a una conexión física"""
+        if self.stmt_cache_size <= 0:
+            return None
+        cache = self._stmt_caches.get(id(connection))
+        if cache is None:
+            cache = PreparedStatementCache(connection, self.stmt_cache_size)
+            with self._lock:
+                self._stmt_caches[id(connection)] = cache
+        return cache
+
+    def _close_quietly(self, connection):
+        """Cerrar una conexión física junto con sus sentencias preparadas"""
+        with self._lock:
+            cache = self._stmt_caches.pop(id(connection), None)
+        if cache is not None:
+            cache.clear()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict:
+        """Gauges y contadores del pool"""
+        with self._lock:
+            return {
+                "en_uso": self._in_use,
+                "ociosas": len(self._idle),
+                "abiertas": self._size,
+                "limite": self._limit,
+                "min": self.min_size,
+                "max": self.max_size,
+                "esperando": len(self._waiters),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_promedio_ms": round(self.wait_total / self.waits * 1000, 2) if self.waits else 0,
+                "espera_max_ms": round(self.wait_max * 1000, 2),
+                "sentencias_preparadas": {
+                    "hits": sum(c.hits for c in self._stmt_caches.values()),
+                    "misses": sum(c.misses for c in self._stmt_caches.values()),
+                    "evictions": sum(c.evictions for c in self._stmt_caches.values()),
+                    "invalidaciones": sum(c.invalidations for c in self._stmt_caches.values()),
+                },
+            }
+
+    def close_all(self):
+        """Cerrar las conexiones ociosas"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+def _mysql_connection_factory(config: Dict) -> Callable:
+    """Crear conexiones mysql.connector con la configuración del pool"""
+    connect_kwargs = {k: v for k, v in config.items() if not k.startswith('pool_')}
+    return lambda: mysql.connector.connect(**connect_kwargs)
+
+def _sqlite_connection_factory(config: Dict) -> Callable:
+    """Crear conexiones al archivo SQLite (DB_SQLITE_PATH); host y usuario no aplican"""
+    busy_timeout = POOL_LIMITS['checkout_timeout']
+    return lambda: sqlite_backend.connect(SQLITE_PATH, busy_timeout)
+
+# Backends disponibles: nombre -> constructor de la fábrica de conexiones del pool
+BACKENDS: Dict[str, Callable[[Dict], Callable]] = {
+    'mysql': _mysql_connection_factory,
+    'sqlite': _sqlite_connection_factory,
+}
+
+def _connection_factory(config: Dict) -> Callable:
+    """Fábrica de conexiones del backend configurado en DB_BACKEND"""
+    if DB_BACKEND not in BACKENDS:
+        raise ValueError(f"DB_BACKEND desconocido: {DB_BACKEND} (opciones: {', '.join(BACKENDS)})")
+    return BACKENDS[DB_BACKEND](config)
+
+def _replica_config(host_port: str) -> Dict:
+    """Configuración de conexión de una réplica a partir de 'host:puerto'"""
+    host, _, port = host_port.partition(':')
+    config = dict(POOL_CONFIG)
+    config.update({
+        'host': host,
+        'port': int(port or POOL_CONFIG['port']),
+        'user': os.getenv('DB_REPLICA_USER', POOL_CONFIG['user']),
+        'password': os.getenv('DB_REPLICA_PASSWORD', POOL_CONFIG['password']),
+    })
+    return config
+
+def _init_replica_pools():
+    """Crear un pool por réplica; una réplica caída no impide arrancar"""
+    if REPLICA_HOSTS and DB_BACKEND != 'mysql':
+        print(f"DB_REPLICA_HOSTS se ignora con DB_BACKEND={DB_BACKEND}")
+        return
+    for i, host_port in enumerate(REPLICA_HOSTS, start=1):
+        limits = dict(POOL_LIMITS, min_size=REPLICA_POOL_SIZE, max_size=max(REPLICA_POOL_SIZE, POOL_LIMITS['max_size']))
+        pool = ConnectionPool(f"replica_{i}", _mysql_connection_factory(_replica_config(host_port)), **limits)
+        try:
+            pool.warm_up()
+        except mysql.connector.Error as e:
+            _replica_down_until[pool.name] = time.monotonic() + REPLICA_RETRY_S
+            print(f"Réplica {host_port} no disponible al iniciar: {e}")
+        print(f"Réplica de lectura '{pool.name}': {host_port}")
+        _pools[pool.name] = pool
+        _replica_pools.append(pool)
+
+def _pick_replica() -> Optional["ConnectionPool"]:
+    """Elegir la réplica disponible con menos conexiones en uso (round robin ante empate)"""
+    now = time.monotonic()
+    start = next(_replica_turn) % len(_replica_pools)
+    candidates = [
+        pool for pool in _replica_pools[start:] + _replica_pools[:start]
+        if _replica_down_until.get(pool.name, 0) <= now
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda pool: pool.stats()['en_uso'])
+
+def workload(name: str):
+    """Declarar la clase de carga de un servicio; sus conexiones salen del pool de esa clase"""
+    if name not in WORKLOADS:
+        raise ValueError(f"Clase de carga desconocida: {name}")
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _current_workload.set(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current_workload.reset(token)
+        wrapper.workload = name
+        return wrapper
+    return decorator
 
 def init_connection_pool():
-    """Inicializar el pool de conexiones"""
+    """Inicializar los pools de conexiones"""
     global _connection_pool
     if _connection_pool is None:
         # mostrar configuración
+        print(f"DB_BACKEND: {DB_BACKEND}" + (f" ({SQLITE_PATH})" if DB_BACKEND == 'sqlite' else ""))
         print(f"DB_HOST: {os.getenv('DB_HOST', 'localhost')}")
         print(f"DB_PORT: {os.getenv('DB_PORT', '3306')}")
         print(f"DB_USER: {os.getenv('DB_USER', 'user')}")
         print(f"DB_NAME: {os.getenv('DB_NAME', 'voting_db')}")
         print(f"Pool config: {POOL_CONFIG}")
-        _connection_pool = mysql.connector.pooling.MySQLConnectionPool(**POOL_CONFIG)
+        factory = _connection_factory(POOL_CONFIG)
+        for name, config in WORKLOADS.items():
+            limits = workload_limits(name)
+            print(f"Pool '{config['pool_name']}' ({name}): {limits}")
+            pool = ConnectionPool(config['pool_name'], factory, **limits)
+            pool.warm_up()
+            _pools[pool.name] = pool
+            _workload_pools[name] = pool
+        _init_replica_pools()
+        _connection_pool = _workload_pools['votacion']
     return _connection_pool
 
-def get_connection():
-    """Obtener una conexión del pool"""
+def get_connection(timeout: Optional[float] = None, read_only: bool = False):
+    """Obtener una conexión del pool de la clase de carga actual (espera si está lleno)
+    
+    Con read_only=True se usa una réplica si hay configuradas; si la réplica
+    elegida no responde, la lectura cae al primario.
+    """
     if _connection_pool is None:
         init_connection_pool()
-    return _connection_pool.get_connection()
+    replica = _pick_replica() if read_only and _replica_pools else None
+    if replica is not None:
+        try:
+            return replica.get_connection(timeout)
+        except PoolTimeoutError:
+            raise
+        except mysql.connector.Error as e:
+            _replica_down_until[replica.name] = time.monotonic() + REPLICA_RETRY_S
+            print(f"Réplica '{replica.name}' no disponible, leyendo del primario: {e}")
+    return _workload_pools[_current_workload.get()].get_connection(timeout)
+
+def get_pool(name: str) -> Optional["ConnectionPool"]:
+    """Obtener un pool por nombre"""
+    if _connection_pool is None:
+        init_connection_pool()
+    return _pools.get(name)
+
+def get_pool_stats() -> Dict:
+    """Métricas de todos los pools de conexiones"""
+    return {name: pool.stats() for name, pool in _pools.items()}
+
+def open_connection():
+    """Conexión suelta al primario, fuera de los pools (p. ej. en los procesos de la auditoría)"""
+    return _connection_factory(POOL_CONFIG)()
 
 @contextmanager
-def get_db_connection() -> Generator[mysql.connector.MySQLConnection, None, None]:
-    """Context manager para manejar conexiones automáticamente"""
+def get_db_connection(read_only: bool = False) -> Generator[mysql.connector.MySQLConnection, None, None]:
+    """Context manager para manejar conexiones automáticamente
+    
+    read_only=True permite servir la consulta desde una réplica.
+    """
     connection = None
     try:
-        connection = get_connection()
+        connection = get_connection(read_only=read_only)
         yield connection
     except Exception as e:
         if connection:
@@ -70,4 +640,81 @@ def get_db_transaction() -> Generator[mysql.connector.MySQLConnection, None, Non
         raise e
     finally:
         if connection:
-            connection.close()
\ No newline at end of file
+            connection.close()
+
+def execute_prepared(connection, query: str, params=(), fetch: Optional[str] = None, dictionary: bool = False):
+    """Ejecutar una sentencia caliente usando el caché de sentencias preparadas de la conexión
+    
+    fetch='one' devuelve la primera fila (o None), fetch='all' todas las filas y sin
+    fetch devuelve (rowcount, lastrowid). Las conexiones fuera del pool o sin caché
+    usan un cursor normal. Los parámetros deben ser posicionales (%s).
+    """
+    cache = connection.prepared_cache() if isinstance(connection, PooledConnection) else None
+    if cache is not None:
+        cursor = cache.execute(query, params, dictionary)
+        return _fetch_result(cursor, fetch)
+    cursor = connection.cursor(dictionary=dictionary)
+    try:
+        cursor.execute(query, params)
+        return _fetch_result(cursor, fetch)
+    finally:
+        cursor.close()
+
+def _fetch_result(cursor, fetch: Optional[str]):
+    """Leer el resultado completo para dejar el cursor listo para reutilizarse"""
+    if fetch == 'one':
+        rows = cursor.fetchall()
+        return rows[0] if rows else None
+    if fetch == 'all':
+        return cursor.fetchall()
+    return cursor.rowcount, cursor.lastrowid
+
+async def init_async_connection_pool():
+    """Inicializar el pool de conexiones asíncrono"""
+    global _async_pool
+    if aiomysql is None:
+        raise RuntimeError("DB_MODE=async requiere el paquete aiomysql")
+    if DB_BACKEND != 'mysql':
+        raise RuntimeError("DB_MODE=async solo está disponible con DB_BACKEND=mysql")
+    if _async_pool is None:
+        print(f"Async pool config: minsize={ASYNC_POOL_CONFIG['minsize']}, maxsize={ASYNC_POOL_CONFIG['maxsize']}")
+        _async_pool = await aiomysql.create_pool(**ASYNC_POOL_CONFIG)
+    return _async_pool
+
+async def close_async_connection_pool():
+    """Cerrar el pool asíncrono liberando sus conexiones"""
+    global _async_pool
+    if _async_pool is not None:
+        _async_pool.close()
+        await _async_pool.wait_closed()
+        _async_pool = None
+
+@asynccontextmanager
+async def get_async_db_connection() -> AsyncGenerator["aiomysql.Connection", None]:
+    """Context manager asíncrono para manejar conexiones automáticamente"""
+    if _async_pool is None:
+        await init_async_connection_pool()
+    connection = await _async_pool.acquire()
+    try:
+        yield connection
+    except Exception as e:
+        await connection.rollback()
+        raise e
+    finally:
+        _async_pool.release(connection)
+
+@asynccontextmanager
+async def get_async_db_transaction() -> AsyncGenerator["aiomysql.Connection", None]:
+    """Context manager asíncrono para manejar transacciones automáticamente"""
+    if _async_pool is None:
+        await init_async_connection_pool()
+    connection = await _async_pool.acquire()
+    try:
+        await connection.begin()
+        yield connection
+        await connection.commit()
+    except Exception as e:
+        await connection.rollback()
+        raise e
+    finally:
+        _async_pool.release(connection)
@@ -2,6 +2,8 @@ from dotenv import load_dotenv
 from passlib.context import CryptContext
 from database import get_db_connection  # Importas tu pool
 import random
+from rebuild_conteos import rebuild_conteos
+from dao.voto_dao import VotoDAO
 
 load_dotenv()
 
@@ -121,12 +123,17 @@ def create_mock_data():
         )
         print("✓ Votos creados")
         
+        # 8. Secuencias de comprobantes a partir de los votos creados
+        VotoDAO.seed_missing_sequences(connection)
+        print("✓ Secuencias de comprobantes creadas")
+        
         connection.commit()
         print("🎉 Datos mock creados exitosamente!")
 
 def main():
     print("=== CREADOR DE DATOS MOCK ===")
     create_mock_data()
+    rebuild_conteos()
     print("Proceso completo.")
 
 if __name__ == "__main__":
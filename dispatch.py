@@ -0,0 +1,132 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+from database import workload_limits
+
+# Pool (clase de carga) que usa cada clase de ruta y la parte de ese pool que le
+# corresponde. Con los workers acotados al pool, las peticiones esperan en la cola
+# del executor en vez de fallar con "pool exhausted".
+EXECUTOR_SHARES = {
+    'votos': ('votacion', 0.4),
+    'autorizaciones': ('votacion', 0.4),
+    'auth': ('votacion', 0.2),
+    'resultados': ('lectura', 1.0),
+    # Solo abre la exportación (el archivo se envía fuera del executor); el tope de
+    # exportaciones en curso es RESULTS_EXPORT_MAX_CONCURRENT
+    'exportacion': ('lectura', 0.2),
+    'admin': ('admin', 1.0),
+}
+
+def _workers_for(clase: str) -> int:
+    """Cantidad de threads de una clase (EXECUTOR_<CLASE>_WORKERS o su parte del pool)"""
+    workload, share = EXECUTOR_SHARES[clase]
+    default = max(1, int(workload_limits(workload)['max_size'] * share))
+    return int(os.getenv(f'EXECUTOR_{clase.upper()}_WORKERS', str(default)))
+
+class ServiceExecutor:
+    """Executor acotado para una clase de ruta, con contadores de cola y espera"""
+
+    def __init__(self, nombre: str, max_workers: int):
+        self.nombre = nombre
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"svc-{nombre}")
+        self._lock = threading.Lock()
+        self.en_cola = 0
+        self.en_ejecucion = 0
+        self.completadas = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def _salir_de_cola(self, turno: list) -> bool:
+        """Descontar la tarea de en_cola una sola vez (al empezar o si se canceló antes); con el lock tomado"""
+        if turno[0]:
+            return False
+        turno[0] = True
+        self.en_cola -= 1
+        return True
+
+    def _wrap(self, func: Callable, encolado: float, turno: list) -> Callable:
+        """Envolver la función para registrar espera y ocupación"""
+        def tarea():
+            espera = time.perf_counter() - encolado
+            with self._lock:
+                self._salir_de_cola(turno)
+                self.en_ejecucion += 1
+                self.espera_total += espera
+                self.espera_max = max(self.espera_max, espera)
+            try:
+                return func()
+            finally:
+                with self._lock:
+                    self.en_ejecucion -= 1
+                    self.completadas += 1
+        return tarea
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Ejecutar un servicio síncrono en el executor sin bloquear el event loop"""
+        # turno[0]: la tarea ya salió de la cola (empezó o se canceló esperando)
+        turno = [False]
+        with self._lock:
+            self.en_cola += 1
+        tarea = self._wrap(functools.partial(func, *args, **kwargs), time.perf_counter(), turno)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, tarea)
+        finally:
+            # Cliente desconectado antes de que la tarea empiece: no va a correr
+            with self._lock:
+                self._salir_de_cola(turno)
+
+    def stats(self) -> Dict:
+        """Contadores del executor"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "en_cola": self.en_cola,
+                "en_ejecucion": self.en_ejecucion,
+                "completadas": self.completadas,
+                "espera_promedio_ms": round(self.espera_total / self.completadas * 1000, 2) if self.completadas else 0,
+                "espera_max_ms": round(self.espera_max * 1000, 2),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+_executors: Dict[str, ServiceExecutor] = {}
+_executors_lock = threading.Lock()
+
+def get_executor(clase: str) -> ServiceExecutor:
+    """Obtener (o crear) el executor de una clase de ruta"""
+    executor = _executors.get(clase)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(clase)
+            if executor is None:
+                executor = ServiceExecutor(clase, _workers_for(clase))
+                _executors[clase] = executor
+    return executor
+
+async def run_service(clase: str, func: Callable, *args, **kwargs):
+    """Despachar un servicio síncrono al executor de su clase de ruta
+
+    Un servicio con @workload debe ir a un executor de su mismo pool: los workers
+    de cada executor están dimensionados con el pool de su clase.
+    """
+    carga = getattr(func, 'workload', None)
+    if carga is not None and carga != EXECUTOR_SHARES[clase][0]:
+        raise ValueError(f"{func.__name__} usa el pool '{carga}' y no puede correr en el executor '{clase}'")
+    return await get_executor(clase).run(func, *args, **kwargs)
+
+def get_stats() -> Dict:
+    """Contadores de todos los executors creados"""
+    return {nombre: executor.stats() for nombre, executor in _executors.items()}
+
+def shutdown_executors():
+    """Esperar las tareas pendientes y liberar los threads"""
+    for executor in list(_executors.values()):
+        executor.shutdown()
+    _executors.clear()
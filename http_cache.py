@@ -0,0 +1,62 @@
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Cache-Control de las rutas públicas: resultados (cambian con cada voto) y
+# catálogo (elección activa, candidatos, departamentos)
+RESULTS_HTTP_MAX_AGE_S = int(os.getenv('RESULTS_HTTP_MAX_AGE_S', '1'))
+RESULTS_HTTP_SWR_S = int(os.getenv('RESULTS_HTTP_SWR_S', '10'))
+CATALOG_HTTP_MAX_AGE_S = int(os.getenv('CATALOG_HTTP_MAX_AGE_S', '60'))
+CATALOG_HTTP_SWR_S = int(os.getenv('CATALOG_HTTP_SWR_S', '300'))
+# Vida máxima de un ETag: las versiones son por worker y no ven las escrituras
+# hechas en otros, así que cada ETag vence aunque la versión local no cambie
+ETAG_WINDOW_S = float(os.getenv('ETAG_WINDOW_S', '30'))
+
+RESULTS_CACHE_CONTROL = f"public, max-age={RESULTS_HTTP_MAX_AGE_S}, stale-while-revalidate={RESULTS_HTTP_SWR_S}"
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_HTTP_MAX_AGE_S}, stale-while-revalidate={CATALOG_HTTP_SWR_S}"
+
+# Distingue los ETags de cada proceso: las versiones son contadores locales que
+# arrancan en 0, así que la misma versión en dos workers (o en un worker
+# reiniciado) no implica los mismos datos. Detrás de un balanceador el 304 solo
+# se da cuando el pedido vuelve al worker que emitió el ETag
+_EPOCH = uuid.uuid4().hex[:8]
+
+def version_etag(alcance: str, version) -> str:
+    """ETag débil a partir de la versión de los datos, el proceso y la ventana de tiempo"""
+    partes = version if isinstance(version, tuple) else (version,)
+    ventana = int(time.time() // ETAG_WINDOW_S)
+    return f'W/"{alcance}-{_EPOCH}-{".".join(str(p) for p in partes)}-{ventana}"'
+
+def _opaco(etag: str) -> str:
+    """Comparación débil: se ignora el prefijo W/"""
+    etag = etag.strip()
+    return etag[2:] if etag.startswith('W/') else etag
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True si el If-None-Match del cliente incluye el ETag actual"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return _opaco(etag) in {_opaco(candidato) for candidato in header.split(',')}
+
+async def conditional_get(request: Request, alcance: str, version, cache_control: str,
+                          build: Callable[[], Awaitable[Tuple[object, Optional[object]]]]) -> Response:
+    """Responder 304 sin calcular nada si el cliente tiene la versión actual
+
+    version se lee antes de llamar a build; build devuelve (contenido, versión del
+    contenido) y la versión del contenido puede ser anterior si salió de un caché
+    con atraso: el ETag se arma con esa para no marcar datos viejos como nuevos.
+    """
+    headers = {"Cache-Control": cache_control, "ETag": version_etag(alcance, version)}
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    contenido, version_contenido = await build()
+    if version_contenido is not None and version_contenido != version:
+        headers["ETag"] = version_etag(alcance, version_contenido)
+    return JSONResponse(content=jsonable_encoder(contenido), headers=headers)
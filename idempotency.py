@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import mysql.connector
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from database import get_db_transaction, workload
+from dao.idempotencia_dao import IdempotenciaDAO
+from dispatch import run_service
+
+# Respuestas por Idempotency-Key: 'memory' (LRU del proceso) o 'db' (tabla
+# claves_idempotencia compartida entre workers, con el LRU como caché delante)
+IDEMPOTENCY_STORE = os.getenv('IDEMPOTENCY_STORE', 'memory').lower()
+IDEMPOTENCY_TTL_S = float(os.getenv('IDEMPOTENCY_TTL_S', '86400'))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv('IDEMPOTENCY_MAX_KEYS', '10000'))
+IDEMPOTENCY_KEY_MAX_LEN = 128
+
+# Estados de una clave al empezar una petición
+NUEVA = 'nueva'
+EN_CURSO = 'en_curso'
+COMPLETA = 'completa'
+
+# Marca de petición en curso en el LRU
+_EN_CURSO = object()
+
+class MemoryIdempotencyStore:
+    """LRU acotado con vencimiento: clave -> (huella, (status_code, cuerpo) o en curso, expira)"""
+
+    def __init__(self, max_keys: int, ttl_s: float):
+        self.max_keys = max(1, max_keys)
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, clave: str, huella: str) -> Tuple[str, Optional[str], Optional[tuple]]:
+        """Reservar la clave o devolver su estado: (estado, huella guardada, respuesta)"""
+        ahora = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(clave)
+            if entry is not None and entry[2] > ahora:
+                self._entries.move_to_end(clave)
+                guardada, respuesta, _ = entry
+                if respuesta is _EN_CURSO:
+                    return EN_CURSO, guardada, None
+                return COMPLETA, guardada, respuesta
+            self._put(clave, (huella, _EN_CURSO, ahora + self.ttl_s))
+            return NUEVA, None, None
+
+    def lookup(self, clave: str) -> Optional[tuple]:
+        """Respuesta completa y vigente de la clave: (huella, respuesta) o None"""
+        with self._lock:
+            entry = self._entries.get(clave)
+        if entry is None or entry[1] is _EN_CURSO or entry[2] <= time.monotonic():
+            return None
+        return entry[0], entry[1]
+
+    def remember(self, clave: str, huella: str, respuesta: tuple, expira: float):
+        """Guardar una respuesta leída de otro store"""
+        with self._lock:
+            self._put(clave, (huella, respuesta, expira))
+
+    def complete(self, clave: str, huella: str, respuesta: tuple):
+        with self._lock:
+            self._put(clave, (huella, respuesta, time.monotonic() + self.ttl_s))
+
+    def abort(self, clave: str):
+        with self._lock:
+            entry = self._entries.get(clave)
+            if entry is not None and entry[1] is _EN_CURSO:
+                del self._entries[clave]
+
+    def _put(self, clave: str, entry: tuple):
+        self._entries[clave] = entry
+        self._entries.move_to_end(clave)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class DBIdempotencyStore:
+    """Claves en la tabla claves_idempotencia, con las respuestas completas cacheadas en el LRU"""
+
+    def __init__(self, cache: MemoryIdempotencyStore, ttl_s: float):
+        self.cache = cache
+        self.ttl_s = ttl_s
+
+    @workload('votacion')
+    def begin(self, clave: str, huella: str) -> Tuple[str, Optional[str], Optional[tuple]]:
+        cacheada = self.cache.lookup(clave)
+        if cacheada is not None:
+            return COMPLETA, cacheada[0], cacheada[1]
+        expira = datetime.now() + timedelta(seconds=self.ttl_s)
+        with get_db_transaction() as connection:
+            if IdempotenciaDAO.reserve(connection, clave, huella, expira):
+                return NUEVA, None, None
+            row = IdempotenciaDAO.get(connection, clave)
+        if row is None or row['status_code'] is None:
+            return EN_CURSO, row['huella'] if row else None, None
+        respuesta = (row['status_code'], json.loads(row['respuesta']))
+        restante = (row['expira'] - datetime.now()).total_seconds()
+        self.cache.remember(clave, row['huella'], respuesta, time.monotonic() + restante)
+        return COMPLETA, row['huella'], respuesta
+
+    @workload('votacion')
+    def complete(self, clave: str, huella: str, respuesta: tuple):
+        with get_db_transaction() as connection:
+            IdempotenciaDAO.save(connection, clave, respuesta[0], json.dumps(respuesta[1], ensure_ascii=False))
+        self.cache.complete(clave, huella, respuesta)
+
+    @workload('votacion')
+    def abort(self, clave: str):
+        with get_db_transaction() as connection:
+            IdempotenciaDAO.release(connection, clave)
+
+class IdempotencyStats:
+    """Contadores de aciertos y fallos del store"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.en_curso = 0
+        self.conflictos = 0
+        self.en_duda = 0
+
+    def incr(self, campo: str):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+_memory_store = MemoryIdempotencyStore(IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_TTL_S)
+_store = DBIdempotencyStore(_memory_store, IDEMPOTENCY_TTL_S) if IDEMPOTENCY_STORE == 'db' else _memory_store
+_stats = IdempotencyStats()
+# Desenlaces que se guardan después de que el cliente se desconectó
+_desenlaces_pendientes = set()
+
+async def _store_call(clase: str, func: Callable, *args):
+    """Las operaciones del store en base corren en el executor de la ruta"""
+    if _store is _memory_store:
+        return func(*args)
+    return await run_service(clase, func, *args)
+
+async def run_idempotent(idempotency_key: Optional[str], ruta: str, usuario: str, cuerpo, clase: str,
+                         call: Callable[[], Awaitable]):
+    """Ejecutar call una sola vez por Idempotency-Key y devolver su respuesta en los reintentos
+
+    La clave se separa por ruta y usuario de mesa. Se guardan las respuestas
+    exitosas y los errores 4xx; un 5xx o un error que asegura que no hubo escritura
+    liberan la clave para reintentar. Si el cliente se desconecta la operación
+    sigue y su respuesta se guarda al terminar; si su resultado es incierto la
+    clave queda en curso.
+    Reusar la clave con otro contenido responde 422; mientras la primera petición
+    sigue en curso, 409.
+    """
+    if not idempotency_key:
+        return await call()
+    if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LEN:
+        raise HTTPException(status_code=400, detail="Idempotency-Key demasiado larga")
+    clave = hashlib.sha256(f"{ruta}\0{usuario}\0{idempotency_key}".encode('utf-8')).hexdigest()
+    huella = hashlib.sha256(json.dumps(jsonable_encoder(cuerpo), sort_keys=True).encode('utf-8')).hexdigest()
+
+    estado, huella_guardada, respuesta = await _store_call(clase, _store.begin, clave, huella)
+    if estado != NUEVA:
+        if huella_guardada is not None and huella_guardada != huella:
+            _stats.incr('conflictos')
+            raise HTTPException(status_code=422, detail="Idempotency-Key reutilizada con otro contenido")
+        if estado == EN_CURSO:
+            _stats.incr('en_curso')
+            raise HTTPException(status_code=409, detail="Solicitud en curso, reintente en unos segundos",
+                                headers={"Retry-After": "1"})
+        _stats.incr('hits')
+        status_code, contenido = respuesta
+        return JSONResponse(status_code=status_code, content=contenido, headers={"Idempotent-Replayed": "true"})
+
+    _stats.incr('misses')
+    # La operación sigue aunque el cliente se desconecte: su resultado se guarda al terminar
+    tarea = asyncio.ensure_future(call())
+    try:
+        await asyncio.shield(tarea)
+    except asyncio.CancelledError:
+        if not tarea.done():
+            tarea.add_done_callback(lambda t: _guardar_luego(clase, clave, huella, t))
+            raise
+    except Exception:
+        # El desenlace se evalúa abajo
+        pass
+    await _guardar_desenlace(clase, clave, huella, tarea)
+    return tarea.result()
+
+def _sin_efecto(error: BaseException) -> bool:
+    """Si el error asegura que la operación no se aplicó (la transacción no llegó a commit)
+
+    Un 5xx propio, un pool sin conexiones libres o un error de datos rechazado
+    por la base; un error de conexión o cualquier otro puede llegar después del
+    commit.
+    """
+    if isinstance(error, HTTPException):
+        return True
+    return isinstance(error, (mysql.connector.errors.PoolError, mysql.connector.errors.IntegrityError,
+                              mysql.connector.errors.DataError, mysql.connector.errors.ProgrammingError))
+
+async def _guardar_desenlace(clase: str, clave: str, huella: str, tarea: asyncio.Future):
+    """Guardar la respuesta de la operación o liberar la clave si seguro no tuvo efecto
+
+    Si no se sabe si se aplicó, la clave queda en curso hasta vencer: los
+    reintentos reciben 409 en vez de repetir la operación.
+    """
+    if tarea.cancelled():
+        _stats.incr('en_duda')
+        return
+    error = tarea.exception()
+    if error is None:
+        await _store_call(clase, _store.complete, clave, huella, (200, jsonable_encoder(tarea.result())))
+    elif isinstance(error, HTTPException) and error.status_code < 500:
+        await _store_call(clase, _store.complete, clave, huella, (error.status_code, {"detail": error.detail}))
+    elif _sin_efecto(error):
+        await _store_call(clase, _store.abort, clave)
+    else:
+        _stats.incr('en_duda')
+        print(f"Idempotencia: resultado incierto, la clave queda en curso hasta vencer: {error!r}")
+
+def _guardar_luego(clase: str, clave: str, huella: str, tarea: asyncio.Future):
+    """Guardar el desenlace de una operación cuyo cliente ya se desconectó"""
+    pendiente = asyncio.ensure_future(_guardar_desenlace(clase, clave, huella, tarea))
+    _desenlaces_pendientes.add(pendiente)
+    pendiente.add_done_callback(_desenlaces_pendientes.discard)
+
+@workload('admin')
+def purge_expired() -> int:
+    """Borrar las claves vencidas de la tabla (IDEMPOTENCY_STORE=db)"""
+    with get_db_transaction() as connection:
+        return IdempotenciaDAO.purge_expired(connection)
+
+def get_stats() -> Dict:
+    """Aciertos, fallos y tamaño del store de idempotencia"""
+    consultas = _stats.hits + _stats.misses
+    return {
+        "store": IDEMPOTENCY_STORE,
+        "claves_en_memoria": len(_memory_store),
+        "max_claves": _memory_store.max_keys,
+        "ttl_s": IDEMPOTENCY_TTL_S,
+        "hits": _stats.hits,
+        "misses": _stats.misses,
+        "hit_ratio": round(_stats.hits / consultas, 3) if consultas else 0,
+        "en_curso": _stats.en_curso,
+        "conflictos": _stats.conflictos,
+        "en_duda": _stats.en_duda,
+    }
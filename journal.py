@@ -0,0 +1,220 @@
+import fcntl
+import glob
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# Journal local de votos para caídas de la base:
+# - 'off':      desactivado
+# - 'fallback': el voto va a la base y solo se journaliza si no hay conexión con
+#               ella; un pool saturado o un lock wait timeout responden 503
+# No hay modo que journalice siempre: confirmaría votos sin saber si la credencial
+# está HABILITADA y después los rechazaría al aplicarlos, con el votante ya ido
+JOURNAL_MODES = ('off', 'fallback')
+JOURNAL_MODE = os.getenv('VOTE_JOURNAL_MODE', 'off').lower()
+if JOURNAL_MODE not in JOURNAL_MODES:
+    raise ValueError(f"VOTE_JOURNAL_MODE desconocido: {JOURNAL_MODE} (opciones: {', '.join(JOURNAL_MODES)})")
+JOURNAL_DIR = os.getenv('VOTE_JOURNAL_DIR', 'journal')
+JOURNAL_REPLAY_INTERVAL_S = float(os.getenv('VOTE_JOURNAL_REPLAY_INTERVAL_S', '1'))
+
+# Cada registro: largo (4 bytes) + CRC32 del contenido (4 bytes) + JSON utf-8
+_HEADER = struct.Struct('>II')
+
+# Resultados posibles de aplicar una entrada
+APLICADO = 'aplicado'
+DUPLICADO = 'duplicado'
+RECHAZADO = 'rechazado'
+
+def read_entries(path: str, offset: int = 0) -> Iterator[Tuple[int, Dict]]:
+    """Leer las entradas completas desde offset; devuelve (offset_siguiente, entrada)
+
+    Un registro truncado o con CRC inválido al final (escritura cortada por una
+    caída) termina la lectura: nunca llegó a confirmarse al cliente.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            length, checksum = _HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            offset += _HEADER.size + length
+            yield offset, json.loads(payload)
+
+class VoteJournal:
+    """Archivo append-only por worker con fsync en cada entrada y replay idempotente
+
+    apply(entrada) debe devolver APLICADO, DUPLICADO o RECHAZADO y lanzar una
+    excepción si la base sigue sin responder (la entrada se reintenta después).
+    Las entradas rechazadas se copian a rechazados.jsonl para auditoría. El campo
+    key_field identifica entradas que no pueden repetirse mientras estén pendientes.
+    """
+
+    def __init__(self, directory: str, apply: Callable[[Dict], str], key_field: str, replay_interval_s: float = 1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, f"votos-{os.getpid()}.journal")
+        self._apply = apply
+        self.key_field = key_field
+        self.replay_interval_s = replay_interval_s
+        self._lock = threading.Lock()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        # El lock marca el archivo como vivo; un journal sin lock es de un worker caído
+        fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._size = os.fstat(self._fd).st_size
+        self._replayed = 0
+        self._pending_keys = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.escritas = 0
+        self.aplicadas = 0
+        self.duplicadas = 0
+        self.rechazadas = 0
+        self.fsync_total = 0.0
+        self.ultimo_error: Optional[str] = None
+
+    def append(self, entrada: Dict) -> bool:
+        """Escribir la entrada y hacer fsync; False si su clave ya está pendiente en este worker"""
+        payload = json.dumps(entrada, default=str, ensure_ascii=False).encode('utf-8')
+        record = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        key = entrada[self.key_field]
+        with self._lock:
+            if key in self._pending_keys:
+                return False
+            self._pending_keys.add(key)
+            inicio = time.perf_counter()
+            os.write(self._fd, record)
+            os.fdatasync(self._fd)
+            self.fsync_total += time.perf_counter() - inicio
+            self._size += len(record)
+            self.escritas += 1
+        return True
+
+    def start(self):
+        """Iniciar el replayer en segundo plano"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="journal-replay", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.replay_interval_s):
+            self.replay()
+
+    def replay(self):
+        """Aplicar las entradas pendientes del propio journal y de workers caídos"""
+        try:
+            self._replay_own()
+            for path in glob.glob(os.path.join(self.directory, "votos-*.journal")):
+                if path != self.path:
+                    self._replay_orphan(path)
+            self.ultimo_error = None
+        except Exception as e:
+            # La base sigue sin responder: se reintenta en la próxima pasada
+            self.ultimo_error = str(e)
+
+    def _replay_own(self):
+        with self._lock:
+            size = self._size
+        if self._replayed >= size:
+            return
+        for offset, entrada in read_entries(self.path, self._replayed):
+            if offset > size:
+                break
+            self._aplicar(entrada)
+            self._replayed = offset
+            with self._lock:
+                self._pending_keys.discard(entrada[self.key_field])
+        with self._lock:
+            # Todo aplicado y nada nuevo: vaciar el archivo
+            if self._replayed == self._size:
+                os.ftruncate(self._fd, 0)
+                self._size = 0
+                self._replayed = 0
+
+    def _replay_orphan(self, path: str):
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except FileNotFoundError:
+            return
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # El worker dueño sigue vivo
+            print(f"Journal huérfano {path}: aplicando entradas pendientes")
+            for _, entrada in read_entries(path):
+                self._aplicar(entrada)
+            os.unlink(path)
+        finally:
+            os.close(fd)
+
+    def _aplicar(self, entrada: Dict):
+        resultado = self._apply(entrada)
+        if resultado == APLICADO:
+            self.aplicadas += 1
+        elif resultado == DUPLICADO:
+            self.duplicadas += 1
+        else:
+            self.rechazadas += 1
+            print(f"Entrada de journal rechazada: {entrada}")
+            with open(os.path.join(self.directory, "rechazados.jsonl"), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entrada, default=str, ensure_ascii=False) + "\n")
+
+    def stats(self) -> Dict:
+        """Contadores del journal"""
+        with self._lock:
+            return {
+                "modo": JOURNAL_MODE,
+                "archivo": self.path,
+                "bytes_pendientes": self._size - self._replayed,
+                "escritas": self.escritas,
+                "aplicadas": self.aplicadas,
+                "duplicadas": self.duplicadas,
+                "rechazadas": self.rechazadas,
+                "fsync_promedio_ms": round(self.fsync_total / self.escritas * 1000, 3) if self.escritas else 0,
+                "ultimo_error": self.ultimo_error,
+            }
+
+    def close(self):
+        """Detener el replayer con una última pasada y cerrar el archivo"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.replay()
+        with self._lock:
+            empty = self._size == 0
+            os.close(self._fd)
+        if empty:
+            os.unlink(self.path)
+
+_journal: Optional[VoteJournal] = None
+_journal_lock = threading.Lock()
+
+def get_journal(apply: Callable[[Dict], str], key_field: str) -> VoteJournal:
+    """Obtener (o crear) el journal de este worker con su replayer en marcha"""
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                journal = VoteJournal(JOURNAL_DIR, apply, key_field, JOURNAL_REPLAY_INTERVAL_S)
+                journal.start()
+                _journal = journal
+    return _journal
+
+def get_stats() -> Dict:
+    """Contadores del journal (vacío si no se usó)"""
+    return _journal.stats() if _journal is not None else {}
+
+def close_journal():
+    """Aplicar lo pendiente y cerrar el journal del worker"""
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
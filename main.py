@@ -1,7 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
-from database import init_connection_pool
+from database import init_connection_pool, init_async_connection_pool, close_async_connection_pool, ASYNC_DB_ENABLED, PoolTimeoutError
+from dispatch import shutdown_executors
+from batch_writer import shutdown_writers
+from journal import JOURNAL_MODE, close_journal
+from idempotency import IDEMPOTENCY_STORE, purge_expired
+from results_stream import close_broadcaster
+from services import voto_service
 from routers import auth, votante, voto, candidato, resultado, mesa, credencial, admin, eleccion
 
 load_dotenv()
@@ -19,6 +26,32 @@ app.add_middleware(
 # Inicializar pool de conexiones
 init_connection_pool()
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """Pool saturado: responder 503 para que el cliente reintente"""
+    return JSONResponse(status_code=503, content={"detail": "Servicio saturado, reintente en unos segundos"}, headers={"Retry-After": "1"})
+
+@app.on_event("startup")
+async def startup_async_pool():
+    """Con DB_MODE=async las rutas calientes usan el pool aiomysql"""
+    if ASYNC_DB_ENABLED:
+        await init_async_connection_pool()
+    if JOURNAL_MODE != 'off':
+        # Al arrancar se aplican los journals que dejaron workers anteriores
+        voto_service.get_vote_journal()
+    if IDEMPOTENCY_STORE == 'db':
+        print(f"Claves de idempotencia vencidas borradas: {purge_expired()}")
+
+@app.on_event("shutdown")
+async def shutdown_async_pool():
+    await close_broadcaster()
+    await close_async_connection_pool()
+    shutdown_executors()
+    # Escribir los lotes de votos que quedaron en cola
+    shutdown_writers()
+    # Aplicar lo que quede en el journal local antes de salir
+    close_journal()
+
 # Incluir routers
 app.include_router(auth.router, prefix="/api/mesa", tags=["auth"])
 app.include_router(votante.router, prefix="/api/votantes", tags=["votante"])
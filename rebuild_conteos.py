@@ -0,0 +1,42 @@
+import argparse
+from dotenv import load_dotenv
+from database import init_connection_pool, get_db_transaction
+from dao.conteo_dao import ConteoDAO
+from dao.serie_dao import SerieDAO
+
+load_dotenv()
+
+def rebuild_conteos():
+    """Recalcular los contadores y las series por minuto desde votos y autorizaciones"""
+    with get_db_transaction() as connection:
+        filas = ConteoDAO.rebuild(connection)
+        series = SerieDAO.rebuild(connection)
+    print(f"✓ Conteos recalculados: {filas} filas")
+    print(f"✓ Series por minuto recalculadas: {series} filas")
+
+def verificar_conteos() -> bool:
+    """Comparar los resultados de los contadores con el recuento sobre las tablas crudas"""
+    import services.resultado_service as resultado_service
+    from services.resultado_service import compute_results
+    resultado_service.RESULTS_SOURCE = 'conteos'
+    conteos = compute_results()
+    resultado_service.RESULTS_SOURCE = 'votos'
+    votos = compute_results()
+    # Los empates de votos pueden salir en otro orden
+    for resultados in (conteos, votos):
+        resultados['resultados'] = sorted(resultados['resultados'], key=lambda r: (-r['votos'], r['candidato']))
+    diferencias = {k: (conteos[k], votos[k]) for k in conteos if conteos[k] != votos[k]}
+    if diferencias:
+        print(f"⚠️  Diferencias (conteos, votos): {diferencias}")
+    else:
+        print("✓ Conteos coinciden con el recuento de votos")
+    return not diferencias
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcular los contadores de resultados")
+    parser.add_argument("--verificar", action="store_true", help="solo comparar conteos con el recuento de votos")
+    args = parser.parse_args()
+    init_connection_pool()
+    if not args.verificar:
+        rebuild_conteos()
+    verificar_conteos()
@@ -0,0 +1,21 @@
+from dotenv import load_dotenv
+from database import init_connection_pool
+from journal import JOURNAL_DIR, close_journal
+from services.voto_service import get_vote_journal
+
+load_dotenv()
+
+def replay_journal():
+    """Aplicar los journals de votos de workers detenidos (VOTE_JOURNAL_DIR)"""
+    init_connection_pool()
+    print(f"Aplicando journals pendientes en {JOURNAL_DIR}...")
+    journal = get_vote_journal()
+    journal.replay()
+    stats = journal.stats()
+    close_journal()
+    if stats["ultimo_error"]:
+        print(f"⚠️  La base no respondió: {stats['ultimo_error']}")
+    print(f"Aplicadas: {stats['aplicadas']}, duplicadas: {stats['duplicadas']}, rechazadas: {stats['rechazadas']}")
+
+if __name__ == "__main__":
+    replay_journal()
@@ -0,0 +1,254 @@
+import csv
+import io
+import json
+import os
+import threading
+import zlib
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Iterator, Optional, Sequence
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet es opcional, solo se necesita con format=parquet
+    pyarrow = None
+
+# Exportación completa de resultados (GET /api/resultados/export):
+# - RESULTS_EXPORT_CHUNK_ROWS:     filas leídas del cursor por vez (y por parte enviada)
+# - RESULTS_EXPORT_ROW_GROUP:      filas por row group de Parquet
+# - RESULTS_EXPORT_MAX_CONCURRENT: exportaciones simultáneas por worker (cada una ocupa una conexión
+#                                  del pool de lectura o de una réplica mientras dura la descarga)
+RESULTS_EXPORT_CHUNK_ROWS = int(os.getenv('RESULTS_EXPORT_CHUNK_ROWS', '5000'))
+RESULTS_EXPORT_ROW_GROUP = int(os.getenv('RESULTS_EXPORT_ROW_GROUP', '100000'))
+RESULTS_EXPORT_MAX_CONCURRENT = int(os.getenv('RESULTS_EXPORT_MAX_CONCURRENT', '2'))
+
+FORMATOS = ('csv', 'ndjson', 'parquet')
+PARQUET_DISPONIBLE = pyarrow is not None
+
+_MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+_slots = threading.BoundedSemaphore(max(1, RESULTS_EXPORT_MAX_CONCURRENT))
+
+def acquire_slot() -> bool:
+    """Tomar un lugar para exportar sin esperar; False si ya hay RESULTS_EXPORT_MAX_CONCURRENT en curso"""
+    return _slots.acquire(blocking=False)
+
+def release_slot():
+    _slots.release()
+
+def media_type(formato: str, comprimir: bool) -> str:
+    return 'application/gzip' if comprimir else _MEDIA_TYPES[formato]
+
+def filename(formato: str, comprimir: bool, año) -> str:
+    return f"resultados-{año}.{formato}" + (".gz" if comprimir else "")
+
+class _CSV:
+    def __init__(self, columnas: Sequence[str]):
+        self._columnas = columnas
+        self._encabezado = True
+
+    def encode(self, filas: list) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        if self._encabezado:
+            writer.writerow(self._columnas)
+            self._encabezado = False
+        writer.writerows(filas)
+        return buffer.getvalue().encode('utf-8')
+
+    def finish(self) -> bytes:
+        # Sin filas igual sale el encabezado
+        return self.encode([]) if self._encabezado else b''
+
+def _json_default(valor):
+    # SUM() de MySQL devuelve Decimal
+    if isinstance(valor, Decimal) and valor == valor.to_integral_value():
+        return int(valor)
+    return str(valor)
+
+class _NDJSON:
+    def __init__(self, columnas: Sequence[str]):
+        self._columnas = columnas
+
+    def encode(self, filas: list) -> bytes:
+        return "".join(
+            json.dumps(dict(zip(self._columnas, fila)), ensure_ascii=False, separators=(',', ':'), default=_json_default) + "\n"
+            for fila in filas
+        ).encode('utf-8')
+
+    def finish(self) -> bytes:
+        return b''
+
+# Columnas enteras de la exportación; el resto va como texto
+_ENTERAS = ('candidato_id', 'cantidad')
+
+def _columna_parquet(nombre: str, valores):
+    if nombre in _ENTERAS:
+        return pyarrow.array([None if v is None else int(v) for v in valores], pyarrow.int64())
+    return pyarrow.array([None if v is None else str(v) for v in valores], pyarrow.string())
+
+class _Sumidero(io.RawIOBase):
+    """Archivo de solo escritura que entrega lo escrito en cada take()"""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, datos) -> int:
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self) -> int:
+        return self._posicion
+
+    def take(self) -> bytes:
+        datos, self._partes = b"".join(self._partes), []
+        return datos
+
+class _Parquet:
+    """Parquet por row groups: cada uno se envía apenas se escribe"""
+
+    def __init__(self, columnas: Sequence[str]):
+        self._columnas = columnas
+        self._filas = []
+        self._sumidero = _Sumidero()
+        self._writer = None
+
+    def _escribir(self):
+        columnas = list(zip(*self._filas)) if self._filas else [() for _ in self._columnas]
+        tabla = pyarrow.table({
+            nombre: _columna_parquet(nombre, valores) for nombre, valores in zip(self._columnas, columnas)
+        })
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self._sumidero, tabla.schema, compression='zstd')
+        self._writer.write_table(tabla)
+        self._filas = []
+
+    def encode(self, filas: list) -> bytes:
+        self._filas.extend(filas)
+        if len(self._filas) >= RESULTS_EXPORT_ROW_GROUP:
+            self._escribir()
+        return self._sumidero.take()
+
+    def finish(self) -> bytes:
+        if self._filas or self._writer is None:
+            self._escribir()
+        self._writer.close()
+        return self._sumidero.take()
+
+class _Gzip:
+    """Comprimir la salida de otro codificador a medida que se produce"""
+
+    def __init__(self, codificador):
+        self._codificador = codificador
+        self._zlib = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def encode(self, filas: list) -> bytes:
+        return self._zlib.compress(self._codificador.encode(filas))
+
+    def finish(self) -> bytes:
+        return self._zlib.compress(self._codificador.finish()) + self._zlib.flush()
+
+_CODIFICADORES = {'csv': _CSV, 'ndjson': _NDJSON, 'parquet': _Parquet}
+
+def encoder(formato: str, columnas: Sequence[str], comprimir: bool = False):
+    """Codificador con encode(filas) -> bytes y finish() -> bytes"""
+    if formato == 'parquet' and pyarrow is None:
+        raise RuntimeError("format=parquet requiere el paquete pyarrow")
+    codificador = _CODIFICADORES[formato](columnas)
+    return _Gzip(codificador) if comprimir else codificador
+
+class ExportStream:
+    """Iterador de las partes del archivo a partir de los lotes de filas de un cursor
+
+    cerrar() libera el cursor, la conexión y el lugar de exportación; se llama al
+    terminar, si falla a mitad de camino o si la respuesta se descarta sin recorrerla.
+    """
+
+    def __init__(self, codificador, lotes: Iterator[list], cerrar: Callable[[], None]):
+        self._codificador = codificador
+        self._lotes = lotes
+        self._cerrar: Optional[Callable[[], None]] = cerrar
+        self._partes = self._generar()
+
+    def _generar(self) -> Iterator[bytes]:
+        try:
+            for filas in self._lotes:
+                datos = self._codificador.encode(filas)
+                if datos:
+                    yield datos
+            datos = self._codificador.finish()
+            if datos:
+                yield datos
+        finally:
+            self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self._partes)
+
+    def close(self):
+        cerrar, self._cerrar = self._cerrar, None
+        if cerrar is not None:
+            cerrar()
+
+    def __del__(self):
+        self.close()
+
+class AsyncExportStream:
+    """Variante de ExportStream para cursores de aiomysql (DB_MODE=async)"""
+
+    def __init__(self, codificador, lotes: AsyncIterator[list], cerrar: Callable):
+        self._codificador = codificador
+        self._lotes = lotes
+        self._cerrar: Optional[Callable] = cerrar
+        self._partes = self._generar()
+
+    async def _generar(self) -> AsyncIterator[bytes]:
+        try:
+            async for filas in self._lotes:
+                datos = self._codificador.encode(filas)
+                if datos:
+                    yield datos
+            datos = self._codificador.finish()
+            if datos:
+                yield datos
+        finally:
+            await self.aclose()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        return await self._partes.__anext__()
+
+    async def aclose(self):
+        cerrar, self._cerrar = self._cerrar, None
+        if cerrar is not None:
+            await cerrar()
+
+def fetch_batches(cursor, size: int) -> Iterator[list]:
+    """Lotes de filas de un cursor sin buffer (ninguno sin cursor)"""
+    while cursor is not None:
+        filas = cursor.fetchmany(size)
+        if not filas:
+            return
+        yield filas
+
+async def fetch_batches_async(cursor, size: int) -> AsyncIterator[list]:
+    """Lotes de filas de un SSCursor de aiomysql (ninguno sin cursor)"""
+    while cursor is not None:
+        filas = await cursor.fetchmany(size)
+        if not filas:
+            return
+        yield filas
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+# Stream de resultados en vivo (GET /api/resultados/stream, Server-Sent Events):
+# un solo cálculo por tick y por worker, repartido a todos los suscriptores
+RESULTS_STREAM_INTERVAL_S = float(os.getenv('RESULTS_STREAM_INTERVAL_S', '1'))
+# Eventos recientes guardados para retomar con Last-Event-ID
+RESULTS_STREAM_HISTORY = int(os.getenv('RESULTS_STREAM_HISTORY', '600'))
+# Eventos en cola por suscriptor; un cliente más lento se resincroniza con un snapshot
+RESULTS_STREAM_QUEUE = int(os.getenv('RESULTS_STREAM_QUEUE', '16'))
+RESULTS_STREAM_HEARTBEAT_S = float(os.getenv('RESULTS_STREAM_HEARTBEAT_S', '15'))
+
+# Milisegundos que espera EventSource antes de reconectar
+_RETRY_MS = 3000
+
+def _evento(event_id: str, tipo: str, datos: Dict, retry: bool = False) -> bytes:
+    """Codificar un evento SSE (una vez por tick, compartido por todos los suscriptores)"""
+    payload = json.dumps(datos, ensure_ascii=False, separators=(',', ':'), default=str)
+    prefijo = f"retry: {_RETRY_MS}\n" if retry else ""
+    return f"{prefijo}id: {event_id}\nevent: {tipo}\ndata: {payload}\n\n".encode('utf-8')
+
+def _diff_alcance(anterior: Dict, actual: Dict) -> Dict:
+    """Cifras de un alcance (nacional o departamento) que cambiaron"""
+    return {campo: valor for campo, valor in actual.items() if anterior.get(campo) != valor}
+
+def diff_snapshots(anterior: Dict, actual: Dict) -> Dict:
+    """Cambios entre dos snapshots {"nacional": ..., "departamentos": {nombre: ...}}
+
+    Un departamento que desaparece (elección nueva) se informa con None.
+    """
+    cambios = {}
+    nacional = _diff_alcance(anterior['nacional'], actual['nacional'])
+    if nacional:
+        cambios['nacional'] = nacional
+    departamentos = {}
+    for nombre, resultados in actual['departamentos'].items():
+        diff = _diff_alcance(anterior['departamentos'].get(nombre, {}), resultados)
+        if diff:
+            departamentos[nombre] = diff
+    for nombre in anterior['departamentos'].keys() - actual['departamentos'].keys():
+        departamentos[nombre] = None
+    if departamentos:
+        cambios['departamentos'] = departamentos
+    return cambios
+
+class _Suscriptor:
+    def __init__(self, queue_size: int):
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=queue_size)
+
+class ResultsBroadcaster:
+    """Calcula el snapshot de resultados por tick y reparte solo las cifras que cambiaron
+
+    compute() devuelve {"nacional": resultados, "departamentos": {nombre: resultados}}.
+    Cada evento lleva id '<época>-<secuencia>'; la época cambia con cada worker, así
+    un Last-Event-ID de otro worker (o de antes de un reinicio) recibe un snapshot
+    completo en vez de cambios que no le corresponden. El tick solo corre mientras
+    haya suscriptores.
+    """
+
+    def __init__(self, compute: Callable[[], Awaitable[Dict]], interval_s: float = 1.0,
+                 history: int = 600, queue_size: int = 16):
+        self._compute = compute
+        self.interval_s = interval_s
+        self.queue_size = queue_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self._snapshot: Optional[Dict] = None
+        self._snapshot_evento: Optional[tuple] = None
+        self._history: deque = deque(maxlen=max(1, history))
+        self._suscriptores = set()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.ticks = 0
+        self.eventos = 0
+        self.resincronizados = 0
+        self.tick_total = 0.0
+        self.ultimo_error: Optional[str] = None
+
+    def _id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    async def _tick(self):
+        """Calcular el snapshot y repartir los cambios"""
+        inicio = time.perf_counter()
+        try:
+            actual = await self._compute()
+            self.ultimo_error = None
+        except Exception as e:
+            # Se conserva el último snapshot; se reintenta en el próximo tick
+            self.ultimo_error = str(e)
+            print(f"Stream de resultados: error calculando snapshot: {e}")
+            return
+        finally:
+            self.ticks += 1
+            self.tick_total += time.perf_counter() - inicio
+        if self._snapshot is None:
+            self._snapshot = actual
+            return
+        cambios = diff_snapshots(self._snapshot, actual)
+        self._snapshot = actual
+        if not cambios:
+            return
+        self.seq += 1
+        self.eventos += 1
+        evento = _evento(self._id(self.seq), 'cambios', dict(cambios, seq=self.seq))
+        self._history.append((self.seq, evento))
+        for suscriptor in list(self._suscriptores):
+            self._entregar(suscriptor, evento)
+
+    def _entregar(self, suscriptor: _Suscriptor, evento: bytes):
+        try:
+            suscriptor.queue.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente lento: se descarta lo encolado y se le manda el estado completo
+            while not suscriptor.queue.empty():
+                suscriptor.queue.get_nowait()
+            suscriptor.queue.put_nowait(self._evento_snapshot())
+            self.resincronizados += 1
+
+    def _evento_snapshot(self) -> bytes:
+        """Evento con el snapshot completo, codificado una vez por secuencia"""
+        if self._snapshot_evento is None or self._snapshot_evento[0] != self.seq:
+            datos = dict(self._snapshot, seq=self.seq)
+            self._snapshot_evento = (self.seq, _evento(self._id(self.seq), 'snapshot', datos, retry=True))
+        return self._snapshot_evento[1]
+
+    def _pendientes(self, last_event_id: Optional[str]) -> list:
+        """Eventos para un cliente nuevo: los perdidos desde last_event_id o un snapshot"""
+        if last_event_id:
+            epoch, _, seq = last_event_id.partition('-')
+            if epoch == self.epoch and seq.isdigit():
+                desde = int(seq)
+                if desde == self.seq:
+                    return []
+                if self._history and desde >= self._history[0][0] - 1 and desde < self.seq:
+                    return [evento for s, evento in self._history if s > desde]
+        return [self._evento_snapshot()]
+
+    async def ensure_snapshot(self) -> bool:
+        """Calcular el primer snapshot si no hay; False si la base no respondió"""
+        async with self._lock:
+            if self._snapshot is None:
+                await self._tick()
+            return self._snapshot is not None
+
+    async def subscribe(self, last_event_id: Optional[str] = None) -> _Suscriptor:
+        """Registrar un suscriptor con sus eventos iniciales y arrancar el tick si hace falta"""
+        async with self._lock:
+            # Dentro del lock: el tick pudo quedar sin suscriptores y descartar el snapshot
+            if self._snapshot is None:
+                await self._tick()
+            if self._snapshot is None:
+                raise RuntimeError(self.ultimo_error or "snapshot de resultados no disponible")
+            suscriptor = _Suscriptor(self.queue_size)
+            for evento in self._pendientes(last_event_id):
+                self._entregar(suscriptor, evento)
+            self._suscriptores.add(suscriptor)
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._run())
+        return suscriptor
+
+    def unsubscribe(self, suscriptor: _Suscriptor):
+        self._suscriptores.discard(suscriptor)
+
+    async def _run(self):
+        while self._suscriptores:
+            await asyncio.sleep(self.interval_s)
+            await self._tick()
+        # Sin suscriptores el snapshot envejece: el próximo se calcula de nuevo y
+        # quien reconecte recibe el estado completo (hubo cambios sin evento). Se
+        # avanza la secuencia para que el último id entregado ya no sea el actual
+        self.seq += 1
+        self._snapshot = None
+        self._snapshot_evento = None
+        self._history.clear()
+
+    async def stream(self, last_event_id: Optional[str] = None, heartbeat_s: float = 15.0) -> AsyncIterator[bytes]:
+        """Eventos SSE de un suscriptor; un comentario cada heartbeat_s mantiene viva la conexión"""
+        suscriptor = await self.subscribe(last_event_id)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(suscriptor.queue.get(), heartbeat_s)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+        finally:
+            self.unsubscribe(suscriptor)
+
+    def stats(self) -> Dict:
+        """Contadores del stream"""
+        return {
+            "suscriptores": len(self._suscriptores),
+            "id_actual": self._id(self.seq),
+            "intervalo_s": self.interval_s,
+            "ticks": self.ticks,
+            "eventos": self.eventos,
+            "resincronizados": self.resincronizados,
+            "tick_promedio_ms": round(self.tick_total / self.ticks * 1000, 3) if self.ticks else 0,
+            "ultimo_error": self.ultimo_error,
+        }
+
+    async def close(self):
+        """Detener el tick"""
+        self._suscriptores.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+_broadcaster: Optional[ResultsBroadcaster] = None
+
+def get_broadcaster(compute: Callable[[], Awaitable[Dict]]) -> ResultsBroadcaster:
+    """Obtener (o crear) el broadcaster de este worker (se usa solo desde el event loop)"""
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = ResultsBroadcaster(compute, RESULTS_STREAM_INTERVAL_S, RESULTS_STREAM_HISTORY, RESULTS_STREAM_QUEUE)
+    return _broadcaster
+
+def get_stats() -> Dict:
+    """Contadores del stream (vacío si no se usó)"""
+    return _broadcaster.stats() if _broadcaster is not None else {}
+
+async def close_broadcaster():
+    """Detener el stream del worker"""
+    global _broadcaster
+    if _broadcaster is not None:
+        await _broadcaster.close()
+        _broadcaster = None
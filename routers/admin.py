@@ -1,26 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from services.analitica_service import get_analytics, get_stats as get_analytics_stats
+from services.auditoria_service import audit_circuits, get_stats as get_audit_stats
 from services.admin_service import create_usuario, create_establecimiento, create_eleccion, create_circuito, create_partido, get_establecimientos, get_circuitos, get_partidos
 from schemas import (
     CreateUsuarioRequest, CreateEstablecimientoRequest, CreateEleccionRequest, CreateCircuitoRequest, CreatePartidoRequest,
-    UsuarioCreatedResponse, EstablecimientoCreatedResponse, PartidoCreatedResponse
+    UsuarioCreatedResponse, EstablecimientoCreatedResponse, PartidoCreatedResponse, CurrentUser
 )
-from auth import verify_token
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth import get_current_user, require_role
+from dispatch import run_service, get_stats
+from batch_writer import get_stats as get_batch_stats
+from journal import get_stats as get_journal_stats
+from idempotency import get_stats as get_idempotency_stats
+from cache import get_stats as get_cache_stats
+from results_stream import get_stats as get_stream_stats
+from search_index import get_stats as get_search_stats
+from versions import get_versions
+from database import get_pool_stats
 
 router = APIRouter()
-security = HTTPBearer()
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    return verify_token(token)
+# Altas y elecciones: el rol sale del token, sin consultar usuarios
+require_admin = require_role('superadmin')
 
 @router.post("/usuario", response_model=UsuarioCreatedResponse)
 async def crear_usuario(
     request: CreateUsuarioRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """Crear nuevo usuario (mesa o presidente) - solo para admin"""
-    result = create_usuario(request)
+    result = await run_service('admin', create_usuario, request)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -28,10 +36,10 @@ async def crear_usuario(
 @router.post("/establecimiento", response_model=EstablecimientoCreatedResponse)
 async def crear_establecimiento(
     request: CreateEstablecimientoRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """Crear nuevo establecimiento - solo para admin"""
-    result = create_establecimiento(request)
+    result = await run_service('admin', create_establecimiento, request)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -39,10 +47,10 @@ async def crear_establecimiento(
 @router.post("/eleccion")
 async def crear_eleccion(
     request: CreateEleccionRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """Crear nueva elección con listas - solo para admin"""
-    result = create_eleccion(request)
+    result = await run_service('admin', create_eleccion, request)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -50,39 +58,76 @@ async def crear_eleccion(
 @router.post("/partido", response_model=PartidoCreatedResponse)
 async def crear_partido(
     request: CreatePartidoRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """Crear nuevo partido - solo para admin"""
-    return create_partido(request)
+    return await run_service('admin', create_partido, request)
 
 @router.post("/circuito")
 async def crear_circuito(
     request: CreateCircuitoRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """Crear nuevo circuito - solo para admin"""
-    result = create_circuito(request)
+    result = await run_service('admin', create_circuito, request)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/establecimientos")
 async def obtener_establecimientos(
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Obtener lista de establecimientos"""
-    return get_establecimientos()
+    return await run_service('admin', get_establecimientos)
 
 @router.get("/circuitos")
 async def obtener_circuitos(
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Obtener lista de circuitos"""
-    return get_circuitos()
+    return await run_service('admin', get_circuitos)
 
 @router.get("/partidos")
 async def obtener_partidos(
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Obtener lista de partidos"""
-    return get_partidos()
\ No newline at end of file
+    return await run_service('admin', get_partidos)
+
+@router.get("/analitica")
+async def obtener_analitica(
+    por: str = 'departamento',
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """Votos por candidato, porcentajes, dispersión entre circuitos, márgenes y blancos/anulados
+    agrupados por departamento, ciudad, tipo de establecimiento, accesibilidad o circuito"""
+    return await run_service('admin', get_analytics, por)
+
+@router.get("/auditoria")
+async def auditar_circuitos(
+    circuito: Optional[List[str]] = Query(None),
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """Auditar circuitos (todos o los ?circuito= indicados): votos contra autorizaciones VOTÓ,
+    huecos en los comprobantes y contadores contra el recuento; reporte JSON con rendimiento"""
+    return await run_service('admin', audit_circuits, circuito)
+
+@router.get("/metricas")
+async def obtener_metricas(
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """Contadores de executors de servicios, escritores por lotes, journal, idempotencia, cachés, stream de resultados, índice de búsqueda, motor de análisis, auditoría y pools de conexiones"""
+    return {
+        "executors": get_stats(),
+        "lotes": get_batch_stats(),
+        "journal": get_journal_stats(),
+        "idempotencia": get_idempotency_stats(),
+        "caches": get_cache_stats(),
+        "versiones": get_versions(),
+        "stream": get_stream_stats(),
+        "busqueda": get_search_stats(),
+        "analitica": get_analytics_stats(),
+        "auditoria": get_audit_stats(),
+        "pools": get_pool_stats(),
+    }
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Form
 from services.auth_service import authenticate_user
+from dispatch import run_service
 from schemas import LoginResponse
 
 router = APIRouter()
@@ -10,4 +11,4 @@ async def login(
     password: str = Form(...)
 ):
     """Endpoint de autenticación para mesas"""
-    return authenticate_user(username, password)
\ No newline at end of file
+    return await run_service('auth', authenticate_user, username, password)
\ No newline at end of file
@@ -1,11 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from typing import List
 from services.candidato_service import get_candidates
+from dispatch import run_service
+from http_cache import CATALOG_CACHE_CONTROL, conditional_get
 from schemas import PartidoResponse
+from versions import ELECCION, get_version
 
 router = APIRouter()
 
 @router.get("/", response_model=List[PartidoResponse])
-async def get_candidatos():
+async def get_candidatos(request: Request):
     """Endpoint público - no requiere autenticación para que votantes vean candidatos"""
-    return get_candidates()
\ No newline at end of file
+    version = get_version(ELECCION)
+    async def build():
+        return await run_service('resultados', get_candidates), version
+    return await conditional_get(request, 'candidatos', version, CATALOG_CACHE_CONTROL, build)
\ No newline at end of file
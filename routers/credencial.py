@@ -1,43 +1,54 @@
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from auth import verify_token
+from auth import get_current_user, require_role
 from dao.credencial_dao import CredencialDAO
-from database import get_db_connection
+from database import get_db_connection, workload
+from dispatch import run_service
+from search_index import add_circuits
+from versions import ESTRUCTURA, bump_version
+from schemas import CurrentUser
 from typing import List, Dict
 
 router = APIRouter()
-security = HTTPBearer()
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    return verify_token(token)
 
 @router.post("/upload-csv")
 async def upload_credenciales_csv(
     credenciales_data: List[Dict],
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(require_role('superadmin'))
 ):
     """Cargar credenciales desde CSV - solo superadmin"""
-    try:
+    @workload('admin')
+    def _cargar():
+        # Los circuitos que no existían se crean en la misma carga: van al índice de
+        # búsqueda y, como en create_circuito, sube la versión de la estructura
+        circuitos_creados = []
         with get_db_connection() as connection:
-            count = CredencialDAO.bulk_insert_credenciales(connection, credenciales_data)
+            count = CredencialDAO.bulk_insert_credenciales(connection, credenciales_data, circuitos_creados)
             connection.commit()
-            return {"mensaje": f"Se cargaron {count} credenciales exitosamente"}
+        if circuitos_creados:
+            add_circuits(circuitos_creados)
+            bump_version(ESTRUCTURA)
+        return count
+    try:
+        count = await run_service('admin', _cargar)
+        return {"mensaje": f"Se cargaron {count} credenciales exitosamente"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error cargando credenciales: {str(e)}")
 
 @router.get("/circuito/{credencial}")
 async def get_circuito_by_credencial(
     credencial: str,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Obtener el circuito asignado a una credencial"""
-    try:
+    @workload('votacion')
+    def _consultar():
         with get_db_connection() as connection:
-            circuito_data = CredencialDAO.get_circuito_by_credencial(connection, credencial)
-            if not circuito_data:
-                raise HTTPException(status_code=404, detail="Credencial no encontrada en el sistema")
-            return circuito_data
+            return CredencialDAO.get_circuito_by_credencial(connection, credencial)
+    try:
+        circuito_data = await run_service('autorizaciones', _consultar)
+        if not circuito_data:
+            raise HTTPException(status_code=404, detail="Credencial no encontrada en el sistema")
+        return circuito_data
     except HTTPException:
         raise
     except Exception as e:
@@ -46,12 +57,15 @@ async def get_circuito_by_credencial(
 @router.get("/lista/{circuito_numero}")
 async def get_credenciales_by_circuit(
     circuito_numero: str,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Listar credenciales autorizadas para un circuito"""
-    try:
+    @workload('admin')
+    def _listar():
         with get_db_connection() as connection:
-            credenciales = CredencialDAO.get_credenciales_by_circuit(connection, circuito_numero)
-            return {"circuito": circuito_numero, "credenciales": credenciales}
+            return CredencialDAO.get_credenciales_by_circuit(connection, circuito_numero)
+    try:
+        credenciales = await run_service('admin', _listar)
+        return {"circuito": circuito_numero, "credenciales": credenciales}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo credenciales: {str(e)}")
\ No newline at end of file
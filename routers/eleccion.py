@@ -1,12 +1,15 @@
-from fastapi import APIRouter
-from database import get_db_connection
+from fastapi import APIRouter, Request
+from database import get_db_connection, workload
+from dispatch import run_service
+from http_cache import CATALOG_CACHE_CONTROL, conditional_get
+from versions import ELECCION, get_version
 
 router = APIRouter()
 
-@router.get("/activa")
-async def get_eleccion_activa():
-    """Obtener información de la elección activa"""
-    with get_db_connection() as connection:
+@workload('lectura')
+def _eleccion_activa() -> dict:
+    """Consultar la elección activa"""
+    with get_db_connection(read_only=True) as connection:
         cursor = connection.cursor(dictionary=True)
         try:
             cursor.execute("SELECT año, nombre, fecha_creacion FROM elecciones WHERE activa = TRUE LIMIT 1")
@@ -19,4 +22,12 @@ async def get_eleccion_activa():
                 }
             return {"año": 2024, "nombre": "Elección 2024", "fecha_creacion": None}
         finally:
-            cursor.close()
\ No newline at end of file
+            cursor.close()
+
+@router.get("/activa")
+async def get_eleccion_activa(request: Request):
+    """Obtener información de la elección activa (304 con If-None-Match vigente)"""
+    version = get_version(ELECCION)
+    async def build():
+        return await run_service('resultados', _eleccion_activa), version
+    return await conditional_get(request, 'eleccion', version, CATALOG_CACHE_CONTROL, build)
\ No newline at end of file
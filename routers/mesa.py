@@ -1,35 +1,30 @@
 from fastapi import APIRouter, Depends
 from services.mesa_service import close_circuit, close_mesa, get_mesas_estado
-from schemas import CerrarMesaRequest
-from auth import verify_token
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from schemas import CerrarMesaRequest, CurrentUser
+from dispatch import run_service
+from auth import get_current_user
 
 router = APIRouter()
-security = HTTPBearer()
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    return verify_token(token)
 
 @router.patch("/{circuito}/close")
 async def close_circuito(
     circuito: str,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Cerrar circuito - solo para mesa autenticada (compatibilidad)"""
-    return close_circuit(circuito)
+    return await run_service('votos', close_circuit, circuito)
 
 @router.post("/cerrar")
 async def cerrar_mesa(
     request: CerrarMesaRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Cerrar mesa - solo presidente de mesa"""
-    return close_mesa(request.circuito)
+    return await run_service('votos', close_mesa, request.circuito)
 
 @router.get("/estado")
 async def get_mesas_estado_endpoint(
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Obtener estado de todas las mesas"""
-    return get_mesas_estado()
\ No newline at end of file
+    return await run_service('admin', get_mesas_estado)
\ No newline at end of file
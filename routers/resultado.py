@@ -1,25 +1,200 @@
-from fastapi import APIRouter
+import json
+from datetime import datetime
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from services.resultado_service import get_results, get_departments, get_circuit_results, search_circuits
+from database import ASYNC_DB_ENABLED
+from dispatch import run_service
+from http_cache import RESULTS_CACHE_CONTROL, CATALOG_CACHE_CONTROL, conditional_get
+from results_stream import RESULTS_STREAM_HEARTBEAT_S, get_broadcaster
+from results_export import FORMATOS, PARQUET_DISPONIBLE, media_type, filename
+from services.resultado_service import (
+    get_results_versioned, get_departments_versioned, get_circuit_results, search_circuits, get_results_snapshot,
+    get_results_versioned_async, get_departments_versioned_async, get_circuit_results_async, get_results_snapshot_async,
+    get_unit_results_versioned, get_unit_results_versioned_async, get_level_results_versioned, get_level_results_versioned_async,
+    get_circuits_results_versioned, get_circuits_results_versioned_async, results_version, RESULTS_BATCH_MAX_CIRCUITS,
+    open_results_export, open_results_export_async, get_series_versioned, get_series_versioned_async, PASOS_SERIE
+)
+from dao.conteo_dao import NIVELES_GEO
+from dao.serie_dao import NIVELES_SERIE, minuto
+from schemas import ResultadosCircuitosRequest
 
 router = APIRouter()
 
+def _validar_nivel(nivel: str):
+    if nivel not in NIVELES_GEO:
+        raise HTTPException(status_code=400, detail=f"Nivel inválido. Debe ser uno de: {', '.join(NIVELES_GEO)}")
+
 @router.get("/")
-async def get_resultados(departamento: Optional[str] = None):
-    """Resultados públicos - no requiere autenticación"""
-    return get_results(departamento)
+async def get_resultados(request: Request, departamento: Optional[str] = None,
+                         nivel: Optional[str] = None, clave: Optional[str] = None):
+    """Resultados públicos - no requiere autenticación (304 con If-None-Match vigente)
+
+    Con nivel y clave (p. ej. nivel=ciudad&clave=Montevideo/Montevideo) devuelve los
+    resultados de esa unidad geográfica.
+    """
+    if nivel is not None:
+        _validar_nivel(nivel)
+        if not clave:
+            raise HTTPException(status_code=400, detail="Falta la clave de la unidad")
+        if nivel == 'departamento':
+            departamento, nivel = clave, None
+    async def build():
+        if nivel is not None:
+            if ASYNC_DB_ENABLED:
+                return await get_unit_results_versioned_async(nivel, clave)
+            return await run_service('resultados', get_unit_results_versioned, nivel, clave)
+        if ASYNC_DB_ENABLED:
+            return await get_results_versioned_async(departamento)
+        return await run_service('resultados', get_results_versioned, departamento)
+    return await conditional_get(request, 'resultados', results_version(), RESULTS_CACHE_CONTROL, build)
+
+@router.get("/geo/{nivel}")
+async def get_resultados_nivel(request: Request, nivel: str, dentro: Optional[str] = None):
+    """Resultados de cada unidad de un nivel (p. ej. todos los departamentos para el mapa,
+    o las ciudades dentro=Canelones) en una sola lectura de los contadores"""
+    _validar_nivel(nivel)
+    async def build():
+        if ASYNC_DB_ENABLED:
+            return await get_level_results_versioned_async(nivel, dentro)
+        return await run_service('resultados', get_level_results_versioned, nivel, dentro)
+    return await conditional_get(request, 'geo', results_version(), RESULTS_CACHE_CONTROL, build)
+
+async def _snapshot() -> dict:
+    if ASYNC_DB_ENABLED:
+        return await get_results_snapshot_async()
+    return await run_service('resultados', get_results_snapshot)
+
+@router.get("/stream")
+async def stream_resultados(last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")):
+    """Resultados en vivo por Server-Sent Events - no requiere autenticación
+
+    El primer evento ('snapshot') trae los resultados nacionales y por departamento;
+    los siguientes ('cambios') solo las cifras que cambiaron. Al reconectar,
+    EventSource envía Last-Event-ID y recibe los eventos perdidos.
+    """
+    broadcaster = get_broadcaster(_snapshot)
+    if not await broadcaster.ensure_snapshot():
+        raise HTTPException(status_code=503, detail="Resultados no disponibles, reintente en unos segundos",
+                            headers={"Retry-After": "1"})
+    return StreamingResponse(
+        broadcaster.stream(last_event_id, RESULTS_STREAM_HEARTBEAT_S),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/departamentos")
-async def get_departamentos():
-    """Obtener lista de departamentos disponibles"""
-    return get_departments()
+async def get_departamentos(request: Request):
+    """Obtener lista de departamentos disponibles (304 con If-None-Match vigente)"""
+    async def build():
+        if ASYNC_DB_ENABLED:
+            return await get_departments_versioned_async()
+        return await run_service('resultados', get_departments_versioned)
+    return await conditional_get(request, 'departamentos', results_version(), CATALOG_CACHE_CONTROL, build)
 
 @router.get("/circuito/{numero_circuito}")
 async def get_resultados_circuito(numero_circuito: str):
     """Obtener resultados por circuito específico"""
-    return get_circuit_results(numero_circuito)
+    if ASYNC_DB_ENABLED:
+        return await get_circuit_results_async(numero_circuito)
+    return await run_service('resultados', get_circuit_results, numero_circuito)
+
+# Desde cuántos circuitos la respuesta se envía en partes en vez de serializarla entera
+_STREAM_MIN_CIRCUITOS = 200
+_STREAM_CHUNK = 100
+
+def _json_chunks(resultado: dict):
+    """Serializar {"circuitos": [...], "no_encontrados": [...]} de a _STREAM_CHUNK circuitos"""
+    circuitos = resultado['circuitos']
+    yield b'{"circuitos":['
+    for inicio in range(0, len(circuitos), _STREAM_CHUNK):
+        parte = ",".join(json.dumps(c, ensure_ascii=False, default=str) for c in circuitos[inicio:inicio + _STREAM_CHUNK])
+        yield ((',' if inicio else '') + parte).encode('utf-8')
+    yield ('],"no_encontrados":' + json.dumps(resultado['no_encontrados'], ensure_ascii=False) + '}').encode('utf-8')
+
+@router.post("/circuitos")
+async def get_resultados_circuitos(request: ResultadosCircuitosRequest):
+    """Resultados de varios circuitos en un pedido: una lista de números, un departamento
+    o, sin ninguno de los dos, todo el país"""
+    circuitos = request.circuitos
+    if circuitos is not None:
+        if request.departamento:
+            raise HTTPException(status_code=400, detail="Indicar circuitos o departamento, no ambos")
+        # Sin repetidos, en el orden pedido
+        circuitos = list(dict.fromkeys(circuitos))
+        if len(circuitos) > RESULTS_BATCH_MAX_CIRCUITS:
+            raise HTTPException(status_code=400, detail=f"Máximo {RESULTS_BATCH_MAX_CIRCUITS} circuitos por pedido")
+    if ASYNC_DB_ENABLED:
+        resultado, _ = await get_circuits_results_versioned_async(circuitos, request.departamento)
+    else:
+        resultado, _ = await run_service('resultados', get_circuits_results_versioned, circuitos, request.departamento)
+    if len(resultado['circuitos']) >= _STREAM_MIN_CIRCUITOS:
+        return StreamingResponse(_json_chunks(resultado), media_type="application/json")
+    return resultado
+
+def _hora_local(momento: Optional[datetime]) -> Optional[datetime]:
+    """Las series se guardan en hora local sin zona; una fecha con zona se convierte"""
+    if momento is not None and momento.tzinfo is not None:
+        return momento.astimezone().replace(tzinfo=None)
+    return momento
+
+@router.get("/series")
+async def get_series(request: Request, nivel: str = 'nacional', clave: Optional[str] = None,
+                     desde: Optional[datetime] = None, hasta: Optional[datetime] = None, paso: Optional[int] = None):
+    """Votos, autorizaciones y observados por intervalo de tiempo (304 con If-None-Match vigente)
+
+    Devuelve un array por tipo con un valor cada paso minutos a partir de 'desde',
+    leído de las series por minuto que se actualizan con cada voto y autorización.
+    """
+    if nivel not in NIVELES_SERIE:
+        raise HTTPException(status_code=400, detail=f"Nivel inválido. Debe ser uno de: {', '.join(NIVELES_SERIE)}")
+    if nivel == 'nacional':
+        clave = None
+    elif not clave:
+        raise HTTPException(status_code=400, detail="Falta la clave (departamento o número de circuito)")
+    if paso is not None and paso not in PASOS_SERIE:
+        raise HTTPException(status_code=400, detail=f"Paso inválido. Debe ser uno de: {', '.join(map(str, PASOS_SERIE))}")
+    desde, hasta = _hora_local(desde), _hora_local(hasta)
+    if desde and hasta and desde > hasta:
+        raise HTTPException(status_code=400, detail="'desde' es posterior a 'hasta'")
+    # Sin hasta la serie termina en el minuto actual: se fija acá para que el caché y
+    # el ETag cambien al pasar el minuto aunque no haya votos nuevos
+    hasta = minuto(hasta or datetime.now())
+    corte = (hasta.strftime('%Y%m%d%H%M'),)
+    async def build():
+        if ASYNC_DB_ENABLED:
+            contenido, version = await get_series_versioned_async(nivel, clave, desde, hasta, paso)
+        else:
+            contenido, version = await run_service('resultados', get_series_versioned, nivel, clave, desde, hasta, paso)
+        return contenido, version + corte
+    return await conditional_get(request, 'series', results_version() + corte, RESULTS_CACHE_CONTROL, build)
+
+@router.get("/export")
+async def exportar_resultados(formato: str = Query('csv', alias='format'), gzip: bool = False):
+    """Exportar todos los contadores de la elección activa (una fila por circuito y contador)
+
+    El archivo se genera a medida que se envía, leyendo la base por lotes, así una
+    exportación nacional no ocupa más memoria que la de un lote. gzip=true comprime
+    CSV y NDJSON; Parquet ya va comprimido.
+    """
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido. Debe ser uno de: {', '.join(FORMATOS)}")
+    if formato == 'parquet':
+        if not PARQUET_DISPONIBLE:
+            raise HTTPException(status_code=501, detail="La exportación Parquet requiere el paquete pyarrow")
+        if gzip:
+            raise HTTPException(status_code=400, detail="Parquet ya va comprimido, no admite gzip")
+    if ASYNC_DB_ENABLED:
+        partes, eleccion = await open_results_export_async(formato, gzip)
+    else:
+        partes, eleccion = await run_service('exportacion', open_results_export, formato, gzip)
+    nombre = filename(formato, gzip, eleccion['año'] if eleccion else 2024)
+    return StreamingResponse(partes, media_type=media_type(formato, gzip), headers={
+        "Content-Disposition": f'attachment; filename="{nombre}"',
+        "Cache-Control": RESULTS_CACHE_CONTROL,
+    })
 
 @router.get("/circuitos/buscar")
 async def buscar_circuitos(q: str):
-    """Buscar circuitos por número"""
-    return search_circuits(q)
\ No newline at end of file
+    """Buscar circuitos por número o nombre del establecimiento (hasta 10; q=ALL lista todos)"""
+    return await run_service('resultados', search_circuits, q)
\ No newline at end of file
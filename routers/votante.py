@@ -1,31 +1,34 @@
-from fastapi import APIRouter, Depends
-from services.votante_service import enable_voter, get_voter_status, get_voters_by_circuit
-from schemas import VoteEnableRequest, VotanteStatus
-from auth import verify_token
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+from fastapi import APIRouter, Depends, Header
+from database import ASYNC_DB_ENABLED
+from dispatch import run_service
+from services.votante_service import enable_voter, enable_voter_async, get_voter_status, get_voters_by_circuit
+from schemas import VoteEnableRequest, VotanteStatus, CurrentUser
+from auth import get_current_user
+from idempotency import run_idempotent
 
 router = APIRouter()
-security = HTTPBearer()
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    return verify_token(token)
 
 @router.post("/enable")
 async def enable_vote(
     request: VoteEnableRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Autorizar votante - solo mesa autenticada"""
-    return enable_voter(request, current_user)
+    """Autorizar votante - solo mesa autenticada (acepta Idempotency-Key)"""
+    async def autorizar():
+        if ASYNC_DB_ENABLED:
+            return await enable_voter_async(request, current_user.username)
+        return await run_service('autorizaciones', enable_voter, request, current_user.username)
+    return await run_idempotent(idempotency_key, 'enable', current_user.username, request, 'autorizaciones', autorizar)
 
 @router.get("/{circuito}")
 async def get_votantes_por_circuito(
     circuito: str,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Listar votantes por circuito - solo para mesa autenticada"""
-    return get_voters_by_circuit(circuito)
+    return await run_service('autorizaciones', get_voters_by_circuit, circuito)
 
 @router.get("/{circuito}/{credencial}", response_model=VotanteStatus)
 async def get_votante(
@@ -33,4 +36,4 @@ async def get_votante(
     credencial: str
 ):
     """Verificar estado de votante - no requiere auth para cabina"""
-    return get_voter_status(circuito, credencial)
\ No newline at end of file
+    return await run_service('autorizaciones', get_voter_status, circuito, credencial)
\ No newline at end of file
@@ -1,36 +1,47 @@
-from fastapi import APIRouter, Depends
-from services.voto_service import cast_vote, get_observed_votes, validate_observed_vote
-from schemas import VotoRequest, VotoResponse, ValidarVotoRequest
-from auth import verify_token
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+from fastapi import APIRouter, Depends, Header
+from database import ASYNC_DB_ENABLED
+from dispatch import run_service
+from batch_writer import VOTE_BATCH_ENABLED
+from services.voto_service import cast_vote, cast_vote_async, enqueue_vote, get_vote_writer, get_observed_votes, validate_observed_vote
+from schemas import VotoRequest, VotoResponse, ValidarVotoRequest, CurrentUser
+from auth import get_current_user
+from idempotency import run_idempotent
 
 router = APIRouter()
-security = HTTPBearer()
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    return verify_token(token)
 
 @router.post("/votar", response_model=VotoResponse)
 async def votar(
     voto: VotoRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Votar - requiere auth de mesa para determinar circuito"""
-    return cast_vote(voto, current_user)
+    """Votar - requiere auth de mesa para determinar circuito
+    
+    Con Idempotency-Key los reintentos reciben la primera respuesta sin volver a votar.
+    """
+    async def registrar():
+        if ASYNC_DB_ENABLED:
+            return await cast_vote_async(voto, current_user)
+        if VOTE_BATCH_ENABLED:
+            # La validación ocupa un thread; la espera del commit del lote no (503 si vence)
+            future = await run_service('votos', enqueue_vote, voto, current_user)
+            return await get_vote_writer().wait_async(future)
+        return await run_service('votos', cast_vote, voto, current_user)
+    return await run_idempotent(idempotency_key, 'votar', current_user.username, voto, 'votos', registrar)
 
 @router.get("/observados/{circuito}")
 async def get_votos_observados(
     circuito: str,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Obtener votos observados pendientes para el circuito"""
-    return get_observed_votes(circuito)
+    return await run_service('votos', get_observed_votes, circuito)
 
 @router.post("/validar-observado")
 async def validar_voto_observado(
     request: ValidarVotoRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Validar o rechazar voto observado - solo presidente de mesa"""
-    return validate_observed_vote(request.voto_id, request.accion)
\ No newline at end of file
+    return await run_service('votos', validate_observed_vote, request.voto_id, request.accion)
\ No newline at end of file
@@ -0,0 +1,44 @@
+import argparse
+import json
+import sys
+from dotenv import load_dotenv
+from audit import AUDIT_WORKERS, AUDIT_SHARD_CIRCUITS, run_audit
+
+load_dotenv()
+
+def imprimir_resumen(reporte: dict):
+    """Resumen legible del reporte de auditoría"""
+    rendimiento = reporte["rendimiento"]
+    print(f"Circuitos auditados: {reporte['circuitos_auditados']}/{reporte['circuitos']} "
+          f"({rendimiento['procesos']} procesos, {rendimiento['shards']} shards)")
+    print(f"Tiempo: {rendimiento['segundos']} s — {rendimiento['circuitos_por_s']} circuitos/s, "
+          f"{rendimiento['votos_por_s']} votos/s, {rendimiento['filas_por_s']} filas/s")
+    for numero in reporte["circuitos_desconocidos"]:
+        print(f"⚠️  Circuito inexistente: {numero}")
+    for error in reporte["errores"]:
+        print(f"⚠️  Falló el shard de circuitos {error['desde_id']}-{error['hasta_id']}: {error['error']}")
+    for tipo, cantidad in sorted(reporte["discrepancias_por_tipo"].items()):
+        print(f"⚠️  {tipo}: {cantidad}")
+    if reporte["ok"]:
+        print("✓ Sin discrepancias")
+    else:
+        print(f"✗ {reporte['circuitos_con_discrepancias']} circuitos con discrepancias")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auditar la integridad de los circuitos (votos, comprobantes y contadores)")
+    parser.add_argument("--circuito", action="append", help="número de circuito a auditar (repetible; por defecto todos)")
+    parser.add_argument("--workers", type=int, default=AUDIT_WORKERS, help="procesos del pool")
+    parser.add_argument("--shard", type=int, default=AUDIT_SHARD_CIRCUITS, help="circuitos por tarea")
+    parser.add_argument("--salida", help="archivo donde guardar el reporte JSON ('-' para stdout)")
+    args = parser.parse_args()
+    reporte = run_audit(args.circuito, workers=args.workers, shard_circuitos=args.shard)
+    if args.salida == '-':
+        json.dump(reporte, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as archivo:
+                json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+            print(f"Reporte guardado en {args.salida}")
+        imprimir_resumen(reporte)
+    sys.exit(0 if reporte["ok"] else 1)
@@ -28,6 +28,14 @@ class LoginResponse(BaseModel):
     role: str
     mesa_cerrada: bool = False
 
+class CurrentUser(BaseModel):
+    """Usuario autenticado según los claims del token (sin consultar usuarios)"""
+    username: str
+    role: str
+    circuito_id: Optional[int] = None
+    numero_circuito: Optional[str] = None
+    mesa_cerrada: bool = False
+
 class CandidatoResponse(BaseModel):
     id: int
     nombre: str
@@ -66,6 +74,10 @@ class ValidarVotoRequest(BaseModel):
 class CerrarMesaRequest(BaseModel):
     circuito: str
 
+class ResultadosCircuitosRequest(BaseModel):
+    circuitos: Optional[List[str]] = None  # números de circuito; sin lista, los del departamento (o todos)
+    departamento: Optional[str] = None
+
 # Esquemas para crear entidades
 class CreateUsuarioRequest(BaseModel):
     username: str
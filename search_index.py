@@ -0,0 +1,197 @@
+import bisect
+import heapq
+import os
+import threading
+import time
+import unicodedata
+from array import array
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from versions import ESTRUCTURA, get_version
+
+# Índice de búsqueda de circuitos (GET /api/resultados/circuitos/buscar):
+# - CIRCUIT_INDEX_TTL_S: cada cuánto se relee la tabla aunque la versión local no
+#                        cambie (circuitos creados en otros workers)
+CIRCUIT_INDEX_TTL_S = float(os.getenv('CIRCUIT_INDEX_TTL_S', '60'))
+CIRCUIT_SEARCH_LIMIT = 10
+
+# Largo máximo de los n-gramas indexados: términos más cortos se responden con su
+# lista directa, los más largos con la lista del trigrama más raro y una verificación
+_GRAMA = 3
+# Hasta cuántos números con el prefijo buscado se ordenan directamente desde el rango
+_PREFIJOS_DIRECTOS = 256
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas y sin tildes ('Peñarol N° 5' y 'penarol n° 5' buscan igual)"""
+    if (texto or '').isascii():
+        return (texto or '').lower()
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+def _orden(circuito: Dict) -> tuple:
+    # Como ORDER BY CAST(numero_circuito AS UNSIGNED): dígitos iniciales, 0 si no hay
+    numero = str(circuito['numero_circuito'])
+    digitos = len(numero) - len(numero.lstrip('0123456789'))
+    return (int(numero[:digitos]) if digitos else 0, numero)
+
+def _gramas(textos: List[str]) -> Dict[str, array]:
+    """n-grama (1 a _GRAMA caracteres) -> posiciones de los textos que lo contienen, ordenadas"""
+    listas: Dict[str, list] = defaultdict(list)
+    # Varios circuitos comparten establecimiento: los n-gramas de cada texto se arman una vez
+    por_texto: Dict[str, set] = {}
+    for posicion, texto in enumerate(textos):
+        gramas = por_texto.get(texto)
+        if gramas is None:
+            gramas = por_texto[texto] = {texto[i:i + n] for n in range(1, _GRAMA + 1) for i in range(len(texto) - n + 1)}
+        for grama in gramas:
+            listas[grama].append(posicion)
+    return {grama: array('i', posiciones) for grama, posiciones in listas.items()}
+
+class CircuitIndex:
+    """Circuitos del proceso indexados por número y nombre del establecimiento
+
+    Las entradas quedan en el orden numérico de la búsqueda original y las
+    posiciones de cada n-grama en ese mismo orden, así una búsqueda recorre una
+    lista y corta apenas junta los resultados pedidos. Los prefijos del número se
+    resuelven con bisect sobre los números ordenados. Es inmutable: agregar
+    circuitos arma un índice nuevo que reemplaza al anterior.
+    """
+
+    def __init__(self, circuitos: List[Dict], version: int, creado: Optional[float] = None):
+        self._entradas = sorted(circuitos, key=_orden)
+        self.version = version
+        self.creado = time.monotonic() if creado is None else creado
+        self._numeros = [normalizar(str(c['numero_circuito'])) for c in self._entradas]
+        self._nombres = [normalizar(c['establecimiento']) for c in self._entradas]
+        self._por_numero = {numero: posicion for posicion, numero in enumerate(self._numeros)}
+        prefijos = sorted((numero, posicion) for posicion, numero in enumerate(self._numeros))
+        self._prefijos = [numero for numero, _ in prefijos]
+        self._prefijos_posicion = array('i', (posicion for _, posicion in prefijos))
+        self._gramas_numero = _gramas(self._numeros)
+        self._gramas_nombre = _gramas(self._nombres)
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def vigente(self, version: int, ttl_s: float = CIRCUIT_INDEX_TTL_S) -> bool:
+        """Sin cambios de estructura posteriores al índice y dentro del TTL"""
+        return version <= self.version and time.monotonic() - self.creado <= ttl_s
+
+    def with_circuits(self, circuitos: List[Dict], version: int) -> "CircuitIndex":
+        """Índice con circuitos nuevos agregados (conserva la antigüedad para el TTL)"""
+        nuevos = {str(c['numero_circuito']) for c in circuitos}
+        actuales = [c for c in self._entradas if str(c['numero_circuito']) not in nuevos]
+        return CircuitIndex(actuales + list(circuitos), version, self.creado)
+
+    def all(self) -> List[Dict]:
+        """Todos los circuitos en orden numérico"""
+        return [dict(c) for c in self._entradas]
+
+    def _prefijo(self, termino: str, limite: int) -> Iterable[int]:
+        """Posiciones (orden numérico) de los números que empiezan con el término"""
+        desde = bisect.bisect_left(self._prefijos, termino)
+        hasta = bisect.bisect_left(self._prefijos, termino + '\U0010ffff', desde)
+        if hasta - desde <= _PREFIJOS_DIRECTOS:
+            return heapq.nsmallest(limite, self._prefijos_posicion[desde:hasta])
+        # Con muchos números en el rango ('1') es más barato recorrer en orden los que
+        # contienen el término y cortar en los primeros que además empiezan con él
+        return (posicion for posicion in self._contienen(termino, self._numeros, self._gramas_numero)
+                if self._numeros[posicion].startswith(termino))
+
+    @staticmethod
+    def _contienen(termino: str, textos: List[str], gramas: Dict[str, array]) -> Iterator[int]:
+        """Posiciones (orden numérico) de los textos que contienen el término"""
+        if len(termino) <= _GRAMA:
+            yield from gramas.get(termino, ())
+            return
+        listas = [gramas.get(termino[i:i + _GRAMA]) for i in range(len(termino) - _GRAMA + 1)]
+        if not all(listas):
+            return
+        for posicion in min(listas, key=len):
+            if termino in textos[posicion]:
+                yield posicion
+
+    def search(self, termino: str, limite: int = CIRCUIT_SEARCH_LIMIT) -> List[Dict]:
+        """Circuitos cuyo número o establecimiento contiene el término
+
+        Primero el número exacto, después los números que empiezan con el término,
+        los que lo contienen y por último los establecimientos, cada grupo en orden
+        numérico.
+        """
+        termino = normalizar(termino.strip())
+        if not termino or limite <= 0:
+            return []
+        posiciones: Dict[int, None] = {}
+        exacto = self._por_numero.get(termino)
+        if exacto is not None:
+            posiciones[exacto] = None
+        grupos = (
+            self._prefijo(termino, limite),
+            self._contienen(termino, self._numeros, self._gramas_numero),
+            self._contienen(termino, self._nombres, self._gramas_nombre),
+        )
+        for grupo in grupos:
+            if len(posiciones) >= limite:
+                break
+            for posicion in grupo:
+                posiciones.setdefault(posicion, None)
+                if len(posiciones) >= limite:
+                    break
+        return [dict(self._entradas[posicion]) for posicion in posiciones]
+
+    def stats(self) -> Dict:
+        return {
+            "circuitos": len(self._entradas),
+            "gramas": len(self._gramas_numero) + len(self._gramas_nombre),
+            "version": self.version,
+            "edad_s": round(time.monotonic() - self.creado, 1),
+        }
+
+_indice: Optional[CircuitIndex] = None
+_lock = threading.Lock()
+_reconstrucciones = 0
+_parches = 0
+
+def get_index(cargar: Callable[[], List[Dict]]) -> CircuitIndex:
+    """Índice del proceso; se rearma con cargar() si cambió la estructura o venció el TTL
+
+    Mientras un thread lo rearma los demás siguen buscando en el anterior; solo la
+    primera carga espera.
+    """
+    global _indice, _reconstrucciones
+    indice = _indice
+    if indice is not None and indice.vigente(get_version(ESTRUCTURA)):
+        return indice
+    if not _lock.acquire(blocking=indice is None):
+        return indice
+    try:
+        if _indice is indice:
+            # La versión se lee antes que la tabla: un cambio durante la carga obliga a otra
+            version = get_version(ESTRUCTURA)
+            _indice = CircuitIndex(cargar(), version)
+            _reconstrucciones += 1
+        return _indice
+    finally:
+        _lock.release()
+
+def add_circuits(circuitos: List[Dict]):
+    """Agregar al índice circuitos recién creados, sin releer la tabla
+
+    Se llama después del commit y antes de que el servicio suba ESTRUCTURA (ver
+    versions.bumps): el índice queda con esa versión y la subida no lo rearma.
+    Sin índice, o con uno que ya tiene que rearmarse, no hace nada: la próxima
+    búsqueda lee la tabla con los circuitos nuevos.
+    """
+    global _indice, _parches
+    if not circuitos:
+        return
+    with _lock:
+        version = get_version(ESTRUCTURA)
+        if _indice is not None and _indice.version >= version:
+            _indice = _indice.with_circuits(circuitos, _indice.version + 1)
+            _parches += 1
+
+def get_stats() -> Dict:
+    """Contadores del índice de búsqueda (sin índice si todavía no se buscó)"""
+    indice = _indice
+    return dict(indice.stats() if indice is not None else {}, reconstrucciones=_reconstrucciones, parches=_parches)
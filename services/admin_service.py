@@ -1,8 +1,12 @@
-from database import get_db_connection, get_db_transaction
+from database import get_db_connection, get_db_transaction, workload
 from dao.admin_dao import AdminDAO
+from dao.voto_dao import VotoDAO
+from versions import RESULTADOS, ESTRUCTURA, ELECCION, bumps
+from search_index import add_circuits
 from schemas import CreateUsuarioRequest, CreateEstablecimientoRequest, CreateEleccionRequest, CreateCircuitoRequest, CreatePartidoRequest
 from fastapi import HTTPException
 
+@workload('admin')
 def create_usuario(data: CreateUsuarioRequest) -> dict:
     """Crear nuevo usuario (mesa o presidente)"""
     try:
@@ -38,6 +42,8 @@ def create_usuario(data: CreateUsuarioRequest) -> dict:
         print(f"Error creando usuario: {e}")
         return {"error": f"Error creando usuario: {str(e)}"}
 
+@workload('admin')
+@bumps(ESTRUCTURA)
 def create_establecimiento(data: CreateEstablecimientoRequest) -> dict:
     """Crear nuevo establecimiento"""
     try:
@@ -56,6 +62,8 @@ def create_establecimiento(data: CreateEstablecimientoRequest) -> dict:
         print(f"Error creando establecimiento: {e}")
         return {"error": f"Error creando establecimiento: {str(e)}"}
 
+@workload('admin')
+@bumps(RESULTADOS, ESTRUCTURA, ELECCION)
 def create_eleccion(data: CreateEleccionRequest) -> dict:
     """Crear nueva elección con listas - FULL WIPE del sistema"""
     try:
@@ -74,6 +82,8 @@ def create_eleccion(data: CreateEleccionRequest) -> dict:
         print(f"Error creando elección: {e}")
         return {"error": f"Error creando elección: {str(e)}"}
 
+@workload('admin')
+@bumps(ESTRUCTURA)
 def create_circuito(data: CreateCircuitoRequest) -> dict:
     """Crear nuevo circuito"""
     try:
@@ -84,7 +94,7 @@ def create_circuito(data: CreateCircuitoRequest) -> dict:
             
             # Verificar que el establecimiento existe
             cursor = connection.cursor()
-            cursor.execute("SELECT id, nombre FROM establecimientos WHERE id = %s", (data.establecimiento_id,))
+            cursor.execute("SELECT id, nombre, departamento FROM establecimientos WHERE id = %s", (data.establecimiento_id,))
             establecimiento = cursor.fetchone()
             cursor.close()
             
@@ -92,7 +102,14 @@ def create_circuito(data: CreateCircuitoRequest) -> dict:
                 return {"error": f"El establecimiento ID {data.establecimiento_id} no existe"}
             
             circuito_id = AdminDAO.create_circuito(connection, data.dict())
+            # La secuencia de comprobantes nace con el circuito, no con su primer voto
+            VotoDAO.seed_comprobante_sequence(connection, circuito_id)
             connection.commit()
+            add_circuits([{
+                "numero_circuito": data.numero_circuito,
+                "establecimiento": establecimiento[1],
+                "departamento": establecimiento[2],
+            }])
             
             return {
                 "id": circuito_id,
@@ -105,26 +122,29 @@ def create_circuito(data: CreateCircuitoRequest) -> dict:
         print(f"Error creando circuito: {e}")
         return {"error": f"Error creando circuito: {str(e)}"}
 
+@workload('admin')
 def get_establecimientos() -> list:
     """Obtener lista de establecimientos"""
     try:
-        with get_db_connection() as connection:
+        with get_db_connection(read_only=True) as connection:
             return AdminDAO.get_establecimientos_list(connection)
     except Exception as e:
         print(f"Error obteniendo establecimientos: {e}")
         return []
 
+@workload('admin')
 def get_circuitos() -> list:
     """Obtener lista de circuitos con sus IDs reales"""
     try:
         print("🔍 Obteniendo lista de circuitos...")
-        with get_db_connection() as connection:
+        with get_db_connection(read_only=True) as connection:
             result = AdminDAO.get_circuitos_list(connection)
             return result
     except Exception as e:
         print(f"Error obteniendo circuitos: {e}")
         return []
 
+@workload('admin')
 def create_partido(data: CreatePartidoRequest) -> dict:
     """Crear nuevo partido"""
     try:
@@ -140,10 +160,11 @@ def create_partido(data: CreatePartidoRequest) -> dict:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creando partido: {str(e)}")
 
+@workload('admin')
 def get_partidos() -> list:
     """Obtener lista de partidos"""
     try:
-        with get_db_connection() as connection:
+        with get_db_connection(read_only=True) as connection:
             return AdminDAO.get_partidos_list(connection)
     except Exception as e:
         print(f"Error obteniendo partidos: {e}")
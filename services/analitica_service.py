@@ -0,0 +1,84 @@
+import os
+import time
+from typing import Optional
+from fastapi import HTTPException
+from database import get_db_connection, workload
+from dao.analitica_dao import AnaliticaDAO
+from dao.resultado_dao import ResultadoDAO
+from analytics import np, AGRUPACIONES, VoteStore, analyze
+from results_export import fetch_batches
+from versions import RESULTADOS, ESTRUCTURA, get_version
+
+# Motor de análisis (GET /api/admin/analitica):
+# - ANALYTICS_CHUNK_ROWS: votos leídos por lote del cursor
+# - ANALYTICS_MAX_AGE_S:  cada cuánto se vuelve a mirar la base aunque la versión
+#                         local no cambie (votos registrados en otros workers)
+ANALYTICS_CHUNK_ROWS = int(os.getenv('ANALYTICS_CHUNK_ROWS', '50000'))
+ANALYTICS_MAX_AGE_S = float(os.getenv('ANALYTICS_MAX_AGE_S', '30'))
+
+_store: Optional[VoteStore] = None
+
+def _get_store() -> VoteStore:
+    global _store
+    if np is None:
+        raise HTTPException(status_code=501, detail="El análisis requiere el paquete numpy")
+    if _store is None:
+        _store = VoteStore()
+    return _store
+
+def _refrescar(connection, store: VoteStore):
+    """Traer a memoria los votos nuevos desde la marca y el estado actual de los observados
+
+    Con la misma versión de los datos y dentro de ANALYTICS_MAX_AGE_S no consulta la
+    base. Si faltan votos ya cargados (limpieza de la base) o cambió la estructura
+    (elección nueva), vuelve a cargar todo.
+    """
+    version = (get_version(RESULTADOS), get_version(ESTRUCTURA))
+    if store.version == version and store.actualizado and time.monotonic() - store.actualizado <= ANALYTICS_MAX_AGE_S:
+        return
+    inicio = time.perf_counter()
+    if (store.version is not None and store.version[1] != version[1]) or \
+            AnaliticaDAO.count_votes_up_to(connection, store.watermark) != len(store):
+        store.reset()
+    marca = store.watermark
+    cursor = AnaliticaDAO.open_votes(connection, marca)
+    try:
+        store.append(fetch_batches(cursor, ANALYTICS_CHUNK_ROWS))
+    finally:
+        cursor.close()
+    if marca:
+        store.update_states(AnaliticaDAO.get_observed_states(connection, marca))
+    store.version = version
+    store.actualizado = time.monotonic()
+    store.refrescos += 1
+    store.ultimo_refresco_ms = round((time.perf_counter() - inicio) * 1000, 2)
+
+@workload('admin')
+def get_analytics(por: str = 'departamento') -> dict:
+    """Estadísticas de los votos agrupadas por un atributo del circuito
+
+    Los votos se cargan una vez en arrays y después solo se leen los nuevos; las
+    estadísticas se calculan sobre la matriz circuito × candidato de cada pedido.
+    """
+    if por not in AGRUPACIONES:
+        raise HTTPException(status_code=400, detail=f"Agrupación inválida. Debe ser una de: {', '.join(AGRUPACIONES)}")
+    store = _get_store()
+    with get_db_connection(read_only=True) as connection:
+        with store.lock:
+            _refrescar(connection, store)
+            votos, watermark = store.snapshot(), store.watermark
+        eleccion = ResultadoDAO.get_active_election(connection)
+        circuitos = AnaliticaDAO.get_circuits(connection)
+        candidatos = AnaliticaDAO.get_candidates(connection, eleccion['id']) if eleccion else []
+    return {
+        "por": por,
+        "año_eleccion": eleccion['año'] if eleccion else None,
+        "votos_cargados": len(votos['id']),
+        "watermark": watermark,
+        "candidatos": candidatos,
+        "grupos": analyze(votos, circuitos, candidatos, por),
+    }
+
+def get_stats() -> dict:
+    """Contadores del motor de análisis (vacío si no se usó)"""
+    return _store.stats() if _store is not None else {}
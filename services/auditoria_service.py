@@ -0,0 +1,34 @@
+import threading
+from typing import List, Optional
+from fastapi import HTTPException
+from audit import run_audit
+
+# Una auditoría por worker: cada una ocupa AUDIT_WORKERS procesos y conexiones
+_en_curso = threading.Lock()
+_ultima: dict = {}
+
+def audit_circuits(circuitos: Optional[List[str]] = None) -> dict:
+    """Auditar los circuitos indicados (o todos) y devolver el reporte de discrepancias
+
+    Corre con la votación abierta: cada proceso lee en un snapshot de solo lectura,
+    sin locks sobre autorizaciones, votos ni contadores.
+    """
+    if not _en_curso.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Ya hay una auditoría en curso", headers={"Retry-After": "30"})
+    try:
+        reporte = run_audit(circuitos)
+    finally:
+        _en_curso.release()
+    _ultima.update({
+        "inicio": reporte["inicio"],
+        "ok": reporte["ok"],
+        "circuitos_auditados": reporte["circuitos_auditados"],
+        "discrepancias": len(reporte["discrepancias"]),
+        "errores": len(reporte["errores"]),
+        "segundos": reporte["rendimiento"]["segundos"],
+    })
+    return reporte
+
+def get_stats() -> dict:
+    """Resumen de la última auditoría del worker (vacío si no se corrió)"""
+    return dict(_ultima, en_curso=_en_curso.locked()) if _ultima else {"en_curso": _en_curso.locked()}
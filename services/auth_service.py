@@ -1,9 +1,10 @@
 from fastapi import HTTPException, status
-from database import get_db_connection
+from database import get_db_connection, workload
 from dao.mesa_dao import MesaDAO
 import auth
 from schemas import LoginResponse, CircuitoInfo, EstablecimientoInfo
 
+@workload('votacion')
 def authenticate_user(username: str, password: str) -> LoginResponse:
     """Autenticar usuario y generar token"""
     with get_db_connection() as connection:
@@ -56,7 +57,8 @@ def authenticate_user(username: str, password: str) -> LoginResponse:
         else:
             print(f"Usuario de mesa sin información de circuito valida")
         
-        access_token = auth.create_access_token(data={"sub": user['username']})
+        # El circuito y el rol viajan en el token para no releer usuarios en cada petición
+        access_token = auth.create_user_token(user)
         return LoginResponse(
             access_token=access_token, 
             token_type="bearer",
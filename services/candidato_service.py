@@ -1,11 +1,12 @@
 from typing import List, Dict
-from database import get_db_connection
+from database import get_db_connection, workload
 from dao.candidato_dao import CandidatoDAO
 from schemas import PartidoResponse, CandidatoResponse
 
+@workload('lectura')
 def get_candidates() -> List[PartidoResponse]:
     """Obtener todos los candidatos agrupados por partido de la elección activa"""
-    with get_db_connection() as connection:
+    with get_db_connection(read_only=True) as connection:
         # Primero obtener la elección activa
         cursor = connection.cursor(dictionary=True)
         cursor.execute("SELECT id FROM elecciones WHERE activa = TRUE LIMIT 1")
@@ -1,21 +1,18 @@
-from database import get_db_connection
+from database import get_db_connection, workload
 from dao.mesa_dao import MesaDAO
 
+@workload('votacion')
 def close_circuit(circuito: str) -> dict:
     """Cerrar circuito efectivamente"""
     try:
         print(f"🔒 Cerrando circuito {circuito}...")
         with get_db_connection() as connection:
             # Obtener circuito_id desde número de circuito
-            cursor = connection.cursor()
-            cursor.execute("SELECT id FROM circuitos WHERE numero_circuito = %s", (circuito,))
-            result = cursor.fetchone()
-            cursor.close()
+            circuito_id = MesaDAO.get_circuito_id_by_numero(connection, circuito)
             
-            if not result:
+            if not circuito_id:
                 return {"error": f"Circuito {circuito} no encontrado"}
             
-            circuito_id = result[0]
             success = MesaDAO.close_mesa(connection, circuito_id)
             
             if success:
@@ -28,10 +25,12 @@ def close_circuit(circuito: str) -> dict:
         print(f"Error cerrando circuito {circuito}: {e}")
         return {"error": f"Error cerrando circuito: {str(e)}"}
 
+@workload('votacion')
 def close_mesa(circuito: str) -> dict:
     """Cerrar mesa - delega a close_circuit para mantener compatibilidad"""
     return close_circuit(circuito)
 
+@workload('admin')
 def get_mesas_estado() -> list:
     """Obtener estado de todas las mesas"""
     try:
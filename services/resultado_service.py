@@ -1,64 +1,520 @@
-from typing import Optional
-from database import get_db_connection
-from dao.resultado_dao import ResultadoDAO
+import os
+from contextlib import ExitStack, AsyncExitStack
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import mysql.connector
+from fastapi import HTTPException
+from database import get_db_connection, get_async_db_connection, workload
+from dao.resultado_dao import ResultadoDAO, AsyncResultadoDAO
+from dao.conteo_dao import ConteoDAO, AsyncConteoDAO, EXPORT_COLUMNAS
+from dao.serie_dao import SerieDAO, AsyncSerieDAO, TIPOS_SERIE, minuto
+from cache import get_cache
+from results_export import (
+    RESULTS_EXPORT_CHUNK_ROWS, ExportStream, AsyncExportStream, acquire_slot, release_slot,
+    encoder, fetch_batches, fetch_batches_async
+)
+from versions import RESULTADOS, ESTRUCTURA, get_version
+from search_index import CIRCUIT_SEARCH_LIMIT, get_index
+
+# Fuente de los resultados: 'conteos' (contadores mantenidos en cada voto, O(candidatos))
+# o 'votos' (recuento sobre las tablas crudas, para verificar los contadores)
+RESULTS_SOURCE = os.getenv('RESULTS_SOURCE', 'conteos').lower()
+
+# Caché de resultados por alcance (total, departamento, unidad o nivel geográfico,
+# circuito, departamentos):
+# - RESULTS_CACHE_STALE_S: atraso tolerado tras un voto antes de recalcular
+# - RESULTS_CACHE_TTL_S:   vida máxima de una entrada (acota el atraso respecto de
+#                          votos registrados en otros workers)
+RESULTS_CACHE_ENABLED = os.getenv('RESULTS_CACHE_ENABLED', 'true').lower() == 'true'
+RESULTS_CACHE_MAX_ENTRIES = int(os.getenv('RESULTS_CACHE_MAX_ENTRIES', '256'))
+RESULTS_CACHE_STALE_S = float(os.getenv('RESULTS_CACHE_STALE_S', '1'))
+RESULTS_CACHE_TTL_S = float(os.getenv('RESULTS_CACHE_TTL_S', '30'))
+
+# Circuitos máximos por pedido a POST /api/resultados/circuitos
+RESULTS_BATCH_MAX_CIRCUITS = int(os.getenv('RESULTS_BATCH_MAX_CIRCUITS', '5000'))
+
+# Series por minuto (GET /api/resultados/series): pasos de agregación en minutos
+# (todos dividen el día, así los puntos caen en horas redondas) y puntos máximos
+PASOS_SERIE = (1, 5, 10, 15, 30, 60, 120, 180, 360, 720, 1440)
+RESULTS_SERIES_MAX_POINTS = int(os.getenv('RESULTS_SERIES_MAX_POINTS', '1440'))
+
+_cache = get_cache('resultados', RESULTS_CACHE_MAX_ENTRIES, RESULTS_CACHE_STALE_S, RESULTS_CACHE_TTL_S)
+
+def results_version() -> tuple:
+    """Versión de los datos que leen los resultados (se lee antes de calcular)"""
+    return (get_version(RESULTADOS), get_version(ESTRUCTURA))
+
+def _results_from_totals(eleccion: Optional[dict], resultados_raw: list, totales: dict, departamento: Optional[str]) -> dict:
+    """Armar la respuesta de /api/resultados a partir de los contadores"""
+    resultados = [{"candidato": r["candidato"], "partido": r["partido"], "votos": r["votos"]} for r in resultados_raw]
+    # Sin elección activa no hay votos que contar (los observados y votantes sí)
+    if eleccion:
+        votos_blanco, votos_anulados = totales['blanco'], totales['anulado']
+        total_votos = totales['candidato'] + votos_blanco + votos_anulados
+    else:
+        votos_blanco = votos_anulados = total_votos = 0
+    total_votantes = totales['votantes']
+    participacion = (total_votos / total_votantes * 100) if total_votantes > 0 else 0
+    return {
+        "resultados": resultados,
+        "votos_blanco": votos_blanco,
+        "votos_anulados": votos_anulados,
+        "total_votos": total_votos,
+        "total_votantes": total_votantes,
+        "participacion": round(participacion, 1),
+        "votos_observados": totales['observado'],
+        "mesas_cerradas": 0,
+        "total_mesas": 0,
+        "departamento": departamento,
+        "año_eleccion": eleccion['año'] if eleccion else 2024
+    }
+
+def _circuit_results_from_totals(circuit_info: dict, resultados: list, totales: dict) -> dict:
+    """Armar la respuesta de /api/resultados/circuito a partir de los contadores"""
+    return {
+        "circuito": circuit_info,
+        "resultados": resultados,
+        "votos_blanco": totales['blanco'],
+        "votos_anulados": totales['anulado'],
+        "total_votos": totales['candidato'] + totales['blanco'] + totales['anulado']
+    }
+
+def _results_from_summary(resumen: dict, departamento: Optional[str]) -> dict:
+    """Armar la respuesta de /api/resultados a partir del resumen de ResultadoDAO"""
+    resultados = [{"candidato": r["candidato"], "partido": r["partido"], "votos": r["votos"]} for r in resumen['resultados']]
+    total_votantes = resumen['total_votantes']
+    participacion = (resumen['total_votos'] / total_votantes * 100) if total_votantes > 0 else 0
+    return {
+        "resultados": resultados,
+        "votos_blanco": resumen['votos_blanco'],
+        "votos_anulados": resumen['votos_anulados'],
+        "total_votos": resumen['total_votos'],
+        "total_votantes": total_votantes,
+        "participacion": round(participacion, 1),
+        "votos_observados": resumen['votos_observados'],
+        "mesas_cerradas": 0,
+        "total_mesas": 0,  # TODO: implementar en DAO si es necesario
+        "departamento": departamento,
+        "año_eleccion": resumen['año_eleccion']
+    }
 
 def get_results(departamento: Optional[str] = None) -> dict:
-    """Obtener resultados de votación"""
-    with get_db_connection() as connection:
-        # Obtener información de la elección activa
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT año FROM elecciones WHERE activa = TRUE LIMIT 1")
-        eleccion_activa = cursor.fetchone()
-        cursor.close()
-        
-        año_eleccion = eleccion_activa['año'] if eleccion_activa else 2024
-        
-        # Obtener votos por candidato
-        resultados_raw = ResultadoDAO.get_votes_by_candidate(connection, departamento)
-        resultados = [{"candidato": r["candidato"], "partido": r["partido"], "votos": r["votos"]} for r in resultados_raw]
+    """Obtener resultados de votación (cacheados)"""
+    return get_results_versioned(departamento)[0]
+
+def get_results_versioned(departamento: Optional[str] = None) -> Tuple[dict, tuple]:
+    """Resultados y versión de los datos de los que salen (para el ETag)"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED:
+        return compute_results(departamento), version
+    return _cache.get_or_compute_versioned(('resultados', departamento), version, lambda: compute_results(departamento))
+
+async def get_results_async(departamento: Optional[str] = None) -> dict:
+    """Obtener resultados de votación (cacheados) sin bloquear el event loop (DB_MODE=async)"""
+    return (await get_results_versioned_async(departamento))[0]
+
+async def get_results_versioned_async(departamento: Optional[str] = None) -> Tuple[dict, tuple]:
+    """Resultados y versión de los datos sin bloquear el event loop (DB_MODE=async)"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED:
+        return await compute_results_async(departamento), version
+    return await _cache.get_or_compute_versioned_async(('resultados', departamento), version, lambda: compute_results_async(departamento))
+
+@workload('lectura')
+def compute_results(departamento: Optional[str] = None) -> dict:
+    """Calcular resultados de votación contra la base"""
+    with get_db_connection(read_only=True) as connection:
+        if RESULTS_SOURCE == 'conteos':
+            eleccion = ResultadoDAO.get_active_election(connection)
+            eleccion_id = eleccion['id'] if eleccion else None
+            resultados_raw = ConteoDAO.get_votes_by_candidate(connection, eleccion_id, departamento) if eleccion else []
+            totales = ConteoDAO.get_totals(connection, eleccion_id, departamento)
+            return _results_from_totals(eleccion, resultados_raw, totales, departamento)
         
-        # Obtener estadísticas
-        votos_blanco = ResultadoDAO.get_blank_votes(connection, departamento)
-        votos_anulados = ResultadoDAO.get_nullified_votes(connection, departamento)
-        total_votos = ResultadoDAO.get_total_votes(connection, departamento)
-        total_votantes = ResultadoDAO.get_total_voters(connection, departamento)
-        votos_observados = ResultadoDAO.get_observed_votes(connection, departamento)
+        resumen = ResultadoDAO.get_results_summary(connection, departamento)
+        return _results_from_summary(resumen, departamento)
+
+async def compute_results_async(departamento: Optional[str] = None) -> dict:
+    """Calcular resultados de votación sin bloquear el event loop (DB_MODE=async)"""
+    async with get_async_db_connection() as connection:
+        if RESULTS_SOURCE == 'conteos':
+            eleccion = await AsyncResultadoDAO.get_active_election(connection)
+            eleccion_id = eleccion['id'] if eleccion else None
+            resultados_raw = await AsyncConteoDAO.get_votes_by_candidate(connection, eleccion_id, departamento) if eleccion else []
+            totales = await AsyncConteoDAO.get_totals(connection, eleccion_id, departamento)
+            return _results_from_totals(eleccion, resultados_raw, totales, departamento)
         
-        participacion = (total_votos / total_votantes * 100) if total_votantes > 0 else 0
-        mesas_cerradas = 0
-        total_mesas = 0  # TODO: implementar en DAO si es necesario
-    
-        return {
-            "resultados": resultados,
-            "votos_blanco": votos_blanco,
-            "votos_anulados": votos_anulados,
-            "total_votos": total_votos,
-            "total_votantes": total_votantes,
-            "participacion": round(participacion, 1),
-            "votos_observados": votos_observados,
-            "mesas_cerradas": mesas_cerradas,
-            "total_mesas": total_mesas,
-            "departamento": departamento,
-            "año_eleccion": año_eleccion
-        }
+        resumen = await AsyncResultadoDAO.get_results_summary(connection, departamento)
+        return _results_from_summary(resumen, departamento)
 
 def get_departments() -> list:
-    """Obtener lista de departamentos disponibles"""
-    with get_db_connection() as connection:
+    """Obtener lista de departamentos disponibles (cacheada)"""
+    return get_departments_versioned()[0]
+
+def get_departments_versioned() -> Tuple[list, tuple]:
+    """Departamentos y versión de los datos de los que salen (para el ETag)"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED:
+        return compute_departments(), version
+    return _cache.get_or_compute_versioned(('departamentos',), version, compute_departments)
+
+async def get_departments_async() -> list:
+    """Obtener lista de departamentos (cacheada) sin bloquear el event loop (DB_MODE=async)"""
+    return (await get_departments_versioned_async())[0]
+
+async def get_departments_versioned_async() -> Tuple[list, tuple]:
+    """Departamentos y versión de los datos sin bloquear el event loop (DB_MODE=async)"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED:
+        return await compute_departments_async(), version
+    return await _cache.get_or_compute_versioned_async(('departamentos',), version, compute_departments_async)
+
+def get_unit_results_versioned(nivel: str, clave: str) -> Tuple[dict, tuple]:
+    """Resultados de una unidad geográfica (ciudad, zona, barrio, establecimiento) por su clave y versión de los datos"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED:
+        return compute_unit_results(nivel, clave), version
+    return _cache.get_or_compute_versioned(('unidad', nivel, clave), version, lambda: compute_unit_results(nivel, clave))
+
+async def get_unit_results_versioned_async(nivel: str, clave: str) -> Tuple[dict, tuple]:
+    """Resultados de una unidad geográfica sin bloquear el event loop (DB_MODE=async)"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED:
+        return await compute_unit_results_async(nivel, clave), version
+    return await _cache.get_or_compute_versioned_async(('unidad', nivel, clave), version, lambda: compute_unit_results_async(nivel, clave))
+
+def _unit_results(eleccion: Optional[dict], resultados_raw: list, totales: dict, nivel: str, clave: str) -> dict:
+    resultados = _results_from_totals(eleccion, resultados_raw, totales, None)
+    del resultados['departamento']
+    return dict(resultados, nivel=nivel, clave=clave)
+
+@workload('lectura')
+def compute_unit_results(nivel: str, clave: str) -> dict:
+    """Leer los resultados de una unidad de conteos_geo (siempre de los contadores)"""
+    with get_db_connection(read_only=True) as connection:
+        eleccion = ResultadoDAO.get_active_election(connection)
+        eleccion_id = eleccion['id'] if eleccion else None
+        resultados_raw = ConteoDAO.get_votes_by_candidate(connection, eleccion_id, nivel=nivel, clave=clave) if eleccion else []
+        totales = ConteoDAO.get_totals(connection, eleccion_id, nivel=nivel, clave=clave)
+        return _unit_results(eleccion, resultados_raw, totales, nivel, clave)
+
+async def compute_unit_results_async(nivel: str, clave: str) -> dict:
+    """Leer los resultados de una unidad sin bloquear el event loop (DB_MODE=async)"""
+    async with get_async_db_connection() as connection:
+        eleccion = await AsyncResultadoDAO.get_active_election(connection)
+        eleccion_id = eleccion['id'] if eleccion else None
+        resultados_raw = await AsyncConteoDAO.get_votes_by_candidate(connection, eleccion_id, nivel=nivel, clave=clave) if eleccion else []
+        totales = await AsyncConteoDAO.get_totals(connection, eleccion_id, nivel=nivel, clave=clave)
+        return _unit_results(eleccion, resultados_raw, totales, nivel, clave)
+
+def get_level_results_versioned(nivel: str, dentro: Optional[str] = None) -> Tuple[dict, tuple]:
+    """Resultados de todas las unidades de un nivel y versión de los datos (para el ETag)"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED:
+        return compute_level_results(nivel, dentro), version
+    return _cache.get_or_compute_versioned(('nivel', nivel, dentro), version, lambda: compute_level_results(nivel, dentro))
+
+async def get_level_results_versioned_async(nivel: str, dentro: Optional[str] = None) -> Tuple[dict, tuple]:
+    """Resultados de todas las unidades de un nivel sin bloquear el event loop (DB_MODE=async)"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED:
+        return await compute_level_results_async(nivel, dentro), version
+    return await _cache.get_or_compute_versioned_async(('nivel', nivel, dentro), version, lambda: compute_level_results_async(nivel, dentro))
+
+def _votes_by_candidate(candidatos: list, votos: dict) -> list:
+    """Votos por candidato presidencial (0 si no tiene), de mayor a menor"""
+    return sorted(
+        ({"candidato": c['candidato'], "partido": c['partido'], "votos": votos.get(c['id'], 0)} for c in candidatos),
+        key=lambda r: -r['votos']
+    )
+
+def _level_results(eleccion: Optional[dict], nivel: str, dentro: Optional[str], datos: dict) -> dict:
+    """Armar los resultados por unidad a partir de los contadores del nivel"""
+    unidades = []
+    for clave, unidad in sorted(datos['unidades'].items()):
+        resultados_raw = _votes_by_candidate(datos['candidatos'], unidad['candidatos'])
+        resultados = _unit_results(eleccion, resultados_raw, unidad['totales'], nivel, clave)
+        for campo in ('nivel', 'mesas_cerradas', 'total_mesas', 'año_eleccion'):
+            del resultados[campo]
+        unidades.append(resultados)
+    return {"nivel": nivel, "dentro": dentro, "año_eleccion": eleccion['año'] if eleccion else 2024, "unidades": unidades}
+
+@workload('lectura')
+def compute_level_results(nivel: str, dentro: Optional[str] = None) -> dict:
+    """Leer los contadores de todas las unidades de un nivel en una sola lectura agrupada"""
+    with get_db_connection(read_only=True) as connection:
+        eleccion = ResultadoDAO.get_active_election(connection)
+        datos = ConteoDAO.get_level(connection, eleccion['id'] if eleccion else None, nivel, dentro)
+        return _level_results(eleccion, nivel, dentro, datos)
+
+async def compute_level_results_async(nivel: str, dentro: Optional[str] = None) -> dict:
+    """Leer los contadores de un nivel sin bloquear el event loop (DB_MODE=async)"""
+    async with get_async_db_connection() as connection:
+        eleccion = await AsyncResultadoDAO.get_active_election(connection)
+        datos = await AsyncConteoDAO.get_level(connection, eleccion['id'] if eleccion else None, nivel, dentro)
+        return _level_results(eleccion, nivel, dentro, datos)
+
+@workload('lectura')
+def compute_departments() -> list:
+    """Leer la lista de departamentos de la base"""
+    with get_db_connection(read_only=True) as connection:
         return ResultadoDAO.get_departments(connection)
 
+async def compute_departments_async() -> list:
+    """Leer la lista de departamentos sin bloquear el event loop (DB_MODE=async)"""
+    async with get_async_db_connection() as connection:
+        return await AsyncResultadoDAO.get_departments(connection)
+
 def get_circuit_results(circuito: str) -> dict:
-    """Obtener resultados por circuito"""
-    with get_db_connection() as connection:
+    """Obtener resultados por circuito (cacheados)"""
+    if not RESULTS_CACHE_ENABLED:
+        return compute_circuit_results(circuito)
+    return _cache.get_or_compute(('circuito', circuito), results_version(), lambda: compute_circuit_results(circuito))
+
+async def get_circuit_results_async(circuito: str) -> dict:
+    """Obtener resultados por circuito (cacheados) sin bloquear el event loop (DB_MODE=async)"""
+    if not RESULTS_CACHE_ENABLED:
+        return await compute_circuit_results_async(circuito)
+    return await _cache.get_or_compute_async(('circuito', circuito), results_version(), lambda: compute_circuit_results_async(circuito))
+
+@workload('lectura')
+def compute_circuit_results(circuito: str) -> dict:
+    """Calcular resultados por circuito contra la base"""
+    with get_db_connection(read_only=True) as connection:
+        if RESULTS_SOURCE == 'conteos':
+            circuit_info = ResultadoDAO.get_circuit_info(connection, circuito)
+            eleccion = ResultadoDAO.get_active_election(connection) if circuit_info else None
+            if not eleccion:
+                return {"error": "Circuito no encontrado"}
+            resultados = ConteoDAO.get_votes_by_candidate(connection, eleccion['id'], numero_circuito=circuito)
+            totales = ConteoDAO.get_totals(connection, eleccion['id'], numero_circuito=circuito)
+            return _circuit_results_from_totals(circuit_info, resultados, totales)
+        
         result = ResultadoDAO.get_circuit_results(connection, circuito)
         if not result:
             return {"error": "Circuito no encontrado"}
         return result
 
+async def compute_circuit_results_async(circuito: str) -> dict:
+    """Calcular resultados por circuito sin bloquear el event loop (DB_MODE=async)"""
+    async with get_async_db_connection() as connection:
+        if RESULTS_SOURCE == 'conteos':
+            circuit_info = await AsyncResultadoDAO.get_circuit_info(connection, circuito)
+            eleccion = await AsyncResultadoDAO.get_active_election(connection) if circuit_info else None
+            if not eleccion:
+                return {"error": "Circuito no encontrado"}
+            resultados = await AsyncConteoDAO.get_votes_by_candidate(connection, eleccion['id'], numero_circuito=circuito)
+            totales = await AsyncConteoDAO.get_totals(connection, eleccion['id'], numero_circuito=circuito)
+            return _circuit_results_from_totals(circuit_info, resultados, totales)
+        
+        result = await AsyncResultadoDAO.get_circuit_results(connection, circuito)
+        if not result:
+            return {"error": "Circuito no encontrado"}
+        return result
+
+def get_results_snapshot() -> dict:
+    """Resultados nacionales y por departamento (para el stream en vivo)"""
+    return {
+        "nacional": get_results(),
+        "departamentos": {d['nombre']: get_results(d['nombre']) for d in get_departments()},
+    }
+
+async def get_results_snapshot_async() -> dict:
+    """Resultados nacionales y por departamento sin bloquear el event loop (DB_MODE=async)"""
+    departamentos = await get_departments_async()
+    return {
+        "nacional": await get_results_async(),
+        "departamentos": {d['nombre']: await get_results_async(d['nombre']) for d in departamentos},
+    }
+
+def get_circuits_results_versioned(circuitos: Optional[list] = None, departamento: Optional[str] = None) -> Tuple[dict, tuple]:
+    """Resultados de varios circuitos (lista, departamento o todos) y versión de los datos
+
+    Se cachean los pedidos por departamento o de todo el país; las listas arbitrarias
+    se calculan cada vez.
+    """
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED or circuitos is not None:
+        return compute_circuits_results(circuitos, departamento), version
+    return _cache.get_or_compute_versioned(('circuitos', departamento), version,
+                                           lambda: compute_circuits_results(None, departamento))
+
+async def get_circuits_results_versioned_async(circuitos: Optional[list] = None,
+                                               departamento: Optional[str] = None) -> Tuple[dict, tuple]:
+    """Resultados de varios circuitos sin bloquear el event loop (DB_MODE=async)"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED or circuitos is not None:
+        return await compute_circuits_results_async(circuitos, departamento), version
+    return await _cache.get_or_compute_versioned_async(('circuitos', departamento), version,
+                                                       lambda: compute_circuits_results_async(None, departamento))
+
+def _circuits_results(eleccion: Optional[dict], circuitos: Optional[list], datos: Optional[dict]) -> dict:
+    """Armar los resultados de cada circuito en el orden pedido; los que no existen van a no_encontrados"""
+    if not eleccion:
+        return {"circuitos": [], "no_encontrados": circuitos or []}
+    numeros = circuitos if circuitos is not None else sorted(datos['circuitos'])
+    encontrados, no_encontrados = [], []
+    for numero in numeros:
+        circuito = datos['circuitos'].get(numero)
+        if circuito is None:
+            no_encontrados.append(numero)
+            continue
+        resultados = _votes_by_candidate(datos['candidatos'], circuito['candidatos'])
+        encontrados.append(_circuit_results_from_totals(circuito['circuito'], resultados, circuito['totales']))
+    return {"circuitos": encontrados, "no_encontrados": no_encontrados}
+
+@workload('lectura')
+def compute_circuits_results(circuitos: Optional[list] = None, departamento: Optional[str] = None) -> dict:
+    """Leer los contadores de varios circuitos en una consulta agrupada (siempre de los contadores)"""
+    with get_db_connection(read_only=True) as connection:
+        eleccion = ResultadoDAO.get_active_election(connection)
+        datos = ConteoDAO.get_circuits(connection, eleccion['id'], circuitos, departamento) if eleccion else None
+        return _circuits_results(eleccion, circuitos, datos)
+
+async def compute_circuits_results_async(circuitos: Optional[list] = None, departamento: Optional[str] = None) -> dict:
+    """Leer los contadores de varios circuitos sin bloquear el event loop (DB_MODE=async)"""
+    async with get_async_db_connection() as connection:
+        eleccion = await AsyncResultadoDAO.get_active_election(connection)
+        datos = await AsyncConteoDAO.get_circuits(connection, eleccion['id'], circuitos, departamento) if eleccion else None
+        return _circuits_results(eleccion, circuitos, datos)
+
+def get_series_versioned(nivel: str, clave: Optional[str] = None, desde: Optional[datetime] = None,
+                         hasta: Optional[datetime] = None, paso: Optional[int] = None) -> Tuple[dict, tuple]:
+    """Serie de votos, autorizaciones y observados de un alcance y versión de los datos (para el ETag)"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED:
+        return compute_series(nivel, clave, desde, hasta, paso), version
+    return _cache.get_or_compute_versioned(('series', nivel, clave, desde, hasta, paso), version,
+                                           lambda: compute_series(nivel, clave, desde, hasta, paso))
+
+async def get_series_versioned_async(nivel: str, clave: Optional[str] = None, desde: Optional[datetime] = None,
+                                     hasta: Optional[datetime] = None, paso: Optional[int] = None) -> Tuple[dict, tuple]:
+    """Serie de un alcance sin bloquear el event loop (DB_MODE=async)"""
+    version = results_version()
+    if not RESULTS_CACHE_ENABLED:
+        return await compute_series_async(nivel, clave, desde, hasta, paso), version
+    return await _cache.get_or_compute_versioned_async(('series', nivel, clave, desde, hasta, paso), version,
+                                                       lambda: compute_series_async(nivel, clave, desde, hasta, paso))
+
+def _inicio_bucket(momento: datetime, paso: int) -> datetime:
+    """Inicio del punto de 'paso' minutos que contiene a momento (contado desde la medianoche)"""
+    momento = minuto(momento)
+    return momento - timedelta(minutes=(momento.hour * 60 + momento.minute) % paso)
+
+def _puntos(inicio: datetime, fin: datetime, paso: int) -> int:
+    return max(0, (fin - _inicio_bucket(inicio, paso)) // timedelta(minutes=paso) + 1)
+
+def _serie(nivel: str, clave: Optional[str], filas: list, desde: Optional[datetime],
+           hasta: Optional[datetime], paso: Optional[int]) -> dict:
+    """Arrays por tipo con un valor por punto (ceros donde no hubo actividad)
+
+    Sin desde, la serie arranca en el primer minuto con datos; sin hasta, termina en
+    el minuto actual. Sin paso se usa el menor que no supere RESULTS_SERIES_MAX_POINTS.
+    """
+    inicio = minuto(desde) if desde else (filas[0][0] if filas else None)
+    fin = minuto(hasta or datetime.now())
+    if inicio is None:
+        return {"nivel": nivel, "clave": clave, "desde": None, "hasta": fin, "paso_minutos": paso or PASOS_SERIE[0],
+                "puntos": 0, **{tipo: [] for tipo in TIPOS_SERIE}}
+    if paso is None:
+        paso = next((p for p in PASOS_SERIE if _puntos(inicio, fin, p) <= RESULTS_SERIES_MAX_POINTS), PASOS_SERIE[-1])
+    puntos = _puntos(inicio, fin, paso)
+    if puntos > RESULTS_SERIES_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"La serie tendría {puntos} puntos (máximo {RESULTS_SERIES_MAX_POINTS}); "
+                                                    "usar un paso mayor o un rango menor")
+    inicio = _inicio_bucket(inicio, paso)
+    ancho = timedelta(minutes=paso)
+    series = {tipo: [0] * puntos for tipo in TIPOS_SERIE}
+    for momento, tipo, cantidad in filas:
+        i = (momento - inicio) // ancho
+        if 0 <= i < puntos:
+            series[tipo][i] += int(cantidad)
+    return {"nivel": nivel, "clave": clave, "desde": inicio, "hasta": fin, "paso_minutos": paso, "puntos": puntos, **series}
+
+def _rango_consulta(desde: Optional[datetime], hasta: Optional[datetime]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Límites de la lectura: desde el inicio del día de 'desde', así cubre el primer punto con cualquier paso"""
+    return (_inicio_bucket(desde, PASOS_SERIE[-1]) if desde else None), (minuto(hasta) if hasta else None)
+
+@workload('lectura')
+def compute_series(nivel: str, clave: Optional[str] = None, desde: Optional[datetime] = None,
+                   hasta: Optional[datetime] = None, paso: Optional[int] = None) -> dict:
+    """Leer la serie por minuto del alcance (nacional, departamento o circuito) y agruparla por paso"""
+    with get_db_connection(read_only=True) as connection:
+        filas = SerieDAO.get_series(connection, nivel, clave, *_rango_consulta(desde, hasta))
+    return _serie(nivel, clave, filas, desde, hasta, paso)
+
+async def compute_series_async(nivel: str, clave: Optional[str] = None, desde: Optional[datetime] = None,
+                               hasta: Optional[datetime] = None, paso: Optional[int] = None) -> dict:
+    """Leer la serie por minuto sin bloquear el event loop (DB_MODE=async)"""
+    async with get_async_db_connection() as connection:
+        filas = await AsyncSerieDAO.get_series(connection, nivel, clave, *_rango_consulta(desde, hasta))
+    return _serie(nivel, clave, filas, desde, hasta, paso)
+
+def _export_ocupado() -> HTTPException:
+    return HTTPException(status_code=503, detail="Hay otras exportaciones en curso, reintente en unos segundos",
+                         headers={"Retry-After": "5"})
+
+def _close_cursor(cursor):
+    try:
+        cursor.close()
+    except mysql.connector.Error:
+        # Filas sin leer (exportación cortada): la conexión queda con unread_result y
+        # el pool la descarta al devolverla, sin leer el resto
+        pass
+
+@workload('lectura')
+def open_results_export(formato: str, comprimir: bool = False) -> Tuple[ExportStream, Optional[dict]]:
+    """Abrir la exportación completa de la elección activa (una fila por circuito y contador)
+
+    La conexión se toma y la consulta se lanza antes de devolver el iterador, así un
+    pool lleno o una base caída responden con error en vez de cortar el archivo a la
+    mitad. Las filas se leen por lotes de un cursor sin buffer: la memoria queda
+    acotada a un lote sin importar el tamaño de la elección.
+    """
+    if not acquire_slot():
+        raise _export_ocupado()
+    pila = ExitStack()
+    pila.callback(release_slot)
+    try:
+        codificador = encoder(formato, EXPORT_COLUMNAS, comprimir)
+        connection = pila.enter_context(get_db_connection(read_only=True))
+        eleccion = ResultadoDAO.get_active_election(connection)
+        cursor = None
+        if eleccion:
+            cursor = ConteoDAO.open_export(connection, eleccion['id'])
+            pila.callback(_close_cursor, cursor)
+    except BaseException:
+        pila.close()
+        raise
+    return ExportStream(codificador, fetch_batches(cursor, RESULTS_EXPORT_CHUNK_ROWS), pila.close), eleccion
+
+async def open_results_export_async(formato: str, comprimir: bool = False) -> Tuple[AsyncExportStream, Optional[dict]]:
+    """Abrir la exportación completa con un SSCursor de aiomysql (DB_MODE=async)"""
+    if not acquire_slot():
+        raise _export_ocupado()
+    pila = AsyncExitStack()
+    pila.callback(release_slot)
+    try:
+        codificador = encoder(formato, EXPORT_COLUMNAS, comprimir)
+        connection = await pila.enter_async_context(get_async_db_connection())
+        eleccion = await AsyncResultadoDAO.get_active_election(connection)
+        cursor = None
+        if eleccion:
+            cursor = await AsyncConteoDAO.open_export(connection, eleccion['id'])
+            pila.push_async_callback(cursor.close)
+    except BaseException:
+        await pila.aclose()
+        raise
+    return AsyncExportStream(codificador, fetch_batches_async(cursor, RESULTS_EXPORT_CHUNK_ROWS), pila.aclose), eleccion
+
+def _load_circuit_directory() -> list:
+    with get_db_connection(read_only=True) as connection:
+        return ResultadoDAO.get_circuit_directory(connection)
+
+@workload('lectura')
 def search_circuits(search_term: str) -> list:
-    """Buscar circuitos por número"""
-    print(f"🔍 Servicio: Buscando circuitos con término: '{search_term}'")
-    with get_db_connection() as connection:
-        result = ResultadoDAO.search_circuits(connection, search_term)
-        print(f"🔍 Servicio: Resultado obtenido: {result}")
-        return result
\ No newline at end of file
+    """Buscar circuitos por número o nombre del establecimiento en el índice del proceso ('ALL' lista todos)"""
+    indice = get_index(_load_circuit_directory)
+    if search_term.strip().upper() == "ALL":
+        return indice.all()
+    return indice.search(search_term, CIRCUIT_SEARCH_LIMIT)
\ No newline at end of file
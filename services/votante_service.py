@@ -1,10 +1,15 @@
 from fastapi import HTTPException
-from datetime import datetime
-from database import get_db_connection, get_db_transaction
-from dao.votante_dao import VotanteDAO
-from dao.credencial_dao import CredencialDAO
+from database import get_db_connection, get_db_transaction, get_async_db_transaction, AsyncDictCursor, workload
+from dao.votante_dao import VotanteDAO, AsyncVotanteDAO
+from dao.credencial_dao import CredencialDAO, AsyncCredencialDAO
+from dao.mesa_dao import MesaDAO
+from dao.conteo_dao import ConteoDAO, AsyncConteoDAO
+from dao.serie_dao import SerieDAO, AsyncSerieDAO, momento_actual
+from versions import RESULTADOS, bumps
 from schemas import VoteEnableRequest, VotanteStatus
 
+@workload('votacion')
+@bumps(RESULTADOS)
 def enable_voter(request: VoteEnableRequest, current_user: str) -> dict:
     """Autorizar votante con verificación de circuito"""
     with get_db_transaction() as connection:
@@ -12,16 +17,11 @@ def enable_voter(request: VoteEnableRequest, current_user: str) -> dict:
         credencial_a_autorizar = request.credencial_civica if request.esEspecial and request.credencial_civica else request.credencial
         
         # Obtener el ID real del circuito a partir del número de circuito
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT id FROM circuitos WHERE numero_circuito = %s", (request.circuito,))
-        circuito_db = cursor.fetchone()
-        cursor.close()
+        circuito_id = MesaDAO.get_circuito_id_by_numero(connection, request.circuito)
         
-        if not circuito_db:
+        if not circuito_id:
             raise HTTPException(status_code=400, detail=f"Circuito {request.circuito} no encontrado")
         
-        circuito_id = circuito_db['id']
-        
         # Verificar si ya está autorizado
         existing_auth = VotanteDAO.get_authorization(connection, credencial_a_autorizar)
         
@@ -50,10 +50,12 @@ def enable_voter(request: VoteEnableRequest, current_user: str) -> dict:
             'circuito_id': circuito_id,
             'estado': 'HABILITADA',
             'autorizado_por': current_user,
-            'fecha_autorizacion': datetime.now(),
+            'fecha_autorizacion': momento_actual(),
             'es_autorizacion_especial': request.esEspecial or False
         }
         VotanteDAO.create_authorization(connection, auth_data)
+        ConteoDAO.add(connection, circuito_id, 'votantes')
+        SerieDAO.add(connection, circuito_id, 'autorizaciones', auth_data['fecha_autorizacion'])
         
         tipo_voto = "observado" if request.esEspecial else "normal"
         mensaje_extra = ""
@@ -64,19 +66,66 @@ def enable_voter(request: VoteEnableRequest, current_user: str) -> dict:
         
         return {"mensaje": f"Votante {credencial_a_autorizar} autorizado exitosamente para voto {tipo_voto}{mensaje_extra}"}
 
+@bumps(RESULTADOS)
+async def enable_voter_async(request: VoteEnableRequest, current_user: str) -> dict:
+    """Autorizar votante sin bloquear el event loop (DB_MODE=async)"""
+    async with get_async_db_transaction() as connection:
+        credencial_a_autorizar = request.credencial_civica if request.esEspecial and request.credencial_civica else request.credencial
+        
+        async with connection.cursor(AsyncDictCursor) as cursor:
+            await cursor.execute("SELECT id FROM circuitos WHERE numero_circuito = %s", (request.circuito,))
+            circuito_db = await cursor.fetchone()
+        
+        if not circuito_db:
+            raise HTTPException(status_code=400, detail=f"Circuito {request.circuito} no encontrado")
+        
+        circuito_id = circuito_db['id']
+        
+        if await AsyncVotanteDAO.get_authorization(connection, credencial_a_autorizar):
+            raise HTTPException(status_code=400, detail="Votante ya autorizado")
+        
+        is_authorized_for_circuit = await AsyncCredencialDAO.is_credencial_authorized_for_circuit(
+            connection, credencial_a_autorizar, request.circuito
+        )
+        
+        circuito_correcto = None
+        if not is_authorized_for_circuit:
+            circuito_correcto = await AsyncCredencialDAO.get_circuito_by_credencial(connection, credencial_a_autorizar)
+        
+        if not is_authorized_for_circuit and not request.esEspecial:
+            circuito_msg = f" (pertenece al circuito {circuito_correcto['numero_circuito']})" if circuito_correcto else ""
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Credencial no autorizada para este circuito{circuito_msg}. Debe ser registrada como voto observado."
+            )
+        
+        auth_data = {
+            'credencial': credencial_a_autorizar,
+            'circuito_id': circuito_id,
+            'estado': 'HABILITADA',
+            'autorizado_por': current_user,
+            'fecha_autorizacion': momento_actual(),
+            'es_autorizacion_especial': request.esEspecial or False
+        }
+        await AsyncVotanteDAO.create_authorization(connection, auth_data)
+        await AsyncConteoDAO.add(connection, circuito_id, 'votantes')
+        await AsyncSerieDAO.add(connection, circuito_id, 'autorizaciones', auth_data['fecha_autorizacion'])
+        
+        tipo_voto = "observado" if request.esEspecial else "normal"
+        mensaje_extra = f" (credencial pertenece al circuito {circuito_correcto['numero_circuito']})" if circuito_correcto else ""
+        
+        return {"mensaje": f"Votante {credencial_a_autorizar} autorizado exitosamente para voto {tipo_voto}{mensaje_extra}"}
+
+@workload('votacion')
 def get_voter_status(circuito: str, credencial: str) -> VotanteStatus:
     """Verificar estado de votante"""
     with get_db_connection() as connection:
         # Obtener el ID real del circuito a partir del número de circuito
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT id FROM circuitos WHERE numero_circuito = %s", (circuito,))
-        circuito_db = cursor.fetchone()
-        cursor.close()
+        circuito_id = MesaDAO.get_circuito_id_by_numero(connection, circuito)
         
-        if not circuito_db:
+        if not circuito_id:
             raise HTTPException(status_code=404, detail=f"Circuito {circuito} no encontrado")
         
-        circuito_id = circuito_db['id']
         # Primero buscar por circuito específico
         auth_record = VotanteDAO.get_authorization(connection, credencial, circuito_id)
         
@@ -96,18 +145,15 @@ def get_voter_status(circuito: str, credencial: str) -> VotanteStatus:
             es_autorizacion_especial=auth_record.get('es_autorizacion_especial', False)
         )
 
+@workload('votacion')
 def get_voters_by_circuit(circuito: str) -> list:
     """Listar votantes por circuito"""
     with get_db_connection() as connection:
         # Obtener el ID real del circuito a partir del número de circuito
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT id FROM circuitos WHERE numero_circuito = %s", (circuito,))
-        circuito_db = cursor.fetchone()
-        cursor.close()
+        circuito_id = MesaDAO.get_circuito_id_by_numero(connection, circuito)
         
-        if not circuito_db:
+        if not circuito_id:
             return []
         
-        circuito_id = circuito_db['id']
         votantes = VotanteDAO.get_voters_by_circuit(connection, circuito_id)
         return [{"credencial": v["credencial"], "estado": v["estado"], "fecha_autorizacion": v["fecha_autorizacion"]} for v in votantes]
\ No newline at end of file
@@ -1,101 +1,286 @@
 from fastapi import HTTPException
+from collections import Counter
+from concurrent.futures import Future
 from datetime import datetime
 from typing import Optional
-from database import get_db_connection, get_db_transaction
-from dao.mesa_dao import MesaDAO
-from dao.votante_dao import VotanteDAO
-from dao.voto_dao import VotoDAO
-from schemas import VotoRequest, VotoResponse
+import uuid
+import mysql.connector
+from database import get_db_connection, get_db_transaction, get_async_db_transaction, workload
+from dao.votante_dao import VotanteDAO, AsyncVotanteDAO
+from dao.voto_dao import VotoDAO, AsyncVotoDAO
+from dao.conteo_dao import ConteoDAO, AsyncConteoDAO, clave_conteo, deltas_votos
+from dao.serie_dao import SerieDAO, AsyncSerieDAO, momento_actual
+from schemas import VotoRequest, VotoResponse, CurrentUser
+from batch_writer import VOTE_BATCH_ENABLED, BatchWriter, get_batch_writer
+from journal import JOURNAL_MODE, APLICADO, DUPLICADO, RECHAZADO, VoteJournal, get_journal
+from versions import RESULTADOS, bumps
 import random
 import string
 
-def generate_comprobante(circuito_id: int) -> str:
-    """Generar número de comprobante único para el circuito"""
-    with get_db_connection() as connection:
-        cursor = connection.cursor()
-        try:
-            # Obtener el último número secuencial para este circuito
-            query = """
-            SELECT numero_comprobante FROM votos 
-            WHERE circuito_id = %s AND numero_comprobante LIKE %s
-            ORDER BY id DESC LIMIT 1
-            """
-            pattern = f"C{circuito_id:03d}-%"
-            cursor.execute(query, (circuito_id, pattern))
-            result = cursor.fetchone()
-            
-            if result:
-                # Extraer el número secuencial del último comprobante
-                last_comprobante = result[0]
-                last_number = int(last_comprobante.split('-')[1])
-                next_number = last_number + 1
-            else:
-                # Primer voto del circuito
-                next_number = 1
-            
-            return f"C{circuito_id:03d}-{next_number:05d}"
-        finally:
-            cursor.close()
-
-def cast_vote(voto: VotoRequest, current_user: str) -> VotoResponse:
-    """Registrar voto"""
+def _format_comprobante(circuito_id: int, numero: int) -> str:
+    """Formato del comprobante: C<circuito>-<secuencial>"""
+    return f"C{circuito_id:03d}-{numero:05d}"
+
+def _build_vote_data(voto: VotoRequest, auth_record: dict, circuito_id: int, numero_comprobante: str, timestamp: datetime) -> dict:
+    """Armar el registro de voto a partir de la autorización"""
+    # Determinar si es voto observado basado en la autorización especial
+    es_observado = auth_record.get('es_autorizacion_especial', False)
+    estado_validacion = 'pendiente' if es_observado else 'aprobado'
+    
+    # -1 = voto anulado, 0 = voto en blanco, >0 = candidato válido
+    candidato_final = None
+    es_anulado = False
+    
+    if voto.candidato_id == -1:
+        es_anulado = True
+        candidato_final = None
+    elif voto.candidato_id == 0:
+        candidato_final = None
+    else:
+        candidato_final = voto.candidato_id
+    
+    return {
+        'numero_comprobante': numero_comprobante,
+        'candidato_id': candidato_final,
+        'timestamp': timestamp,
+        'es_observado': es_observado,
+        'estado_validacion': estado_validacion,
+        'circuito_id': circuito_id,
+        'es_anulado': es_anulado
+    }
+
+def _vote_message(vote_data: dict, auth_record: dict) -> str:
+    """Mensaje de confirmación del voto"""
+    mensaje = f"Voto registrado exitosamente. Comprobante: {vote_data['numero_comprobante']}"
+    if vote_data['es_observado']:
+        mensaje += f" (VOTO OBSERVADO - Circuito credencial: {auth_record['circuito_id']}, Circuito mesa: {vote_data['circuito_id']})"
+    return mensaje
+
+def _registrar_voto(connection, voto: VotoRequest, current_user: CurrentUser) -> VotoResponse:
+    """Registrar el voto en la transacción abierta: UPDATE condicional, reserva de comprobante e INSERT"""
+    # El circuito de la mesa viene en el token, sin leer usuarios
+    circuito_id = _circuito_de_mesa(current_user)
+    ahora = momento_actual()
+    # HABILITADA -> VOTÓ en un solo UPDATE: verifica y marca a la vez
+    if not VotanteDAO.mark_as_voted(connection, voto.credencial, ahora):
+        raise HTTPException(status_code=403, detail="Votante no autorizado para votar")
+    
+    # Comprobante y datos de la autorización en la misma transacción
+    reserva = _con_secuencia(VotoDAO.reserve_comprobante(connection, circuito_id, voto.credencial))
+    numero_comprobante = _format_comprobante(circuito_id, reserva['ultimo_numero'])
+    vote_data = _build_vote_data(voto, reserva, circuito_id, numero_comprobante, ahora)
+    VotoDAO.create_vote(connection, vote_data)
+    ConteoDAO.increment(connection, deltas_votos([vote_data]))
+    SerieDAO.add_votes(connection, [vote_data])
+    return VotoResponse(mensaje=_vote_message(vote_data, reserva))
+
+def _con_secuencia(reserva):
+    """La reserva del comprobante, o 500 si el circuito no tiene secuencia (se crea con el circuito)"""
+    if reserva is None:
+        raise HTTPException(status_code=500, detail="Circuito sin secuencia de comprobantes")
+    return reserva
+
+def _circuito_de_mesa(current_user: CurrentUser) -> int:
+    """Circuito de la mesa que registra el voto (403 para usuarios sin circuito)"""
+    if current_user.circuito_id is None:
+        raise HTTPException(status_code=403, detail="Usuario de mesa no encontrado")
+    return current_user.circuito_id
+
+@workload('votacion')
+@bumps(RESULTADOS)
+def cast_vote(voto: VotoRequest, current_user: CurrentUser) -> VotoResponse:
+    """Registrar voto (con VOTE_BATCH_MODE=true espera el commit de su lote)
+    
+    Con VOTE_JOURNAL_MODE=fallback, si no hay conexión con la base, el voto se
+    escribe en el journal local y se aplica en segundo plano.
+    """
+    if VOTE_BATCH_ENABLED:
+        return get_vote_writer().wait(enqueue_vote(voto, current_user))
+    try:
+        with get_db_transaction() as connection:
+            return _registrar_voto(connection, voto, current_user)
+    except mysql.connector.Error as e:
+        if JOURNAL_MODE != 'fallback' or not _base_no_disponible(e):
+            raise
+        print(f"Base no disponible, voto de {voto.credencial} al journal local: {e}")
+        return _journal_vote(voto, current_user)
+
+# Errores del cliente al conectar o al perder la conexión: no se pudo conectar
+# (2002, 2003), host desconocido (2005), servidor caído (2006) y conexión perdida (2013)
+_ERRNOS_SIN_CONEXION = {2002, 2003, 2005, 2006, 2013}
+
+def _base_no_disponible(error: mysql.connector.Error) -> bool:
+    """Errores de conexión con la base (caída o inalcanzable)
+
+    Un pool sin conexiones libres o un lock wait timeout son saturación de una base
+    que responde: se informan como 503 en vez de journalizar votos que la base
+    podría registrar en el próximo intento.
+    """
+    if not isinstance(error, (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError)):
+        return False
+    return getattr(error, 'errno', None) in _ERRNOS_SIN_CONEXION
+
+def get_vote_journal() -> VoteJournal:
+    """Journal de votos del worker (inicia el replayer la primera vez)"""
+    return get_journal(_aplicar_journal, 'credencial')
+
+def _journal_vote(voto: VotoRequest, current_user: CurrentUser) -> VotoResponse:
+    """Escribir el voto en el journal local con un comprobante propio
+    
+    El prefijo J distingue los comprobantes emitidos sin base de la secuencia C.
+    """
+    circuito_id = _circuito_de_mesa(current_user)
+    numero_comprobante = f"J{circuito_id:03d}-{uuid.uuid4().hex[:12].upper()}"
+    entrada = {
+        'credencial': voto.credencial,
+        'candidato_id': voto.candidato_id,
+        'circuito_id': circuito_id,
+        'numero_comprobante': numero_comprobante,
+        'timestamp': momento_actual().isoformat(),
+    }
+    if not get_vote_journal().append(entrada):
+        # La misma credencial ya tiene un voto pendiente en este worker
+        raise HTTPException(status_code=403, detail="Votante no autorizado para votar")
+    return VotoResponse(mensaje=f"Voto registrado exitosamente. Comprobante: {numero_comprobante} (pendiente de sincronización)")
+
+@workload('votacion')
+@bumps(RESULTADOS)
+def _aplicar_journal(entrada: dict) -> str:
+    """Aplicar una entrada del journal; idempotente por comprobante y por credencial"""
+    try:
+        return _aplicar_entrada(entrada)
+    except mysql.connector.IntegrityError as e:
+        # Candidato o circuito inexistente: reintentarla trabaría el journal para siempre
+        print(f"Entrada de journal inválida {entrada['numero_comprobante']}: {e}")
+        return RECHAZADO
+
+def _aplicar_entrada(entrada: dict) -> str:
     with get_db_transaction() as connection:
-        # Obtener información de la mesa que registra el voto
-        mesa_user = MesaDAO.get_by_username(connection, current_user)
-        if not mesa_user:
-            raise HTTPException(status_code=403, detail="Usuario de mesa no encontrado")
-        
-        circuito_id = mesa_user['circuito_id']
-        
-        # Para votos observados, buscar también con credencial en lugar de credencial_civica
+        if VotoDAO.get_vote_by_comprobante(connection, entrada['numero_comprobante']):
+            return DUPLICADO
+        # Entradas escritas antes de truncar los microsegundos
+        fecha_voto = datetime.fromisoformat(entrada['timestamp']).replace(microsecond=0)
+        # La credencial pudo haber votado en otra mesa mientras la base no respondía
+        if not VotanteDAO.mark_as_voted(connection, entrada['credencial'], fecha_voto):
+            return RECHAZADO
+        auth_record = VotanteDAO.get_authorization(connection, entrada['credencial'])
+        voto = VotoRequest(credencial=entrada['credencial'], candidato_id=entrada['candidato_id'])
+        vote_data = _build_vote_data(voto, auth_record, entrada['circuito_id'], entrada['numero_comprobante'], fecha_voto)
+        VotoDAO.create_vote(connection, vote_data)
+        ConteoDAO.increment(connection, deltas_votos([vote_data]))
+        SerieDAO.add_votes(connection, [vote_data])
+        return APLICADO
+
+@workload('votacion')
+def enqueue_vote(voto: VotoRequest, current_user: CurrentUser) -> Future:
+    """Validar la autorización y encolar el voto en el escritor por lotes
+    
+    El Future se resuelve con el VotoResponse cuando el lote hace commit. La
+    validación es un adelanto para responder rápido: la transición de estado
+    real sigue siendo el UPDATE condicional del lote.
+    """
+    _circuito_de_mesa(current_user)
+    with get_db_connection() as connection:
         auth_record = VotanteDAO.get_authorization(connection, voto.credencial)
-        if not auth_record or auth_record['estado'] not in ['HABILITADA']:
-            raise HTTPException(status_code=403, detail="Votante no autorizado para votar")
-        
-        # Verificar que no haya votado ya (usando tabla autorizaciones)
-        if auth_record['estado'] == 'VOTÓ':
-            raise HTTPException(status_code=400, detail="Esta credencial ya ha votado")
+    if not auth_record or auth_record['estado'] != 'HABILITADA':
+        raise HTTPException(status_code=403, detail="Votante no autorizado para votar")
+    return get_vote_writer().submit((voto, current_user, auth_record))
+
+def get_vote_writer() -> BatchWriter:
+    """Escritor por lotes de votos del worker (wait / wait_async esperan con timeout)"""
+    return get_batch_writer('votos', _flush_votos)
+
+@workload('votacion')
+@bumps(RESULTADOS)
+def _flush_votos(lote: list) -> list:
+    """Escribir un lote de votos en una transacción
     
-        # Generar comprobante único
-        numero_comprobante = generate_comprobante(circuito_id)
-        
-        # Determinar si es voto observado basado en la autorización especial
-        es_observado = auth_record.get('es_autorizacion_especial', False)
-        estado_validacion = 'pendiente' if es_observado else 'aprobado'
-        
-        # Registrar voto
-        # -1 = voto anulado, 0 = voto en blanco, >0 = candidato válido
-        candidato_final = None
-        es_anulado = False
-        
-        if voto.candidato_id == -1:
-            es_anulado = True
-            candidato_final = None
-        elif voto.candidato_id == 0:
-            candidato_final = None
+    Si falla por los datos de algún voto (credencial que ya no está habilitada,
+    error de integridad) se reintenta voto por voto; si la base no está disponible
+    el error va a todo el lote, sin multiplicar la carga.
+    """
+    # Una credencial repetida en el mismo lote solo puede votar una vez
+    vistas, unicos, resultados = set(), [], [None] * len(lote)
+    for i, (voto, _, _) in enumerate(lote):
+        if voto.credencial in vistas:
+            resultados[i] = HTTPException(status_code=403, detail="Votante no autorizado para votar")
         else:
-            candidato_final = voto.candidato_id
-        
-        vote_data = {
-            'numero_comprobante': numero_comprobante,
-            'candidato_id': candidato_final,
-            'timestamp': datetime.now(),
-            'es_observado': es_observado,
-            'estado_validacion': estado_validacion,
-            'circuito_id': circuito_id,
-            'es_anulado': es_anulado
-        }
-        VotoDAO.create_vote(connection, vote_data)
-        
-        # Actualizar estado de autorización
-        VotanteDAO.update_authorization_status(connection, voto.credencial, 'VOTÓ', datetime.now())
+            vistas.add(voto.credencial)
+            unicos.append(i)
+    try:
+        with get_db_transaction() as connection:
+            escritos = _registrar_lote(connection, [lote[i] for i in unicos])
+    except Exception as e:
+        if not _error_de_datos(e):
+            print(f"Lote de {len(unicos)} votos rechazado, base no disponible: {e}")
+            escritos = [e] * len(unicos)
+        else:
+            print(f"Lote de {len(unicos)} votos con conflicto, registrando individualmente: {e}")
+            escritos = [_registrar_individual(lote[i][0], lote[i][1]) for i in unicos]
+    for i, resultado in zip(unicos, escritos):
+        resultados[i] = resultado
+    return resultados
+
+class _LoteEnConflicto(Exception):
+    """Alguna credencial del lote ya no estaba habilitada"""
+
+def _error_de_datos(error: Exception) -> bool:
+    """Errores causados por algún voto del lote: los demás pueden escribirse solos"""
+    return isinstance(error, (_LoteEnConflicto, mysql.connector.errors.IntegrityError, mysql.connector.errors.DataError))
+
+def _registrar_lote(connection, lote: list) -> list:
+    """UPDATE condicional y INSERT de todo el lote con executemany"""
+    ahora = momento_actual()
+    credenciales = [voto.credencial for voto, _, _ in lote]
+    if VotanteDAO.mark_many_as_voted(connection, credenciales, ahora) != len(lote):
+        # Alguna credencial ya no estaba habilitada (o se repite en el lote)
+        raise _LoteEnConflicto("autorizaciones no habilitadas en el lote")
     
-        mensaje = f"Voto registrado exitosamente. Comprobante: {numero_comprobante}"
-        if es_observado:
-            mensaje += f" (VOTO OBSERVADO - Circuito credencial: {auth_record['circuito_id']}, Circuito mesa: {circuito_id})"
+    # Un bloque de comprobantes por circuito, en orden de circuito para no cruzar locks
+    por_circuito = Counter(current_user.circuito_id for _, current_user, _ in lote)
+    siguiente = {
+        circuito_id: _con_secuencia(VotoDAO.reserve_comprobante_block(connection, circuito_id, cantidad))
+        for circuito_id, cantidad in sorted(por_circuito.items())
+    }
+    votos, respuestas = [], []
+    for voto, current_user, auth_record in lote:
+        circuito_id = current_user.circuito_id
+        numero_comprobante = _format_comprobante(circuito_id, siguiente[circuito_id])
+        siguiente[circuito_id] += 1
+        vote_data = _build_vote_data(voto, auth_record, circuito_id, numero_comprobante, ahora)
+        votos.append(vote_data)
+        respuestas.append(VotoResponse(mensaje=_vote_message(vote_data, auth_record)))
+    VotoDAO.create_votes(connection, votos)
+    ConteoDAO.increment(connection, deltas_votos(votos))
+    SerieDAO.add_votes(connection, votos)
+    return respuestas
+
+def _registrar_individual(voto: VotoRequest, current_user: CurrentUser):
+    """Registrar un voto en su propia transacción; devuelve la excepción en vez de lanzarla"""
+    try:
+        with get_db_transaction() as connection:
+            return _registrar_voto(connection, voto, current_user)
+    except Exception as e:
+        return e
+
+@bumps(RESULTADOS)
+async def cast_vote_async(voto: VotoRequest, current_user: CurrentUser) -> VotoResponse:
+    """Registrar voto sin bloquear el event loop (DB_MODE=async)"""
+    circuito_id = _circuito_de_mesa(current_user)
+    async with get_async_db_transaction() as connection:
+        ahora = momento_actual()
+        if not await AsyncVotanteDAO.mark_as_voted(connection, voto.credencial, ahora):
+            raise HTTPException(status_code=403, detail="Votante no autorizado para votar")
         
-        return VotoResponse(mensaje=mensaje)
+        reserva = _con_secuencia(await AsyncVotoDAO.reserve_comprobante(connection, circuito_id, voto.credencial))
+        numero_comprobante = _format_comprobante(circuito_id, reserva['ultimo_numero'])
+        vote_data = _build_vote_data(voto, reserva, circuito_id, numero_comprobante, ahora)
+        await AsyncVotoDAO.create_vote(connection, vote_data)
+        await AsyncConteoDAO.increment(connection, deltas_votos([vote_data]))
+        await AsyncSerieDAO.add_votes(connection, [vote_data])
+        return VotoResponse(mensaje=_vote_message(vote_data, reserva))
 
+@workload('votacion')
 def get_observed_votes(circuito: str) -> list:
     """Obtener votos observados pendientes para el circuito"""
     with get_db_connection() as connection:
@@ -111,6 +296,8 @@ def get_observed_votes(circuito: str) -> list:
             for voto in votos
         ]
 
+@workload('votacion')
+@bumps(RESULTADOS)
 def validate_observed_vote(voto_id: int, accion: str) -> dict:
     """Validar o rechazar voto observado"""
     with get_db_transaction() as connection:
@@ -125,5 +312,16 @@ def validate_observed_vote(voto_id: int, accion: str) -> dict:
         else:
             raise HTTPException(status_code=400, detail="Acción no válida")
         
-        VotoDAO.update_vote_validation(connection, voto_id, estado)
+        if voto['estado_validacion'] == estado:
+            return {"mensaje": f"Voto {accion}o exitosamente"}
+        
+        # Condicional sobre el estado leído: dos validaciones simultáneas no cuentan dos veces
+        if not VotoDAO.update_vote_validation(connection, voto_id, estado, voto['estado_validacion']):
+            raise HTTPException(status_code=409, detail="El voto cambió de estado, reintente")
+        
+        deltas = Counter()
+        for clave, delta in ((clave_conteo(voto), -1), (clave_conteo(dict(voto, estado_validacion=estado)), 1)):
+            if clave is not None:
+                deltas[clave] += delta
+        ConteoDAO.increment(connection, deltas)
         return {"mensaje": f"Voto {accion}o exitosamente"}
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""
+Backend SQLite embebido para pruebas de carga locales (DB_BACKEND=sqlite)
+
+Expone conexiones y cursores con la misma interfaz que usan los DAO de
+mysql.connector (cursor(dictionary=True), commit/rollback, in_transaction,
+ping, lastrowid, rowcount) y traduce el dialecto MySQL del proyecto a SQLite:
+
+- placeholders %s / %(nombre)s  ->  ? / :nombre
+- CAST(... AS UNSIGNED), INSERT IGNORE, NOW(), GREATEST/LEAST, IF(...), SUBSTRING_INDEX
+- ON DUPLICATE KEY UPDATE col = VALUES(col)  ->  ON CONFLICT DO UPDATE SET col = excluded.col
+- SET FOREIGN_KEY_CHECKS, SELECT ... FOR UPDATE
+- DDL: AUTO_INCREMENT, ENUM, UNSIGNED, UNIQUE KEY, KEY/INDEX dentro de CREATE TABLE
+
+Los errores de sqlite3 se convierten en los de mysql.connector para que los
+servicios los manejen igual que en producción. MySQL sigue siendo el backend
+de producción: esto es un sustituto para benchmarks, no una réplica exacta
+(por ejemplo un upsert que actualiza informa rowcount 1 y no 2).
+"""
+import datetime
+import functools
+import itertools
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+import mysql.connector.errors
+
+_connection_ids = itertools.count(1)
+
+# Sentencias ejecutadas por todas las conexiones (equivalente a 'Questions' de MySQL)
+_statements_lock = threading.Lock()
+_statements = 0
+
+def statement_count() -> int:
+    """Total de sentencias ejecutadas desde que se cargó el módulo"""
+    return _statements
+
+def _count_statement():
+    global _statements
+    with _statements_lock:
+        _statements += 1
+
+# Fechas con el mismo formato que devuelve MySQL
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_converter("DATETIME", lambda value: datetime.datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DATE", lambda value: datetime.date.fromisoformat(value.decode()))
+sqlite3.register_converter("BOOLEAN", lambda value: bool(int(value)))
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+_REWRITES = [
+    (re.compile(r"\bAS\s+(?:UNSIGNED|SIGNED)(?:\s+INTEGER)?\s*\)", re.I), "AS INTEGER)"),
+    (re.compile(r"\bINSERT\s+IGNORE\b", re.I), "INSERT OR IGNORE"),
+    (re.compile(r"\bNOW\(\)", re.I), "datetime('now', 'localtime')"),
+    (re.compile(r"\bGREATEST\s*\(", re.I), "MAX("),
+    (re.compile(r"\bLEAST\s*\(", re.I), "MIN("),
+    (re.compile(r"\bIF\s*\(", re.I), "IIF("),
+    (re.compile(r"\s+FOR\s+UPDATE\s*$", re.I), ""),
+    # Las FK se difieren al commit en vez de desactivarse: el PRAGMA vuelve solo
+    # a su valor al terminar la transacción y la conexión del pool queda limpia
+    (re.compile(r"^\s*SET\s+FOREIGN_KEY_CHECKS\s*=\s*0\s*$", re.I), "PRAGMA defer_foreign_keys = ON"),
+    (re.compile(r"^\s*SET\s+FOREIGN_KEY_CHECKS\s*=\s*1\s*$", re.I), "PRAGMA defer_foreign_keys = OFF"),
+]
+_UPSERT = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I)
+_UPSERT_VALUES = re.compile(r"\bVALUES\s*\(\s*(\w+)\s*\)", re.I)
+_CREATE_TABLE = re.compile(r"^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.I)
+_DDL_REWRITES = [
+    (re.compile(r"\b(?:BIG|SMALL|TINY|MEDIUM)?INT(?:\s+UNSIGNED)?\s+(?:NOT\s+NULL\s+)?AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.I),
+     "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bENUM\s*\([^)]*\)", re.I), "TEXT"),
+    (re.compile(r"\s+UNSIGNED\b", re.I), ""),
+    (re.compile(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b", re.I), ""),
+    (re.compile(r"\bUNIQUE\s+(?:KEY|INDEX)\s+(\w+)\s*\(", re.I), r"CONSTRAINT \1 UNIQUE ("),
+    (re.compile(r"\)\s*(?:ENGINE|DEFAULT\s+CHARSET|CHARSET|COLLATE)\b[^)]*$", re.I), ")"),
+]
+_INLINE_INDEX = re.compile(r",\s*(?:KEY|INDEX)\s+(\w+)\s*\(([^)]*)\)", re.I)
+
+@functools.lru_cache(maxsize=512)
+def translate(sql: str, with_params: bool = True) -> Tuple[str, Tuple[str, ...]]:
+    """Traducir una sentencia MySQL a SQLite
+
+    Devuelve (sentencia, sentencias_extra); las extra son los CREATE INDEX de
+    los KEY/INDEX declarados dentro de un CREATE TABLE. Como mysql.connector,
+    los placeholders solo se reemplazan cuando la sentencia recibe parámetros.
+    """
+    extra: List[str] = []
+    table = _CREATE_TABLE.match(sql)
+    if table:
+        for pattern, replacement in _DDL_REWRITES:
+            sql = pattern.sub(replacement, sql)
+        for name, columns in _INLINE_INDEX.findall(sql):
+            extra.append(f"CREATE INDEX IF NOT EXISTS {name} ON {table.group(1)} ({columns})")
+        sql = _INLINE_INDEX.sub("", sql)
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    upsert = _UPSERT.search(sql)
+    if upsert:
+        # Sin conflict target aplica a cualquier clave única (SQLite >= 3.35). Un
+        # INSERT ... SELECT necesita un WHERE para que SQLite no lea ON como un JOIN
+        tail = _UPSERT_VALUES.sub(r"excluded.\1", sql[upsert.end():])
+        sql = sql[:upsert.start()] + "ON CONFLICT DO UPDATE SET" + tail
+    if with_params:
+        sql = _PLACEHOLDER.sub(_placeholder, sql)
+    return sql, tuple(extra)
+
+def _substring_index(texto: Optional[str], separador: str, cantidad: int) -> Optional[str]:
+    """SUBSTRING_INDEX de MySQL: lo anterior a la n-ésima aparición (o lo posterior si n < 0)"""
+    if texto is None or cantidad == 0:
+        return None if texto is None else ''
+    partes = texto.split(separador)
+    return separador.join(partes[:cantidad] if cantidad > 0 else partes[cantidad:])
+
+def _placeholder(match) -> str:
+    if match.group(0) == "%%":
+        return "%"
+    return f":{match.group(1)}" if match.group(1) else "?"
+
+def _mysql_error(error: sqlite3.Error) -> mysql.connector.errors.Error:
+    """Convertir un error de sqlite3 en el equivalente de mysql.connector"""
+    message = str(error)
+    if isinstance(error, sqlite3.IntegrityError):
+        errno = 1062 if "UNIQUE" in message or "PRIMARY KEY" in message else 1452
+        return mysql.connector.errors.IntegrityError(msg=message, errno=errno)
+    if isinstance(error, sqlite3.OperationalError):
+        if "locked" in message or "busy" in message:
+            return mysql.connector.errors.DatabaseError(msg=message, errno=1205)
+        if "no such" in message or "syntax error" in message:
+            return mysql.connector.errors.ProgrammingError(msg=message)
+        return mysql.connector.errors.OperationalError(msg=message)
+    if isinstance(error, sqlite3.ProgrammingError):
+        return mysql.connector.errors.ProgrammingError(msg=message)
+    return mysql.connector.errors.DatabaseError(msg=message)
+
+class SQLiteCursor:
+    """Cursor con la interfaz de mysql.connector (tuplas o diccionarios)"""
+
+    def __init__(self, connection: "SQLiteConnection", dictionary: bool = False):
+        self._connection = connection
+        self._cursor = connection._cnx.cursor()
+        self._dictionary = dictionary
+        self._columns: Optional[Tuple[str, ...]] = None
+        self._fetched = 0
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def execute(self, operation: str, params=None):
+        sql, extra = translate(operation, params is not None)
+        _count_statement()
+        try:
+            self._cursor.execute(sql, params if params is not None else ())
+            for statement in extra:
+                self._connection._cnx.execute(statement)
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        self._after_execute()
+
+    def executemany(self, operation: str, seq_params):
+        sql, _ = translate(operation)
+        _count_statement()
+        try:
+            self._cursor.executemany(sql, seq_params)
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        self._after_execute()
+
+    def _after_execute(self):
+        description = self._cursor.description
+        self._columns = tuple(column[0] for column in description) if description else None
+        self._fetched = 0
+        # Como en mysql.connector, un SELECT informa las filas leídas hasta el momento
+        self.rowcount = 0 if description else self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self._columns, row))
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._fetched += 1
+            self.rowcount = self._fetched
+        return self._row(row)
+
+    def fetchmany(self, size: int = 1) -> list:
+        rows = self._cursor.fetchmany(size)
+        self._fetched += len(rows)
+        self.rowcount = self._fetched
+        return [self._row(row) for row in rows]
+
+    def fetchall(self) -> list:
+        rows = self._cursor.fetchall()
+        self._fetched += len(rows)
+        self.rowcount = self._fetched
+        return [self._row(row) for row in rows]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def column_names(self) -> Tuple[str, ...]:
+        return self._columns or ()
+
+    def close(self):
+        self._cursor.close()
+
+class SQLiteConnection:
+    """Conexión SQLite con la interfaz de MySQLConnection que usan los DAO y el pool"""
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        self.connection_id = next(_connection_ids)
+        # IMMEDIATE toma el lock de escritura al abrir la transacción (primer DML),
+        # igual que un SELECT ... FOR UPDATE, y evita SQLITE_BUSY al promover el lock
+        self._cnx = sqlite3.connect(
+            path, timeout=busy_timeout, isolation_level="IMMEDIATE",
+            detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False,
+        )
+        self._cnx.execute("PRAGMA foreign_keys = ON")
+        self._cnx.create_function("SUBSTRING_INDEX", 3, _substring_index, deterministic=True)
+        if path != ":memory:":
+            self._cnx.execute("PRAGMA journal_mode = WAL")
+            self._cnx.execute("PRAGMA synchronous = NORMAL")
+
+    def cursor(self, dictionary: bool = False, prepared: bool = False, buffered: Optional[bool] = None) -> SQLiteCursor:
+        """Crear un cursor; prepared se ignora porque sqlite3 ya cachea las sentencias"""
+        if self._cnx is None:
+            raise mysql.connector.errors.OperationalError(msg="Conexión SQLite cerrada")
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._cnx is not None and self._cnx.in_transaction
+
+    def start_transaction(self, consistent_snapshot: bool = False, isolation_level: Optional[str] = None, readonly: bool = False):
+        """Abrir una transacción; readonly no toma el lock de escritura
+
+        Con readonly (BEGIN DEFERRED) la primera lectura fija un snapshot del WAL que
+        no bloquea a los escritores, como START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY.
+        """
+        if not self.in_transaction:
+            self._cnx.execute("BEGIN DEFERRED" if readonly else "BEGIN IMMEDIATE")
+
+    def commit(self):
+        _count_statement()
+        try:
+            self._cnx.commit()
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+
+    def rollback(self):
+        self._cnx.rollback()
+
+    def is_connected(self) -> bool:
+        return self._cnx is not None
+
+    def ping(self, reconnect: bool = False, attempts: int = 1, delay: int = 0):
+        if self._cnx is None:
+            raise mysql.connector.errors.InterfaceError(msg="Conexión SQLite cerrada")
+        self._cnx.execute("SELECT 1").fetchone()
+
+    def close(self):
+        if self._cnx is not None:
+            self._cnx.close()
+            self._cnx = None
+
+def connect(path: str, busy_timeout: float = 5.0) -> SQLiteConnection:
+    """Abrir una conexión al archivo SQLite"""
+    return SQLiteConnection(path, busy_timeout)
@@ -0,0 +1,56 @@
+"""
+Pruebas contra el backend SQLite embebido (DB_BACKEND=sqlite)
+
+La configuración de la base se lee al importar database, así que las variables
+se fijan acá, antes de importar cualquier módulo del proyecto. Cada corrida usa
+una base nueva en un directorio temporal.
+"""
+import os
+import sys
+import tempfile
+
+os.environ['DB_BACKEND'] = 'sqlite'
+os.environ['DB_SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='voting-tests-'), 'voting_db.sqlite3')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uuid
+from datetime import datetime
+import pytest
+from create_tables import create_tables
+from database import get_db_transaction
+from dao.voto_dao import VotoDAO
+from schemas import CurrentUser
+
+@pytest.fixture(scope='session')
+def mesa() -> CurrentUser:
+    """Tablas creadas y un circuito con su secuencia; devuelve el usuario de mesa del circuito"""
+    create_tables()
+    with get_db_transaction() as connection:
+        cursor = connection.cursor()
+        cursor.execute("""
+            INSERT INTO establecimientos (nombre, departamento, ciudad, direccion, tipo_establecimiento, accesible)
+            VALUES ('Escuela de prueba', 'Montevideo', 'Montevideo', 'Calle 1', 'escuela', TRUE)
+        """)
+        cursor.execute("INSERT INTO circuitos (numero_circuito, establecimiento_id) VALUES ('1', %s)", (cursor.lastrowid,))
+        circuito_id = cursor.lastrowid
+        cursor.close()
+        VotoDAO.seed_comprobante_sequence(connection, circuito_id)
+    return CurrentUser(username='mesa1', role='mesa', circuito_id=circuito_id, numero_circuito='1')
+
+@pytest.fixture
+def habilitar(mesa):
+    """Crear autorizaciones HABILITADA en el circuito de la mesa; devuelve las credenciales"""
+    def crear(cantidad: int = 1) -> list:
+        credenciales = [f"T{uuid.uuid4().hex[:12]}" for _ in range(cantidad)]
+        with get_db_transaction() as connection:
+            cursor = connection.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO autorizaciones (credencial, circuito_id, estado, autorizado_por, fecha_autorizacion, es_autorizacion_especial)
+                VALUES (%s, %s, 'HABILITADA', 'pruebas', %s, FALSE)
+                """,
+                [(credencial, mesa.circuito_id, datetime.now()) for credencial in credenciales]
+            )
+            cursor.close()
+        return credenciales
+    return crear
@@ -0,0 +1,17 @@
+import asyncio
+import pytest
+from database import workload
+from dispatch import EXECUTOR_SHARES, run_service
+
+@workload('votacion')
+def _servicio_votacion() -> str:
+    return 'ok'
+
+def test_servicio_en_executor_de_su_pool():
+    clases = [clase for clase, (carga, _) in EXECUTOR_SHARES.items() if carga == 'votacion']
+    for clase in clases:
+        assert asyncio.run(run_service(clase, _servicio_votacion)) == 'ok'
+
+def test_servicio_en_executor_de_otro_pool():
+    with pytest.raises(ValueError):
+        asyncio.run(run_service('admin', _servicio_votacion))
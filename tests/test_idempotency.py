@@ -0,0 +1,67 @@
+import asyncio
+import mysql.connector
+import pytest
+from fastapi import HTTPException
+import idempotency
+from idempotency import COMPLETA, EN_CURSO, NUEVA, MemoryIdempotencyStore, run_idempotent
+
+@pytest.fixture
+def store(monkeypatch) -> MemoryIdempotencyStore:
+    store = MemoryIdempotencyStore(100, 60)
+    monkeypatch.setattr(idempotency, '_memory_store', store)
+    monkeypatch.setattr(idempotency, '_store', store)
+    return store
+
+def _estado(store: MemoryIdempotencyStore) -> str:
+    """Estado de la clave del test (NUEVA si se liberó)"""
+    if not len(store):
+        return NUEVA
+    return store.begin(next(iter(store._entries)), 'huella')[0]
+
+def _correr(call, clave: str = 'k1'):
+    return run_idempotent(clave, 'votar', 'mesa1', {'candidato_id': 1}, 'votos', call)
+
+def test_guarda_la_respuesta_y_la_repite(store):
+    llamadas = []
+    async def call():
+        llamadas.append(1)
+        return {'comprobante': 'C-1'}
+    async def prueba():
+        assert await _correr(call) == {'comprobante': 'C-1'}
+        repetida = await _correr(call)
+        assert repetida.headers['Idempotent-Replayed'] == 'true'
+    asyncio.run(prueba())
+    assert len(llamadas) == 1
+
+@pytest.mark.parametrize('error, estado', [
+    (mysql.connector.errors.PoolError("sin conexiones"), NUEVA),
+    (HTTPException(status_code=503), NUEVA),
+    (HTTPException(status_code=403), COMPLETA),
+    (mysql.connector.errors.OperationalError("conexión perdida"), EN_CURSO),
+])
+def test_libera_la_clave_solo_si_no_hubo_efecto(store, error, estado):
+    async def call():
+        raise error
+    with pytest.raises(type(error)):
+        asyncio.run(_correr(call))
+    assert _estado(store) == estado
+
+def test_cliente_desconectado_guarda_el_resultado(store):
+    async def prueba():
+        liberar = asyncio.Event()
+        async def call():
+            await liberar.wait()
+            return {'comprobante': 'C-2'}
+        peticion = asyncio.ensure_future(_correr(call))
+        await asyncio.sleep(0)
+        peticion.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await peticion
+        liberar.set()
+        for _ in range(100):
+            if _estado(store) == COMPLETA:
+                break
+            await asyncio.sleep(0)
+        repetida = await _correr(call)
+        assert repetida.headers['Idempotent-Replayed'] == 'true'
+    asyncio.run(prueba())
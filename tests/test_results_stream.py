@@ -0,0 +1,73 @@
+import asyncio
+import json
+from results_stream import ResultsBroadcaster, diff_snapshots
+
+def _snapshot(total: int, departamentos: dict) -> dict:
+    return {'nacional': {'total': total}, 'departamentos': departamentos}
+
+def _datos(evento: bytes) -> tuple:
+    """(id, tipo, datos) de un evento SSE"""
+    campos = dict(linea.split(': ', 1) for linea in evento.decode('utf-8').strip().split('\n'))
+    return campos['id'], campos['event'], json.loads(campos['data'])
+
+class _Base:
+    """Snapshot que los tests modifican entre ticks"""
+    def __init__(self, snapshot: dict):
+        self.snapshot = snapshot
+
+    async def compute(self) -> dict:
+        return json.loads(json.dumps(self.snapshot))
+
+def test_diff_snapshots_solo_cambios():
+    anterior = _snapshot(10, {'Montevideo': {'total': 6, 'blanco': 1}, 'Canelones': {'total': 4}})
+    actual = _snapshot(11, {'Montevideo': {'total': 7, 'blanco': 1}, 'Canelones': {'total': 4}})
+    assert diff_snapshots(anterior, actual) == {'nacional': {'total': 11}, 'departamentos': {'Montevideo': {'total': 7}}}
+    assert diff_snapshots(actual, actual) == {}
+
+def test_diff_snapshots_departamento_nuevo_y_eliminado():
+    anterior = _snapshot(4, {'Canelones': {'total': 4}})
+    actual = _snapshot(4, {'Salto': {'total': 4}})
+    assert diff_snapshots(anterior, actual) == {'departamentos': {'Salto': {'total': 4}, 'Canelones': None}}
+
+def test_reconectar_recibe_los_cambios_perdidos():
+    async def prueba():
+        base = _Base(_snapshot(1, {}))
+        broadcaster = ResultsBroadcaster(base.compute, interval_s=3600)
+        try:
+            suscriptor = await broadcaster.subscribe()
+            ultimo, tipo, _ = _datos(suscriptor.queue.get_nowait())
+            assert tipo == 'snapshot'
+            for total in (2, 3):
+                base.snapshot = _snapshot(total, {})
+                await broadcaster._tick()
+            otro = await broadcaster.subscribe(ultimo)
+            eventos = [_datos(otro.queue.get_nowait()) for _ in range(otro.queue.qsize())]
+            assert [(tipo, datos['nacional']) for _, tipo, datos in eventos] == [('cambios', {'total': 2}), ('cambios', {'total': 3})]
+            # Al día: no hay nada que reenviar
+            al_dia = await broadcaster.subscribe(eventos[-1][0])
+            assert al_dia.queue.empty()
+            # Id de otro worker: snapshot completo
+            ajeno = await broadcaster.subscribe('otro-' + eventos[-1][0].split('-')[1])
+            assert _datos(ajeno.queue.get_nowait())[1] == 'snapshot'
+        finally:
+            await broadcaster.close()
+    asyncio.run(prueba())
+
+def test_reconectar_despues_de_quedar_sin_suscriptores():
+    async def prueba():
+        base = _Base(_snapshot(1, {}))
+        broadcaster = ResultsBroadcaster(base.compute, interval_s=0.01)
+        try:
+            suscriptor = await broadcaster.subscribe()
+            ultimo, _, _ = _datos(suscriptor.queue.get_nowait())
+            broadcaster.unsubscribe(suscriptor)
+            await broadcaster._task
+            # Cambios mientras nadie estaba suscripto
+            base.snapshot = _snapshot(5, {})
+            nuevo = await broadcaster.subscribe(ultimo)
+            evento_id, tipo, datos = _datos(nuevo.queue.get_nowait())
+            assert tipo == 'snapshot' and datos['nacional'] == {'total': 5}
+            assert evento_id != ultimo
+        finally:
+            await broadcaster.close()
+    asyncio.run(prueba())
@@ -0,0 +1,88 @@
+from datetime import datetime
+import mysql.connector
+import pytest
+from fastapi import HTTPException
+from database import PoolTimeoutError, get_db_connection, get_db_transaction
+from dao.votante_dao import VotanteDAO
+from schemas import VotoRequest, VotoResponse
+from services import voto_service
+
+def _estado(credencial: str) -> str:
+    with get_db_connection() as connection:
+        return VotanteDAO.get_authorization(connection, credencial)['estado']
+
+def _votos(circuito_id: int) -> list:
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT numero_comprobante FROM votos WHERE circuito_id = %s ORDER BY id", (circuito_id,))
+        comprobantes = [fila[0] for fila in cursor.fetchall()]
+        cursor.close()
+    return comprobantes
+
+def _lote(mesa, credenciales: list) -> list:
+    """Elementos del lote como los arma enqueue_vote (voto, usuario, autorización)"""
+    with get_db_connection() as connection:
+        return [
+            (VotoRequest(credencial=credencial, candidato_id=0), mesa, VotanteDAO.get_authorization(connection, credencial))
+            for credencial in credenciales
+        ]
+
+def test_mark_as_voted_solo_una_vez(habilitar):
+    credencial, = habilitar()
+    with get_db_transaction() as connection:
+        assert VotanteDAO.mark_as_voted(connection, credencial, datetime.now())
+        assert not VotanteDAO.mark_as_voted(connection, credencial, datetime.now())
+    assert _estado(credencial) == 'VOTÓ'
+
+def test_mark_as_voted_no_habilitada(habilitar):
+    credencial, = habilitar()
+    with get_db_transaction() as connection:
+        VotanteDAO.update_authorization_status(connection, credencial, 'SUSPENDIDA')
+        assert not VotanteDAO.mark_as_voted(connection, credencial, datetime.now())
+        assert not VotanteDAO.mark_as_voted(connection, 'NO-EXISTE', datetime.now())
+    assert _estado(credencial) == 'SUSPENDIDA'
+
+def test_lote_con_credencial_repetida(mesa, habilitar):
+    a, b = habilitar(2)
+    antes = len(_votos(mesa.circuito_id))
+    resultados = voto_service._flush_votos(_lote(mesa, [a, a, b]))
+    assert isinstance(resultados[0], VotoResponse)
+    assert isinstance(resultados[1], HTTPException) and resultados[1].status_code == 403
+    assert isinstance(resultados[2], VotoResponse)
+    comprobantes = _votos(mesa.circuito_id)[antes:]
+    assert len(comprobantes) == 2
+    # Bloque consecutivo de la secuencia del circuito
+    numeros = [int(c.split('-')[1]) for c in comprobantes]
+    assert numeros[1] == numeros[0] + 1
+    assert _estado(a) == _estado(b) == 'VOTÓ'
+
+def test_lote_con_credencial_ya_votada_sigue_voto_por_voto(mesa, habilitar):
+    votada, nueva = habilitar(2)
+    lote = _lote(mesa, [votada, nueva])
+    with get_db_transaction() as connection:
+        VotanteDAO.mark_as_voted(connection, votada, datetime.now())
+    antes = len(_votos(mesa.circuito_id))
+    resultados = voto_service._flush_votos(lote)
+    assert isinstance(resultados[0], HTTPException) and resultados[0].status_code == 403
+    assert isinstance(resultados[1], VotoResponse)
+    assert len(_votos(mesa.circuito_id)) == antes + 1
+
+def test_lote_sin_base_no_reintenta_voto_por_voto(mesa, habilitar, monkeypatch):
+    lote = _lote(mesa, habilitar(3))
+    llamadas = []
+    def sin_conexiones():
+        llamadas.append(1)
+        raise PoolTimeoutError("sin conexiones libres")
+    monkeypatch.setattr(voto_service, 'get_db_transaction', sin_conexiones)
+    resultados = voto_service._flush_votos(lote)
+    assert len(llamadas) == 1
+    assert all(isinstance(resultado, PoolTimeoutError) for resultado in resultados)
+    for _, _, auth_record in lote:
+        assert _estado(auth_record['credencial']) == 'HABILITADA'
+
+def test_journal_solo_sin_conexion():
+    assert voto_service._base_no_disponible(mysql.connector.errors.InterfaceError("sin conexión", errno=2003))
+    assert voto_service._base_no_disponible(mysql.connector.errors.OperationalError("conexión perdida", errno=2013))
+    assert not voto_service._base_no_disponible(PoolTimeoutError("sin conexiones libres"))
+    assert not voto_service._base_no_disponible(mysql.connector.errors.DatabaseError("lock wait timeout", errno=1205))
+    assert not voto_service._base_no_disponible(mysql.connector.errors.OperationalError("conexión devuelta"))
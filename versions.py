@@ -0,0 +1,57 @@
+import functools
+import inspect
+import threading
+from typing import Dict
+
+# Versiones en memoria del proceso: cada escritura que cambia los resultados sube la
+# suya después del commit. Los cachés comparan la versión con la de sus entradas.
+# Entre workers no se comparten; el TTL de cada caché acota cuánto puede atrasarse uno.
+RESULTADOS = 'resultados'   # votos, validaciones y autorizaciones
+ESTRUCTURA = 'estructura'   # elecciones, establecimientos y circuitos
+ELECCION = 'eleccion'       # elección activa y su boleta (partidos y candidatos)
+
+_versions: Dict[str, int] = {}
+_lock = threading.Lock()
+
+def bump_version(nombre: str) -> int:
+    """Subir la versión y devolver la nueva"""
+    with _lock:
+        _versions[nombre] = _versions.get(nombre, 0) + 1
+        return _versions[nombre]
+
+def get_version(nombre: str) -> int:
+    """Versión actual (0 si nunca cambió)"""
+    return _versions.get(nombre, 0)
+
+def get_versions() -> Dict[str, int]:
+    """Todas las versiones"""
+    with _lock:
+        return dict(_versions)
+
+def bumps(*nombres: str):
+    """Subir las versiones cuando el servicio termina, haya o no fallado
+
+    Los servicios hacen commit al salir de su bloque with, así que la versión sube
+    después del commit: un lector que vea la versión nueva ya ve los datos nuevos.
+    Subir de más solo cuesta un recálculo.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    for nombre in nombres:
+                        bump_version(nombre)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                for nombre in nombres:
+                    bump_version(nombre)
+        return wrapper
+    return decorator